@@ -0,0 +1,82 @@
+# ./chat_bot/assistant_cache.py
+
+import threading
+
+
+class AssistantCache:
+    """
+    In-memory cache of assistant objects keyed by assistant ID.
+
+    AssistantManager fills it from every retrieve, list, create and update response and drops
+    entries on delete, so repeated reads within one user action are served from memory.
+
+    Writes are ordered by a local sequence number taken when the request was sent, so a response
+    to an older request, such as a page of a listing prefetched before an update, never replaces
+    the result of a newer one. Nothing is written to the assistant itself.
+    """
+    def __init__(self):
+        """
+        Initializes an empty cache.
+        """
+        self.lock = threading.Lock()
+        self.assistants = {}
+        self.sequence = 0
+
+    def get(self, assistant_id):
+        """
+        Returns the cached assistant.
+
+        Parameters:
+        assistant_id (str): The ID of the assistant.
+
+        Returns:
+        Assistant: The cached assistant object, or None if it is not cached.
+        """
+        with self.lock:
+            entry = self.assistants.get(assistant_id)
+            return entry[1] if entry is not None else None
+
+    def next_sequence(self):
+        """
+        Returns the sequence number of a request about to be sent; later requests get higher numbers.
+
+        Returns:
+        int: The request's sequence number.
+        """
+        with self.lock:
+            self.sequence += 1
+            return self.sequence
+
+    def put(self, assistant, sequence):
+        """
+        Stores an assistant unless the cache holds one from a request sent after this one.
+
+        Parameters:
+        assistant (Assistant): The assistant object returned by the API.
+        sequence (int): The number next_sequence gave the request that returned it.
+
+        Returns:
+        Assistant: The assistant object now held in the cache.
+        """
+        with self.lock:
+            cached = self.assistants.get(assistant.id)
+            if cached is None or sequence >= cached[0]:
+                self.assistants[assistant.id] = (sequence, assistant)
+            return self.assistants[assistant.id][1]
+
+    def drop(self, assistant_id):
+        """
+        Removes an assistant from the cache.
+
+        Parameters:
+        assistant_id (str): The ID of the assistant.
+        """
+        with self.lock:
+            self.assistants.pop(assistant_id, None)
+
+    def clear(self):
+        """
+        Removes every cached assistant.
+        """
+        with self.lock:
+            self.assistants.clear()
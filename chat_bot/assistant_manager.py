@@ -1,7 +1,51 @@
 # ./chat_bot/assistant_manager.py
 import json
+from concurrent.futures import ThreadPoolExecutor
+from chat_bot.assistant_cache import AssistantCache
 from chat_bot.file_manager import FileManager
-from chat_bot.utility import initiate_client
+from chat_bot.pagination import iterate_pages
+
+# Up to this many attached files are checked with individual retrieves instead of listing every file.
+TARGETED_CHECK_LIMIT = 10
+# The API accepts at most this many files attached to one assistant.
+MAX_ASSISTANT_FILES = 20
+
+
+def prompt_for_assistant_updates(assistant):
+    """
+    Walks the user through an assistant's updatable parameters and collects new values.
+
+    Parameters:
+    assistant (Assistant): The assistant whose current values are offered as defaults.
+
+    Returns:
+    dict: The parameters to send with the update, including unchanged values.
+    """
+    # Retrieve the assistant's existing parameters.
+    updatable_params = {
+        'name': assistant.name,
+        'model': assistant.model,
+        'instructions': assistant.instructions,
+        'description': assistant.description,
+        'metadata': assistant.metadata,
+        'tools': assistant.tools
+    }
+
+    # Interactive update process
+    for param_name, current_value in updatable_params.items():
+        print(f'Current value of {param_name}: {current_value}')
+        user_input = input(f'Press Enter to keep the current value or enter a new value for {param_name}: ').strip()
+        # If the user enters a new value, update the parameter
+        if user_input:
+            if param_name in ['metadata', 'tools']:
+                # Convert the string input to a Python dictionary using json.loads()
+                try:
+                    updatable_params[param_name] = json.loads(user_input)
+                except json.JSONDecodeError as e:
+                    print(f'Error: Invalid JSON for {param_name}. Using the current value instead.')
+            else:
+                updatable_params[param_name] = user_input
+    return updatable_params
 
 
 class AssistantManager:
@@ -9,14 +53,20 @@ class AssistantManager:
     AssistantManager provides functionalities to manage the lifecycle of assistants.
     It includes creating, listing, loading, updating, and deleting assistants within the GPT-4-Turbo-Assistant environment.
     """
-    def __init__(self, client):
+    def __init__(self, client, file_manager=None, response_cache=None):
         """
         Initialize the AssistantManager with a client to manage assistants.
 
         Parameters:
         client (OpenAI_Client): The client object used for assistant operations.
+        file_manager (FileManager, optional): Used to check attached files. Defaults to a FileManager on the same client.
+        response_cache (ResponseCache, optional): Told about every assistant seen, so replies made
+            before an assistant changed are no longer served.
         """
         self.client = client.beta.assistants
+        self.file_manager = file_manager if file_manager is not None else FileManager(client)
+        self.cache = AssistantCache()
+        self.response_cache = response_cache
 
     def create_assistant(self, model, name, instructions, tools, description=None, metadata=None):
         """
@@ -33,7 +83,8 @@ class AssistantManager:
         Returns:
             The newly created Assistant object.
         """
-        response = self.client.create(
+        return self._send(
+            self.client.create,
             model=model,
             name=name,
             instructions=instructions,
@@ -41,15 +92,48 @@ class AssistantManager:
             metadata=metadata,
             tools=tools
         )
-        return response
+
+    def _send(self, request, **params):
+        """
+        Sends a request that returns an assistant and caches the result.
+
+        The request's sequence number is taken before it is sent, so the cache can tell it from
+        responses to requests sent earlier or later.
+
+        Args:
+            request: The client method to call, e.g. self.client.update.
+            **params: The parameters of the request.
+
+        Returns:
+            The Assistant object now held in the cache.
+        """
+        sequence = self.cache.next_sequence()
+        return self._cache_assistant(request(**params), sequence)
+
+    def _cache_assistant(self, assistant, sequence):
+        """
+        Caches an assistant returned by the API and records its configuration in the response cache.
+
+        Args:
+            assistant: The Assistant object returned by the API.
+            sequence: The cache sequence number of the request that returned it.
+
+        Returns:
+            The Assistant object now held in the cache.
+        """
+        assistant = self.cache.put(assistant, sequence)
+        if self.response_cache is not None:
+            self.response_cache.record_assistant(assistant)
+        return assistant
 
     def clean_missing_files_from_assistant(self, assistant_id):
         """
         Identifies and removes missing file references from an assistant's configuration.
 
         This function checks the files associated with the specified assistant and identifies any files
-        that are no longer present in the file system. It then updates the assistant's configuration
-        to remove these missing files.
+        that no longer exist. It then removes all of them from the assistant's configuration in a
+        single update. Before that update the assistant is retrieved again, and only the missing
+        files are dropped from its current list, so files attached elsewhere in the meantime are kept.
 
         Parameters:
         assistant_id (str): The ID of the assistant to be cleaned.
@@ -65,25 +149,35 @@ class AssistantManager:
             print("No files are associated with this assistant.")
             return []
 
-        file_manager = FileManager(initiate_client())
-        all_files = file_manager.list()
-        file_ids = list(all_files.keys())
-
-        missing_files = [file_id for file_id in assistant_file_ids if file_id not in file_ids]
+        existing_file_ids = self._existing_file_ids(assistant_file_ids)
+        missing_files = [file_id for file_id in assistant_file_ids if file_id not in existing_file_ids]
 
         # Check if there are any missing files
         if missing_files:
-            for missing_file in missing_files:
-                print(f"Deleting missing file {missing_file} from assistant {assistant_id}.")
-                self.client.update(
-                    assistant_id=assistant_id,
-                    file_ids=[file_id for file_id in assistant_file_ids if file_id != missing_file]
-                )
+            print(f"Deleting missing files {', '.join(missing_files)} from assistant {assistant_id}.")
+            current_file_ids = self.load_assistant(assistant_id, refresh=True).file_ids or []
+            self._send(
+                self.client.update,
+                assistant_id=assistant_id,
+                file_ids=[file_id for file_id in current_file_ids if file_id not in missing_files]
+            )
         else:
             print("There are no missing files.")
 
         return missing_files
 
+    def _existing_file_ids(self, file_ids):
+        """
+        Returns the subset of file IDs that still exist.
+
+        A few files are checked with concurrent targeted retrieves; larger sets with one listing.
+        """
+        if len(file_ids) <= TARGETED_CHECK_LIMIT:
+            with ThreadPoolExecutor(max_workers=len(file_ids)) as executor:
+                found = list(executor.map(self.file_manager.exists, file_ids))
+            return {file_id for file_id, exists in zip(file_ids, found) if exists}
+        return set(file_ids) & set(self.file_manager.list(refresh=True))
+
     def add_file_to_assistant(self, assistant_id, file_id):
         """
         Add a file to an assistant's list of files.
@@ -95,36 +189,123 @@ class AssistantManager:
         Returns:
             The updated Assistant object.
         """
-        assistant = self.client.retrieve(assistant_id)
-        existing_file_ids = assistant.file_ids if assistant.file_ids is not None else []
-        updated_file_ids = existing_file_ids + [file_id]
+        return self.add_files_to_assistant(assistant_id, [file_id])
 
-        response = self.client.update(
-            assistant_id=assistant_id,
-            file_ids=updated_file_ids
-        )
-        return response
+    def add_files_to_assistant(self, assistant_id, file_ids):
+        """
+        Add several files to an assistant with a single update.
+
+        Args:
+            assistant_id: The ID of the assistant being updated.
+            file_ids: The IDs of the files to add to the assistant.
+
+        Returns:
+            The updated Assistant object, or the unchanged one if every file was already attached.
+
+        Raises:
+            ValueError: If the assistant would end up with more than MAX_ASSISTANT_FILES files.
+        """
+        return self.update_assistant_files(assistant_id, add_file_ids=file_ids)
+
+    def remove_files_from_assistant(self, assistant_id, file_ids):
+        """
+        Remove several files from an assistant with a single update.
+
+        Args:
+            assistant_id: The ID of the assistant being updated.
+            file_ids: The IDs of the files to detach from the assistant.
+
+        Returns:
+            The updated Assistant object, or the unchanged one if none of the files were attached.
+        """
+        return self.update_assistant_files(assistant_id, remove_file_ids=file_ids)
+
+    def update_assistant_files(self, assistant_id, add_file_ids=(), remove_file_ids=()):
+        """
+        Attach and detach files on an assistant with a single update.
+
+        The final list of files is built locally from a freshly retrieved assistant, so files
+        attached elsewhere are kept; files already attached are not added twice, and the
+        per-assistant file limit is checked before the update is sent. No update is made when
+        the list does not change.
+
+        Args:
+            assistant_id: The ID of the assistant being updated.
+            add_file_ids: The IDs of the files to attach.
+            remove_file_ids: The IDs of the files to detach.
+
+        Returns:
+            The updated Assistant object, or the unchanged one if the file list stays the same.
+
+        Raises:
+            ValueError: If the assistant would end up with more than MAX_ASSISTANT_FILES files.
+        """
+        assistant = self.load_assistant(assistant_id, refresh=True)
+        existing_file_ids = assistant.file_ids if assistant.file_ids is not None else []
+        removed_file_ids = set(remove_file_ids)
+        updated_file_ids = [file_id for file_id in existing_file_ids if file_id not in removed_file_ids]
+        for file_id in add_file_ids:
+            if file_id not in updated_file_ids:
+                updated_file_ids.append(file_id)
+
+        if len(updated_file_ids) > MAX_ASSISTANT_FILES:
+            raise ValueError(
+                f"An assistant can have at most {MAX_ASSISTANT_FILES} files; assistant {assistant_id} "
+                f"would have {len(updated_file_ids)}."
+            )
+        if updated_file_ids == list(existing_file_ids):
+            return assistant
+
+        return self._send(self.client.update, assistant_id=assistant_id, file_ids=updated_file_ids)
 
     def list_assistants(self):
         """
-        List all assistants.
+        List the first page of assistants.
 
         Returns:
-            A list of Assistant objects containing details about each assistant.
+            A page of Assistant objects; use iter_assistants to go through all of them.
         """
         return self.client.list()
 
-    def load_assistant(self, assistant_id):
+    def iter_assistants(self, page_size=20, prefetch=True):
+        """
+        Iterate over all assistants, following the list cursor lazily.
+
+        Args:
+            page_size: The number of assistants requested per page.
+            prefetch: Whether to fetch the next page while the current one is consumed.
+
+        Returns:
+            A generator of Assistant objects.
+        """
+        def fetch_page(after, limit):
+            sequence = self.cache.next_sequence()
+            if after is None:
+                page = self.client.list(limit=limit).data
+            else:
+                page = self.client.list(after=after, limit=limit).data
+            return [self._cache_assistant(assistant, sequence) for assistant in page]
+
+        return iterate_pages(fetch_page, page_size=page_size, prefetch=prefetch)
+
+    def load_assistant(self, assistant_id, refresh=False):
         """
         Load an assistant's parameters by ID.
 
+        The assistant is served from the cache when this manager has already seen it.
+
         Args:
             assistant_id: The unique identifier for the assistant.
+            refresh: Retrieve the assistant from the API even if it is cached.
 
         Returns:
             An Assistant object or details about the assistant.
         """
-        return self.client.retrieve(assistant_id=assistant_id)
+        if not refresh:
+            cached = self.cache.get(assistant_id)
+            if cached is not None:
+                return cached
+        return self._send(self.client.retrieve, assistant_id=assistant_id)
 
     def print_assistant_details(self, assistant_id):
         """
@@ -141,38 +322,16 @@ class AssistantManager:
         """
         Interactively update an assistant's parameters.
 
+        The current values offered as defaults are retrieved, not taken from the cache.
+
         Args:
             assistant_id: The unique identifier for the assistant.
         """
-        assistant = self.load_assistant(assistant_id)
-        # Retrieve the assistant's existing parameters.
-        updatable_params = {
-            'name': assistant.name,
-            'model': assistant.model,
-            'instructions': assistant.instructions,
-            'description': assistant.description,
-            'metadata': assistant.metadata,
-            'tools': assistant.tools
-        }
-
-        # Interactive update process
-        for param_name, current_value in updatable_params.items():
-            print(f'Current value of {param_name}: {current_value}')
-            user_input = input(f'Press Enter to keep the current value or enter a new value for {param_name}: ').strip()
-            # If the user enters a new value, update the parameter
-            if user_input:
-                if param_name in ['metadata', 'tools']:
-                    # Convert the string input to a Python dictionary using json.loads()
-                    try:
-                        updatable_params[param_name] = json.loads(user_input)
-                    except json.JSONDecodeError as e:
-                        print(f'Error: Invalid JSON for {param_name}. Using the current value instead.')
-                else:
-                    updatable_params[param_name] = user_input
+        assistant = self.load_assistant(assistant_id, refresh=True)
+        updatable_params = prompt_for_assistant_updates(assistant)
 
         # After all parameters are reviewed, update the assistant details
-        update_response = self.client.update(assistant_id=assistant_id, **updatable_params)
-        return update_response
+        return self._send(self.client.update, assistant_id=assistant_id, **updatable_params)
 
     def delete_assistant(self, assistant_id):
         """
@@ -185,4 +344,7 @@ class AssistantManager:
             A confirmation message indicating that the assistant was deleted.
         """
         response = self.client.delete(assistant_id=assistant_id)
+        self.cache.drop(assistant_id)
+        if self.response_cache is not None:
+            self.response_cache.forget_assistant(assistant_id)
         return "Assistant deleted successfully."
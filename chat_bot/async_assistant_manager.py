@@ -0,0 +1,151 @@
+# ./chat_bot/async_assistant_manager.py
+from chat_bot.assistant_manager import prompt_for_assistant_updates
+from chat_bot.async_file_manager import AsyncFileManager
+
+
+class AsyncAssistantManager:
+    """
+    AsyncAssistantManager is the asyncio counterpart of AssistantManager, built on an AsyncOpenAI client.
+    It provides the same assistant lifecycle operations as awaitable methods. Assistants are not
+    cached, and the bulk file updates and response cache of AssistantManager are not supported.
+    """
+    def __init__(self, client):
+        """
+        Initialize the AsyncAssistantManager with a client to manage assistants.
+
+        Parameters:
+        client (AsyncOpenAI): The async client object used for assistant operations.
+        """
+        self.client = client.beta.assistants
+        self.file_manager = AsyncFileManager(client)
+
+    async def create_assistant(self, model, name, instructions, tools, description=None, metadata=None):
+        """
+        Create an assistant without files.
+
+        Args:
+            model: ID of the model to use for the assistant.
+            name (optional): The name of the assistant.
+            instructions (optional): Instructions for the system using the assistant.
+            description (optional): A descriptive text for the assistant.
+            metadata (optional): Metadata in key-value format for the assistant.
+            tools (optional): A list of tools enabled on the assistant.
+
+        Returns:
+            The newly created Assistant object.
+        """
+        return await self.client.create(
+            model=model,
+            name=name,
+            instructions=instructions,
+            description=description,
+            metadata=metadata,
+            tools=tools
+        )
+
+    async def clean_missing_files_from_assistant(self, assistant_id):
+        """
+        Identifies and removes missing file references from an assistant's configuration.
+
+        Parameters:
+        assistant_id (str): The ID of the assistant to be cleaned.
+
+        Returns:
+        list: A list of file IDs that were identified as missing and removed from the assistant.
+        """
+        assistant = await self.load_assistant(assistant_id)
+        assistant_file_ids = assistant.file_ids if assistant.file_ids is not None else []
+
+        if not assistant_file_ids:
+            print("No files are associated with this assistant.")
+            return []
+
+        all_files = await self.file_manager.list()
+        missing_files = [file_id for file_id in assistant_file_ids if file_id not in all_files]
+
+        if missing_files:
+            print(f"Deleting missing files {missing_files} from assistant {assistant_id}.")
+            await self.client.update(
+                assistant_id=assistant_id,
+                file_ids=[file_id for file_id in assistant_file_ids if file_id not in missing_files]
+            )
+        else:
+            print("There are no missing files.")
+
+        return missing_files
+
+    async def add_file_to_assistant(self, assistant_id, file_id):
+        """
+        Add a file to an assistant's list of files.
+
+        Args:
+            assistant_id: The ID of the assistant being updated.
+            file_id: The ID of the file to add to the assistant.
+
+        Returns:
+            The updated Assistant object.
+        """
+        assistant = await self.client.retrieve(assistant_id)
+        existing_file_ids = assistant.file_ids if assistant.file_ids is not None else []
+
+        return await self.client.update(
+            assistant_id=assistant_id,
+            file_ids=existing_file_ids + [file_id]
+        )
+
+    async def list_assistants(self):
+        """
+        List all assistants.
+
+        Returns:
+            A page of Assistant objects containing details about each assistant.
+        """
+        return await self.client.list()
+
+    async def load_assistant(self, assistant_id):
+        """
+        Load an assistant's parameters by ID.
+
+        Args:
+            assistant_id: The unique identifier for the assistant.
+
+        Returns:
+            An Assistant object or details about the assistant.
+        """
+        return await self.client.retrieve(assistant_id=assistant_id)
+
+    async def print_assistant_details(self, assistant_id):
+        """
+        Retrieve and display the parameters of a specific assistant by ID.
+
+        Args:
+            assistant_id: The unique identifier for the assistant.
+        """
+        assistant = await self.load_assistant(assistant_id)
+        print(assistant.model_dump())
+
+    async def update_assistant_interactively(self, assistant_id):
+        """
+        Interactively update an assistant's parameters.
+
+        The prompts themselves are blocking console input, as in AssistantManager.
+
+        Args:
+            assistant_id: The unique identifier for the assistant.
+        """
+        assistant = await self.load_assistant(assistant_id)
+        updatable_params = prompt_for_assistant_updates(assistant)
+        return await self.client.update(assistant_id=assistant_id, **updatable_params)
+
+    async def delete_assistant(self, assistant_id):
+        """
+        Delete an assistant by ID.
+
+        Args:
+            assistant_id: The unique identifier for the assistant.
+
+        Returns:
+            A confirmation message indicating that the assistant was deleted.
+        """
+        await self.client.delete(assistant_id=assistant_id)
+        return "Assistant deleted successfully."
@@ -0,0 +1,83 @@
+# ./chat_bot/async_file_manager.py
+
+import asyncio
+import os
+from chat_bot.pagination import iterate_pages_async
+
+
+class AsyncFileManager:
+    """
+        AsyncFileManager is the asyncio counterpart of FileManager, built on an AsyncOpenAI client.
+        It provides the same create, list and delete operations as awaitable methods. The upload,
+        file list and response caches and create_many are not supported.
+        """
+    def __init__(self, client):
+        """
+        Initializes the AsyncFileManager with a client to manage files.
+
+        Parameters:
+        client (AsyncOpenAI): The async client object used for file operations.
+        """
+        self.client = client.files
+
+    async def create(self, file_path, purpose):
+        """
+        Creates a new file in the assistant's environment.
+
+        The file is read in a worker thread so the event loop is not blocked by disk I/O.
+
+        Parameters:
+        file_path (str): The path to the file to be uploaded.
+        purpose (str): The purpose of the file.
+
+        Returns:
+        str: The ID of the created file.
+        """
+        loop = asyncio.get_running_loop()
+        content = await loop.run_in_executor(None, _read_bytes, file_path)
+        response = await self.client.create(file=(os.path.basename(file_path), content), purpose=purpose)
+        return response.id
+
+    async def list(self):
+        """
+        Lists all files currently managed by the assistant.
+
+        Returns:
+        dict: A dictionary with file IDs as keys and file details (filename and purpose) as values.
+        """
+        return {file_id: details async for file_id, details in self.iter_files()}
+
+    async def iter_files(self, page_size=100):
+        """
+        Iterates over all files, following the `limit`/`after` cursor one page at a time.
+
+        Parameters:
+        page_size (int): The number of files requested per page.
+
+        Returns:
+        async generator: (file ID, file details) pairs, with details as in list().
+        """
+        async def fetch_page(after, limit):
+            query = {"limit": limit} if after is None else {"limit": limit, "after": after}
+            return (await self.client.list(extra_query=query)).data
+
+        async for file in iterate_pages_async(fetch_page, page_size=page_size):
+            yield file.id, {"filename": file.filename, "purpose": file.purpose}
+
+    async def delete(self, file_id):
+        """
+        Deletes a file based on its ID.
+
+        Parameters:
+        file_id (str): The ID of the file to be deleted.
+
+        Returns:
+        str: Confirmation message stating the file has been deleted.
+        """
+        await self.client.delete(file_id)
+        return f"File with ID {file_id} has been deleted."
+
+
+def _read_bytes(file_path):
+    with open(file_path, 'rb') as file_object:
+        return file_object.read()
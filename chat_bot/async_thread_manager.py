@@ -0,0 +1,232 @@
+# ./chat_bot/async_thread_manager.py
+
+import asyncio
+import inspect
+from chat_bot.pagination import collect_cursor_pages_async
+from chat_bot.thread_manager import ThreadManager, read_stream_event
+from chat_bot.wait_strategy import (BackoffWaitStrategy, CANCEL_TIMEOUT, STOP_RUN_STATUSES, TERMINAL_RUN_STATUSES,
+                                    poll_delays)
+
+
+class AsyncThreadManager:
+    """
+    Asyncio counterpart of ThreadManager, built on an AsyncOpenAI client.
+
+    Every network operation is a coroutine, so a single event loop can drive many
+    threads and runs concurrently. Each instance tracks one thread, exactly like ThreadManager,
+    and polls and reads streams with the same helpers. The thread registry, context budget
+    rollover and response cache of ThreadManager are not supported.
+
+    Attributes:
+    client (AsyncOpenAI): An instance of the async client used for handling thread operations.
+    """
+    # Rendering and error reporting do no I/O and are shared with the synchronous manager.
+    display_messages = ThreadManager.display_messages
+    report_unfinished_run = ThreadManager.report_unfinished_run
+
+    def __init__(self, client, assistant_id, wait_strategy=None):
+        """
+        Initializes the AsyncThreadManager with a client to manage threads.
+
+        Parameters:
+        client (AsyncOpenAI): The async client object used for thread operations.
+        assistant_id (str): The ID of the assistant that answers in the threads.
+        wait_strategy (optional): Polling schedule used while waiting for runs. Defaults to BackoffWaitStrategy.
+        """
+        self.client = client
+        self.assistant_id = assistant_id
+        self.thread_id = None
+        self.last_message_id = None
+        self.last_reply = None
+        self.last_run = None
+        self.wait_strategy = wait_strategy if wait_strategy is not None else BackoffWaitStrategy()
+
+    async def create_thread(self):
+        """
+        Creates a new thread and makes it the current one.
+
+        Returns:
+        None
+        """
+        thread = await self.client.beta.threads.create()
+        self.thread_id = thread.id
+        self.last_message_id = None
+
+    async def add_message_and_wait_for_reply(self, user_message, message_files):
+        """
+        Adds a message to the thread and waits for the reply without blocking the event loop.
+
+        Parameters:
+        user_message (str): The message from the user to add to the thread.
+        message_files (list): List of file IDs associated with the message.
+
+        Returns:
+        list: The assistant messages produced by this run, or None if the run did not complete.
+        """
+        message = await self.client.beta.threads.messages.create(
+            thread_id=self.thread_id,
+            role="user",
+            content=user_message,
+            file_ids=message_files
+        )
+        self.last_message_id = message.id
+
+        run = await self.client.beta.threads.runs.create(
+            thread_id=self.thread_id,
+            assistant_id=self.assistant_id,
+        )
+
+        run = await self.wait_for_run(run)
+        self.last_run = run
+        if run.status != "completed":
+            self.report_unfinished_run(run)
+            return None
+
+        messages = await self.retrieve_messages()
+        replies = [message for message in messages if message.role == "assistant" and message.run_id == run.id]
+        self.display_messages(replies)
+        return replies
+
+    async def stream_reply(self, user_message, message_files):
+        """
+        Adds a message to the thread and streams the assistant's reply as it is generated.
+
+        Async generators cannot return a value, so the completed message is left in
+        `last_reply` once the generator is exhausted.
+
+        Parameters:
+        user_message (str): The message from the user to add to the thread.
+        message_files (list): List of file IDs associated with the message.
+
+        Yields:
+        str: Fragments of the assistant's reply text, in order of arrival.
+        """
+        self.last_reply = None
+        message = await self.client.beta.threads.messages.create(
+            thread_id=self.thread_id,
+            role="user",
+            content=user_message,
+            file_ids=message_files
+        )
+        self.last_message_id = message.id
+
+        stream = await self.client.beta.threads.runs.create(
+            thread_id=self.thread_id,
+            assistant_id=self.assistant_id,
+            stream=True
+        )
+
+        async with stream:
+            async for event in stream:
+                kind, value = read_stream_event(event)
+                if kind in ("run", "unfinished"):
+                    self.last_run = value
+                if kind == "text":
+                    for text in value:
+                        yield text
+                elif kind == "message":
+                    self.last_reply = value
+                    self.last_message_id = value.id
+                elif kind == "unfinished":
+                    self.report_unfinished_run(value)
+                    return
+                elif kind == "error":
+                    print(f"Stream error: {value}")
+                    return
+
+    async def add_message_and_stream_reply(self, user_message, message_files, on_delta=None):
+        """
+        Adds a message to the thread and passes the reply text to a callback token by token.
+
+        Parameters:
+        user_message (str): The message from the user to add to the thread.
+        message_files (list): List of file IDs associated with the message.
+        on_delta (callable, optional): Called with each text fragment; may be a coroutine function.
+            Defaults to printing it.
+
+        Returns:
+        Message: The completed assistant message, or None if the run did not complete.
+        """
+        printing = on_delta is None
+        if printing:
+            print("Assistant: ", end="", flush=True)
+            on_delta = lambda text: print(text, end="", flush=True)
+
+        async for text in self.stream_reply(user_message, message_files):
+            result = on_delta(text)
+            if inspect.isawaitable(result):
+                await result
+        if printing:
+            print()
+        return self.last_reply
+
+    async def wait_for_run(self, run):
+        """
+        Polls a run according to the wait strategy until it stops or the deadline passes.
+
+        A run that is still in progress when the deadline passes, or when a strategy with a
+        finite schedule runs out of delays, is cancelled (see cancel_run).
+
+        Parameters:
+        run (Run): The run returned when it was created.
+
+        Returns:
+        Run: The last retrieved state of the run.
+        """
+        for delay in poll_delays(self.wait_strategy):
+            if run.status in STOP_RUN_STATUSES:
+                return run
+            await asyncio.sleep(delay)
+            run = await self.check_run_status(run.id)
+        if run.status in STOP_RUN_STATUSES:
+            return run
+        return await self.cancel_run(run)
+
+    async def cancel_run(self, run):
+        """
+        Cancels a run and waits until it has stopped, as ThreadManager.cancel_run does.
+
+        Parameters:
+        run (Run): The run to cancel.
+
+        Returns:
+        Run: The last retrieved state of the run, normally 'cancelled'.
+        """
+        run = await self.client.beta.threads.runs.cancel(thread_id=self.thread_id, run_id=run.id)
+        for delay in poll_delays(BackoffWaitStrategy(timeout=CANCEL_TIMEOUT)):
+            if run.status in TERMINAL_RUN_STATUSES:
+                break
+            await asyncio.sleep(delay)
+            run = await self.check_run_status(run.id)
+        return run
+
+    async def check_run_status(self, run_id):
+        """
+        Checks the status of a thread run.
+
+        Parameters:
+        run_id (str): The ID of the run to check.
+
+        Returns:
+        Run: The current state of the thread run.
+        """
+        return await self.client.beta.threads.runs.retrieve(
+            thread_id=self.thread_id,
+            run_id=run_id
+        )
+
+    async def retrieve_messages(self):
+        """
+        Retrieves the messages added to the thread since the last retrieval.
+
+        Returns:
+        list: The new messages from the thread, oldest first.
+        """
+        params = {"thread_id": self.thread_id, "order": "asc", "limit": 100}
+        if self.last_message_id is not None:
+            params["after"] = self.last_message_id
+
+        messages = await collect_cursor_pages_async(await self.client.beta.threads.messages.list(**params))
+        if messages:
+            self.last_message_id = messages[-1].id
+        return messages
@@ -0,0 +1,239 @@
+# ./chat_bot/batch_runner.py
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from chat_bot.thread_manager import ThreadManager
+from chat_bot.wait_strategy import TERMINAL_RUN_STATUSES
+
+
+def read_batch_items(input_file):
+    """
+    Reads prompts from a JSONL stream.
+
+    Each line is an object with a 'prompt' and optionally an 'id', an 'assistant_id' and 'files'
+    (local paths to upload or existing file IDs starting with 'file-'). Lines without an 'id' are
+    identified by their line number. Blank lines are skipped.
+
+    Parameters:
+    input_file (file): The JSONL text stream.
+
+    Yields:
+    dict: The items, each with an 'id'.
+    """
+    for line_number, line in enumerate(input_file, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        item = json.loads(line)
+        item.setdefault("id", str(line_number))
+        yield item
+
+
+def completed_item_ids(output_path):
+    """
+    Returns the IDs of the items already completed in a previous run's output file.
+
+    Parameters:
+    output_path (str): The JSONL output file of the previous run.
+
+    Returns:
+    set: The IDs of the items whose status is 'completed'.
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path) as output_file:
+        for line in output_file:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # A line cut short by an interrupted run
+                continue
+            if result.get("status") == "completed":
+                completed.add(result["id"])
+    return completed
+
+
+class BatchRunner:
+    """
+    Runs prompts through assistants without any interactive menus.
+
+    Every item gets its own thread and streamed run, so items are independent and run
+    concurrently up to the configured limit. Results are written as JSONL in completion order.
+    """
+    def __init__(self, client, file_manager, assistant_id=None, concurrency=4, purpose="assistants",
+                 response_cache=None):
+        """
+        Initializes the batch runner.
+
+        Parameters:
+        client (OpenAI_Client): The client used for the threads and runs.
+        file_manager (FileManager): Uploads the local files attached to items.
+        assistant_id (str, optional): The assistant used for items that do not name one.
+        concurrency (int): The maximum number of items in flight at once.
+        purpose (str): The purpose used when uploading attached files.
+        response_cache (ResponseCache, optional): Answers prompts asked before without a run.
+        """
+        self.client = client
+        self.file_manager = file_manager
+        self.assistant_id = assistant_id
+        self.concurrency = concurrency
+        self.purpose = purpose
+        self.response_cache = response_cache
+
+    def run(self, items, output_file, skip_ids=()):
+        """
+        Runs every item and writes one JSON result line per item as soon as it finishes.
+
+        Parameters:
+        items (iterable): The batch items, as produced by read_batch_items.
+        output_file (file): The text stream the JSONL results are written to.
+        skip_ids (collection): IDs of items to skip, e.g. those completed in an earlier run.
+
+        Returns:
+        dict: The number of results per status.
+        """
+        counts = {}
+        if self.response_cache is not None and self.assistant_id:
+            # Served replies must match the assistant as it is now, not as it was last recorded
+            self.response_cache.record_assistant(self.client.beta.assistants.retrieve(self.assistant_id))
+
+        def write_results(finished):
+            for future in finished:
+                result = future.result()
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+                output_file.write(json.dumps(result) + "\n")
+                output_file.flush()
+
+        # Items are read as they are submitted, with a bounded number pending, so stdin can be streamed
+        pending = set()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for item in items:
+                if item["id"] in skip_ids:
+                    continue
+                pending.add(executor.submit(self.run_item, item))
+                if len(pending) >= self.concurrency * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    write_results(finished)
+            write_results(as_completed(pending))
+        return counts
+
+    def run_item(self, item):
+        """
+        Runs a single item in a new thread.
+
+        Parameters:
+        item (dict): The batch item.
+
+        Returns:
+        dict: The result with the item's id, status, reply, thread and run IDs, latencies, whether the reply
+        came from the response cache and any error.
+        """
+        started = time.monotonic()
+        result = {"id": item["id"], "status": None, "reply": None, "thread_id": None, "run_id": None,
+                  "latency": None, "first_token_latency": None, "cached": False, "error": None}
+        try:
+            assistant_id = item.get("assistant_id", self.assistant_id)
+            if not assistant_id:
+                raise ValueError("No assistant_id given for the item or the batch.")
+            file_ids = [self._resolve_file(file_reference) for file_reference in item.get("files", [])]
+
+            thread_manager = ThreadManager(self.client, assistant_id, response_cache=self.response_cache)
+            thread_manager.create_thread()
+            result["thread_id"] = thread_manager.thread_id
+
+            fragments = []
+            deltas = thread_manager.stream_reply(item["prompt"], file_ids)
+            while True:
+                try:
+                    fragment = next(deltas)
+                except StopIteration as stop:
+                    final_message = stop.value
+                    break
+                if not fragments:
+                    result["first_token_latency"] = round(time.monotonic() - started, 3)
+                fragments.append(fragment)
+
+            run = thread_manager.last_run
+            result["cached"] = thread_manager.last_reply_cached
+            # A cached reply's run belongs to another thread
+            result["run_id"] = run.id if run is not None and not result["cached"] else None
+            # A stream that broke off leaves the run in a status that is not final
+            result["status"] = run.status if run is not None and run.status in TERMINAL_RUN_STATUSES else "failed"
+            if final_message is not None:
+                result["reply"] = "".join(
+                    block.text.value for block in final_message.content if block.type == "text"
+                )
+            if thread_manager.last_stream_error is not None:
+                result["error"] = thread_manager.last_stream_error
+            elif run is not None and run.last_error is not None:
+                result["error"] = run.last_error.message
+            elif run is None:
+                result["error"] = "The stream ended before the run was created."
+            elif result["status"] != run.status:
+                result["error"] = f"The run ended with status '{run.status}'."
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = f"{type(e).__name__}: {e}"
+        result["latency"] = round(time.monotonic() - started, 3)
+        return result
+
+    def _resolve_file(self, file_reference):
+        """
+        Returns the file ID for an attachment, uploading local paths first.
+        """
+        if file_reference.startswith("file-") and not os.path.exists(file_reference):
+            return file_reference
+        return self.file_manager.create(file_reference, self.purpose)
+
+
+if __name__ == "__main__":
+    from chat_bot.instrumentation import EXPORT_FORMATS, Instrumentation
+    from chat_bot.openai_assistant import create_file_manager
+    from chat_bot.rate_limiter import RateLimitScheduler
+    from chat_bot.response_cache import response_cache_from_environment
+    from chat_bot.utility import initiate_client
+
+    parser = argparse.ArgumentParser(description="Run prompts from a JSONL file through assistants.")
+    parser.add_argument("input", help="JSONL file of prompts, or '-' for stdin.")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for the results, or '-' for stdout.")
+    parser.add_argument("--assistant-id", help="Assistant used for items that do not name one.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum number of items in flight.")
+    parser.add_argument("--purpose", default="assistants", help="Purpose of uploaded attachments.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip items already completed in the output file and append to it.")
+    parser.add_argument("--metrics", help="File to write per-call API metrics to when the batch finishes.")
+    parser.add_argument("--metrics-format", choices=EXPORT_FORMATS, default="prometheus",
+                        help="Format of the metrics file.")
+    args = parser.parse_args()
+
+    if args.resume and args.output == "-":
+        parser.error("--resume needs an output file.")
+
+    rate_limiter = RateLimitScheduler()
+    instrumentation = Instrumentation() if args.metrics else None
+    client = initiate_client(max_connections=max(20, args.concurrency * 2), rate_limiter=rate_limiter,
+                             instrumentation=instrumentation)
+    response_cache = response_cache_from_environment()
+    runner = BatchRunner(client, create_file_manager(client, response_cache=response_cache),
+                         assistant_id=args.assistant_id, concurrency=args.concurrency, purpose=args.purpose,
+                         response_cache=response_cache)
+    skip_ids = completed_item_ids(args.output) if args.resume else set()
+    input_file = sys.stdin if args.input == "-" else open(args.input)
+    output_file = sys.stdout if args.output == "-" else open(args.output, "a" if args.resume else "w")
+
+    # Progress messages from the managers go to stderr so stdout carries only results
+    with input_file, contextlib.redirect_stdout(sys.stderr):
+        counts = runner.run(read_batch_items(input_file), output_file, skip_ids=skip_ids)
+    if output_file is not sys.stdout:
+        output_file.close()
+    print(f"Finished: {counts}" + (f", {len(skip_ids)} skipped" if skip_ids else ""), file=sys.stderr)
+    print(f"Scheduler: {json.dumps(rate_limiter.metrics())}", file=sys.stderr)
+    if instrumentation is not None:
+        instrumentation.export(args.metrics, args.metrics_format)
+        print(f"API metrics saved to {args.metrics}", file=sys.stderr)
@@ -0,0 +1,355 @@
+# ./chat_bot/benchmark.py
+
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from collections import Counter
+from chat_bot import local_state
+from chat_bot.assistant_manager import AssistantManager
+from chat_bot.emulator import EmulatorConfig, start_emulator
+from chat_bot.openai_assistant import (add_file_to_assistant, chat_with_assistant, create_file_manager,
+                                       manage_files, upload_directory)
+from chat_bot.thread_manager import ThreadManager
+from chat_bot.utility import initiate_client
+
+SCENARIOS = ("chat_with_assistant", "add_file_to_assistant", "clean_missing_files_from_assistant",
+             "manage_files_list", "manage_files_refresh", "bulk_upload")
+
+
+def percentile(samples, fraction):
+    """
+    Returns a percentile of the samples, interpolating between the nearest ranks.
+
+    Parameters:
+    samples (list): The measured values.
+    fraction (float): The percentile as a fraction, e.g. 0.95.
+
+    Returns:
+    float: The percentile value.
+    """
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples):
+    """
+    Summarizes measured values with their mean, extremes and p50/p95/p99.
+    """
+    return {
+        "min": min(samples),
+        "mean": sum(samples) / len(samples),
+        "p50": percentile(samples, 0.50),
+        "p95": percentile(samples, 0.95),
+        "p99": percentile(samples, 0.99),
+        "max": max(samples),
+    }
+
+
+@contextlib.contextmanager
+def scripted_input(answers=()):
+    """
+    Answers input() prompts from a list and discards everything printed, so CLI flows run unattended.
+
+    Parameters:
+    answers (iterable): The answers, in the order the prompts appear.
+
+    Raises:
+    RuntimeError: If the flow asks for more answers than were given.
+    """
+    answers = iter(answers)
+    original_input = builtins.input
+
+    def answer(prompt=""):
+        try:
+            return next(answers)
+        except StopIteration:
+            raise RuntimeError(f"The benchmark script has no answer for the prompt {prompt!r}.")
+
+    builtins.input = answer
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        builtins.input = original_input
+
+
+class Benchmark:
+    """
+    Times CLI flows and manager operations against the local API emulator.
+
+    Every scenario runs the real code path a number of times. Setup work, such as creating the
+    assistant or files an iteration needs, is done outside the timed section. Round trips are
+    counted from the emulator's request log, so they include retried requests.
+    """
+    def __init__(self, server, client, iterations=20, turns=1, upload_count=20, work_dir=None):
+        """
+        Initializes the benchmark.
+
+        Parameters:
+        server (EmulatorServer): The running emulator the client points at.
+        client (OpenAI_Client): The client used by every scenario.
+        iterations (int): How many times each scenario runs.
+        turns (int): Messages sent per chat session.
+        upload_count (int): Files uploaded per bulk upload.
+        work_dir (str, optional): Directory for the generated files. Defaults to a temporary directory.
+        """
+        self.server = server
+        self.client = client
+        self.iterations = iterations
+        self.turns = turns
+        self.upload_count = upload_count
+        self.work_dir = work_dir if work_dir is not None else tempfile.mkdtemp(prefix="benchmark_")
+        self.file_counter = 0
+        self.results = {}
+
+    def measure(self, name, operation, setup=None):
+        """
+        Runs an operation repeatedly and records its wall time and API round trips.
+
+        Parameters:
+        name (str): The name the results are stored under.
+        operation (callable): Called with the value returned by setup.
+        setup (callable, optional): Called before each timed run; its requests are not counted.
+
+        Returns:
+        dict: The wall time and round trip summaries, and the mean calls per endpoint.
+        """
+        wall_times = []
+        round_trips = []
+        routes = Counter()
+        for _ in range(self.iterations):
+            with scripted_input():
+                context = setup() if setup is not None else None
+            log_start = len(self.server.state.request_log)
+            started = time.perf_counter()
+            operation(context)
+            wall_times.append(time.perf_counter() - started)
+            calls = self.server.state.request_log[log_start:]
+            round_trips.append(len(calls))
+            routes.update(f"{call['method']} {call['route']}" for call in calls)
+
+        result = {
+            "iterations": self.iterations,
+            "wall_time": summarize(wall_times),
+            "round_trips": summarize(round_trips),
+            "calls_per_iteration": {route: count / self.iterations for route, count in sorted(routes.items())},
+        }
+        self.results[name] = result
+        return result
+
+    def run(self, scenarios=SCENARIOS):
+        """
+        Runs the named scenarios in order.
+
+        Parameters:
+        scenarios (iterable): Names from SCENARIOS.
+
+        Returns:
+        dict: The results per scenario.
+        """
+        for name in scenarios:
+            getattr(self, f"bench_{name}")()
+        return self.results
+
+    def write_file(self, directory=None):
+        """
+        Writes a small file with unique content, so uploads are never deduplicated.
+        """
+        self.file_counter += 1
+        directory = directory if directory is not None else self.work_dir
+        file_path = os.path.join(directory, f"document_{self.file_counter}.txt")
+        with open(file_path, "w") as file:
+            file.write(f"Benchmark document {self.file_counter} written at {time.time()}.\n" * 20)
+        return file_path
+
+    def new_assistant_manager(self):
+        # The CLI builds a new manager per menu visit, sharing only the on-disk caches
+        return AssistantManager(self.client, file_manager=create_file_manager(self.client))
+
+    def create_assistant(self, assistant_manager, file_ids=()):
+        assistant = assistant_manager.create_assistant(
+            "gpt-4-1106-preview", "Benchmark assistant", "Answer questions.", [{"type": "retrieval"}]
+        )
+        if file_ids:
+            assistant_manager.add_files_to_assistant(assistant.id, list(file_ids))
+        return assistant.id
+
+    def bench_chat_with_assistant(self):
+        """
+        A chat session: a new thread and `turns` streamed turns, driven through the CLI loop.
+        """
+        assistant_id = self.create_assistant(self.new_assistant_manager())
+        answers = ["2", "What does the attached document say?", "done"] * self.turns + ["2", "QUIT"]
+
+        def operation(_):
+            with scripted_input(answers):
+                chat_with_assistant(ThreadManager(self.client, assistant_id))
+
+        return self.measure("chat_with_assistant", operation)
+
+    def bench_add_file_to_assistant(self):
+        """
+        Attaching an uploaded file to an assistant from the file list.
+        """
+        def setup():
+            assistant_manager = self.new_assistant_manager()
+            file_id = assistant_manager.file_manager.create(self.write_file(), "assistants")
+            number = list(assistant_manager.file_manager.list()).index(file_id) + 1
+            return assistant_manager, self.create_assistant(assistant_manager), number
+
+        def operation(context):
+            assistant_manager, assistant_id, number = context
+            with scripted_input([str(number)]):
+                add_file_to_assistant(assistant_manager, assistant_id)
+
+        return self.measure("add_file_to_assistant", operation, setup)
+
+    def bench_clean_missing_files_from_assistant(self):
+        """
+        Cleaning an assistant with three files, one of which was deleted elsewhere.
+        """
+        def setup():
+            assistant_manager = self.new_assistant_manager()
+            file_ids = [assistant_manager.file_manager.create(self.write_file(), "assistants") for _ in range(3)]
+            assistant_id = self.create_assistant(assistant_manager, file_ids)
+            self.client.files.delete(file_ids[0])
+            return self.new_assistant_manager(), assistant_id
+
+        def operation(context):
+            assistant_manager, assistant_id = context
+            with scripted_input():
+                assistant_manager.clean_missing_files_from_assistant(assistant_id)
+
+        return self.measure("clean_missing_files_from_assistant", operation, setup)
+
+    def bench_manage_files_list(self):
+        """
+        Listing files from the file management menu.
+        """
+        def operation(_):
+            with scripted_input(["1", "0"]):
+                manage_files(self.client)
+
+        return self.measure("manage_files_list", operation)
+
+    def bench_manage_files_refresh(self):
+        """
+        Reloading the file list from the server from the file management menu.
+        """
+        def operation(_):
+            with scripted_input(["5", "0"]):
+                manage_files(self.client)
+
+        return self.measure("manage_files_refresh", operation)
+
+    def bench_bulk_upload(self):
+        """
+        Uploading a directory of `upload_count` new files from the file management menu.
+        """
+        def setup():
+            directory = tempfile.mkdtemp(dir=self.work_dir)
+            for _ in range(self.upload_count):
+                self.write_file(directory)
+            return directory
+
+        def operation(directory):
+            with scripted_input([directory, "2"]):
+                upload_directory(self.client)
+
+        return self.measure("bulk_upload", operation, setup)
+
+
+def current_commit():
+    """
+    Returns the short hash of the checked out commit, or None outside a git checkout.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    """
+    Prints one line per scenario, with the change against a baseline report if one is given.
+
+    Parameters:
+    results (dict): The results per scenario.
+    baseline (dict, optional): The results of an earlier report.
+
+    Returns:
+    None
+    """
+    for name, result in results.items():
+        wall_time = result["wall_time"]
+        line = (f"{name:36} p50 {wall_time['p50'] * 1000:8.1f} ms  p95 {wall_time['p95'] * 1000:8.1f} ms  "
+                f"p99 {wall_time['p99'] * 1000:8.1f} ms  round trips {result['round_trips']['mean']:5.1f}")
+        previous = (baseline or {}).get(name)
+        if previous is not None:
+            change = wall_time["p50"] / previous["wall_time"]["p50"] - 1 if previous["wall_time"]["p50"] else 0.0
+            round_trip_change = result["round_trips"]["mean"] - previous["round_trips"]["mean"]
+            line += f"  (p50 {change:+.0%}, round trips {round_trip_change:+.1f})"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CLI flows and manager operations against the API emulator.")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="JSON file for the results.")
+    parser.add_argument("--compare", help="Earlier results file to compare against.")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Scenario to run; repeatable. Defaults to all.")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=1, help="Messages sent per chat session.")
+    parser.add_argument("--upload-count", type=int, default=20, help="Files uploaded per bulk upload.")
+    parser.add_argument("--latency", type=float, default=0.03, help="Mean emulated response latency in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Standard deviation of the response latency.")
+    parser.add_argument("--queue-time", type=float, default=0.1, help="Seconds an emulated run stays queued.")
+    parser.add_argument("--run-duration", type=float, default=0.5, help="Seconds an emulated run stays in progress.")
+    parser.add_argument("--token-interval", type=float, default=0.01, help="Seconds between streamed fragments.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Keep the benchmark's caches away from the user's own state
+    local_state.STATE_DIR = tempfile.mkdtemp(prefix="benchmark_state_")
+    emulator_settings = {
+        "latency": ("normal", args.latency, args.jitter) if args.jitter else args.latency,
+        "queue_time": args.queue_time,
+        "run_duration": args.run_duration,
+        "token_interval": args.token_interval,
+        "seed": args.seed,
+    }
+    server = start_emulator(EmulatorConfig(**emulator_settings))
+    benchmark = Benchmark(server, initiate_client(base_url=server.base_url), iterations=args.iterations,
+                          turns=args.turns, upload_count=args.upload_count)
+    started = time.time()
+    results = benchmark.run(args.scenario or SCENARIOS)
+    server.shutdown()
+
+    report = {
+        "created_at": int(started),
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "settings": dict(vars(args), emulator=emulator_settings),
+        "results": results,
+    }
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+    print_results(results, baseline)
+    print(f"Results saved to {args.output}")
@@ -0,0 +1,313 @@
+# ./chat_bot/call_budget.py
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from chat_bot import local_state
+from chat_bot.assistant_manager import AssistantManager
+from chat_bot.benchmark import scripted_input
+from chat_bot.context_budget import ContextBudget
+from chat_bot.emulator import EmulatorConfig, start_emulator
+from chat_bot.instrumentation import Instrumentation
+from chat_bot.openai_assistant import create_file_manager, manage_assistants, manage_files, user_interaction
+from chat_bot.response_cache import ResponseCache
+from chat_bot.thread_manager import ThreadManager
+from chat_bot.thread_registry import ThreadRegistry
+from chat_bot.utility import initiate_client
+
+# The most API round trips each user action may make. Menu actions start from the assistant
+# list, which is one call while there are fewer than 20 assistants. Every assistant update is
+# preceded by a retrieve, so changes made elsewhere are not overwritten.
+ACTION_BUDGETS = {
+    "create_assistant": 1,                  # create
+    "assistant_chat_turn": 4,               # list, thread, message, streamed run
+    "assistant_resume_chat": 2,             # list, messages newer than the cached transcript
+    "assistant_add_files": 4,               # list, file list, retrieve, update
+    "assistant_update": 3,                  # list, retrieve, update
+    "assistant_delete": 2,                  # list, delete
+    "assistant_check_files": 6,             # list, one retrieve per file (3), retrieve, update
+    "assistant_remove_files": 4,            # list, file list, retrieve, update
+    "assistant_sync_directory": 5,          # list, one upload per file (2), retrieve, update
+    "files_list": 1,                        # file list, then served from the local cache
+    "files_refresh": 1,                     # file list
+    "files_delete": 2,                      # file list, delete
+    "files_upload_directory": 3,            # one upload per file (3)
+    "thread_wait_for_reply": 4,             # message, run, one poll of an instant run, message list
+    "thread_stream_reply": 2,               # message, streamed run
+    "thread_rollover": 7,                   # message, streamed run, summary run, one poll, message list,
+                                            # new thread, summary message
+    "thread_cached_reply": 0,               # answered from the response cache
+    "file_create_duplicate": 1,             # existence check of the cached upload
+}
+
+
+class CallBudgetHarness:
+    """
+    Records the exact API calls each user action makes and checks them against ACTION_BUDGETS.
+
+    Every action runs against its own emulator and local state directory, so caches left by
+    one action cannot hide the calls of another. Runs finish instantly, so the counts show the
+    structure of an action rather than how long it polled. Setup calls are not counted.
+    Call close() when done to remove the harness's temporary files.
+    """
+    def __init__(self, budgets=ACTION_BUDGETS):
+        """
+        Initializes the harness.
+
+        Parameters:
+        budgets (dict): The round trip budget per action name.
+        """
+        self.budgets = budgets
+        self.work_dir = tempfile.mkdtemp(prefix="call_budget_")
+        self.server = None
+        self.client = None
+        self.instrumentation = None
+
+    def record(self, name, setup, operation):
+        """
+        Runs one action on a fresh emulator and returns its calls.
+
+        Parameters:
+        name (str): The action's name.
+        setup (callable): Prepares the action; called without arguments, its calls are not counted.
+        operation (callable): The action; called with the value returned by setup.
+
+        Returns:
+        dict: The action's name, budget, number of calls and the calls in order.
+        """
+        state_dir = local_state.STATE_DIR
+        local_state.STATE_DIR = tempfile.mkdtemp(dir=self.work_dir)
+        try:
+            self.server = start_emulator(EmulatorConfig(queue_time=0.0, run_duration=0.0, token_interval=0.0))
+            self.instrumentation = Instrumentation()
+            self.client = initiate_client(base_url=self.server.base_url, instrumentation=self.instrumentation)
+            try:
+                with scripted_input():
+                    context = setup()
+                self.instrumentation.reset_metrics()
+                operation(context)
+                calls = [f"{entry['method']} {entry['endpoint']}" for entry in self.instrumentation.records]
+            finally:
+                self.server.shutdown()
+        finally:
+            local_state.STATE_DIR = state_dir
+        return {"action": name, "budget": self.budgets[name], "calls": len(calls), "sequence": calls}
+
+    def run(self, names=None):
+        """
+        Records the named actions, or all of them.
+
+        Parameters:
+        names (iterable, optional): Action names from the budgets.
+
+        Returns:
+        list: The results of record(), in order.
+        """
+        return [getattr(self, f"action_{name}")() for name in (names or self.budgets)]
+
+    def close(self):
+        """
+        Removes the temporary files and state directories the recorded actions created.
+        """
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def write_files(self, count):
+        directory = tempfile.mkdtemp(dir=self.work_dir)
+        for index in range(count):
+            with open(os.path.join(directory, f"document_{index}.txt"), "w") as file:
+                file.write(f"Document {index} in {directory}.\n")
+        return directory
+
+    def new_assistant(self, file_count=0):
+        """
+        Creates an assistant with freshly uploaded files; returns its ID and the file IDs.
+        """
+        assistant_manager = AssistantManager(self.client, file_manager=create_file_manager(self.client))
+        directory = self.write_files(file_count)
+        file_ids = [assistant_manager.file_manager.create(os.path.join(directory, name), "assistants")
+                    for name in sorted(os.listdir(directory))]
+        assistant = assistant_manager.create_assistant("gpt-4-1106-preview", "Budget assistant", "Answer.", [])
+        if file_ids:
+            assistant_manager.add_files_to_assistant(assistant.id, file_ids)
+        return assistant.id, file_ids
+
+    def menu(self, answers, flow=manage_assistants):
+        """
+        Returns an operation that runs a CLI flow with scripted answers.
+        """
+        def operation(_):
+            with scripted_input(answers):
+                flow(self.client)
+        return operation
+
+    def action_create_assistant(self):
+        return self.record("create_assistant", lambda: None, self.menu(["3", "0"], user_interaction))
+
+    def action_assistant_chat_turn(self):
+        return self.record("assistant_chat_turn", self.new_assistant,
+                           self.menu(["1", "1", "2", "Hello", "done", "2", "QUIT"]))
+
+    def action_assistant_resume_chat(self):
+        def setup():
+            thread_manager = ThreadManager(self.client, self.new_assistant()[0], registry=ThreadRegistry())
+            thread_manager.create_thread()
+            thread_manager.add_message_and_stream_reply("Hello", [])
+            # A message added elsewhere, e.g. by another session, is all there is to fetch
+            self.client.beta.threads.messages.create(thread_id=thread_manager.thread_id, role="user", content="Hi")
+        return self.record("assistant_resume_chat", setup, self.menu(["1", "1", "1", "2", "QUIT"]))
+
+    def action_assistant_add_files(self):
+        def setup():
+            self.new_assistant()
+            create_file_manager(self.client).create(os.path.join(self.write_files(1), "document_0.txt"), "assistants")
+        return self.record("assistant_add_files", setup, self.menu(["1", "2", "1"]))
+
+    def action_assistant_update(self):
+        return self.record("assistant_update", self.new_assistant, self.menu(["1", "3"] + [""] * 6))
+
+    def action_assistant_delete(self):
+        return self.record("assistant_delete", self.new_assistant, self.menu(["1", "4"]))
+
+    def action_assistant_check_files(self):
+        def setup():
+            _, file_ids = self.new_assistant(file_count=3)
+            self.client.files.delete(file_ids[0])
+        return self.record("assistant_check_files", setup, self.menu(["1", "5"]))
+
+    def action_assistant_remove_files(self):
+        return self.record("assistant_remove_files", lambda: self.new_assistant(file_count=2),
+                           self.menu(["1", "6", "1"]))
+
+    def action_assistant_sync_directory(self):
+        def setup():
+            self.new_assistant()
+            return self.write_files(2)
+        return self.record("assistant_sync_directory", setup,
+                           lambda directory: self.menu(["1", "7", directory])(None))
+
+    def action_files_list(self):
+        return self.record("files_list", lambda: None, self.menu(["1", "1", "0"], manage_files))
+
+    def action_files_refresh(self):
+        return self.record("files_refresh", lambda: None, self.menu(["5", "0"], manage_files))
+
+    def action_files_delete(self):
+        def setup():
+            self.client.files.create(file=("document.txt", b"Document."), purpose="assistants")
+        return self.record("files_delete", setup, self.menu(["2", "1", "0"], manage_files))
+
+    def action_files_upload_directory(self):
+        return self.record("files_upload_directory", lambda: self.write_files(3),
+                           lambda directory: self.menu(["4", directory, "2", "0"], manage_files)(None))
+
+    def action_thread_wait_for_reply(self):
+        def setup():
+            thread_manager = ThreadManager(self.client, self.new_assistant()[0])
+            thread_manager.create_thread()
+            return thread_manager
+
+        def operation(thread_manager):
+            with scripted_input():
+                thread_manager.add_message_and_wait_for_reply("Hello", [])
+        return self.record("thread_wait_for_reply", setup, operation)
+
+    def action_thread_stream_reply(self):
+        def setup():
+            thread_manager = ThreadManager(self.client, self.new_assistant()[0])
+            thread_manager.create_thread()
+            return thread_manager
+
+        def operation(thread_manager):
+            with scripted_input():
+                thread_manager.add_message_and_stream_reply("Hello", [])
+        return self.record("thread_stream_reply", setup, operation)
+
+    def action_thread_rollover(self):
+        def setup():
+            thread_manager = ThreadManager(self.client, self.new_assistant()[0], registry=ThreadRegistry(),
+                                           context_budget=ContextBudget(max_tokens=1))
+            thread_manager.create_thread()
+            return thread_manager
+
+        def operation(thread_manager):
+            with scripted_input():
+                thread_manager.add_message_and_stream_reply("Hello", [])
+        return self.record("thread_rollover", setup, operation)
+
+    def action_thread_cached_reply(self):
+        def setup():
+            thread_manager = ThreadManager(self.client, self.new_assistant()[0], response_cache=ResponseCache())
+            thread_manager.create_thread()
+            thread_manager.add_message_and_wait_for_reply("What do the documents say?", [])
+            thread_manager.create_thread()
+            return thread_manager
+
+        def operation(thread_manager):
+            with scripted_input():
+                thread_manager.add_message_and_wait_for_reply("What do the  documents say? ", [])
+        return self.record("thread_cached_reply", setup, operation)
+
+    def action_file_create_duplicate(self):
+        def setup():
+            file_path = os.path.join(self.write_files(1), "document_0.txt")
+            create_file_manager(self.client).create(file_path, "assistants")
+            return file_path
+
+        def operation(file_path):
+            with scripted_input():
+                create_file_manager(self.client).create(file_path, "assistants")
+        return self.record("file_create_duplicate", setup, operation)
+
+
+def print_report(results, verbose=False):
+    """
+    Prints each action's round trips against its budget.
+
+    Parameters:
+    results (list): The results returned by CallBudgetHarness.run.
+    verbose (bool): Also print every action's call sequence.
+
+    Returns:
+    None
+    """
+    for result in results:
+        if result["calls"] > result["budget"]:
+            verdict = "OVER BUDGET"
+        elif result["calls"] < result["budget"]:
+            verdict = "under budget, consider lowering it"
+        else:
+            verdict = "ok"
+        print(f"{result['action']:28} {result['calls']:3} / {result['budget']:3}  {verdict}")
+        if verbose or result["calls"] > result["budget"]:
+            for call in result["sequence"]:
+                print(f"    {call}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the API round trips of each user action against its budget.")
+    parser.add_argument("actions", nargs="*", help="Actions to check. Defaults to all.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print every action's call sequence.")
+    parser.add_argument("--json", help="File to write the recorded call sequences to.")
+    args = parser.parse_args()
+    unknown_actions = [name for name in args.actions if name not in ACTION_BUDGETS]
+    if unknown_actions:
+        parser.error(f"unknown action(s) {', '.join(unknown_actions)}; choose from {', '.join(ACTION_BUDGETS)}")
+
+    harness = CallBudgetHarness()
+    try:
+        budget_results = harness.run(args.actions)
+    finally:
+        harness.close()
+    print_report(budget_results, verbose=args.verbose)
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(budget_results, json_file, indent=2)
+
+    over_budget = [result["action"] for result in budget_results if result["calls"] > result["budget"]]
+    if over_budget:
+        print(f"{len(over_budget)} action(s) over budget: {', '.join(over_budget)}")
+        sys.exit(1)
+    print("All actions within budget.")
@@ -0,0 +1,107 @@
+# ./chat_bot/context_budget.py
+
+import importlib.util
+import os
+
+# Tokens added per message for its role and formatting.
+MESSAGE_OVERHEAD_TOKENS = 4
+# Characters per token assumed when no tokenizer is available.
+CHARS_PER_TOKEN = 4
+# Heading of the first message of a thread that continues a summarized one.
+SUMMARY_PREFIX = "Summary of our conversation so far:\n"
+# Default thread size at which a conversation rolls over, well inside a 128k context window so
+# there is room for the instructions and retrieved file content.
+DEFAULT_MAX_TOKENS = 32000
+
+
+class ContextBudget:
+    """
+    Token budget for a conversation thread, with the instructions used to summarize it.
+
+    Tokens are counted with tiktoken when it is installed, and estimated from the text length
+    otherwise. Only message text is counted; retrieved file content is not visible locally, so
+    leave room for it when choosing the budget.
+    """
+    def __init__(self, max_tokens=DEFAULT_MAX_TOKENS, summary_words=300, encoding_name="cl100k_base"):
+        """
+        Initializes the budget.
+
+        Parameters:
+        max_tokens (int): The estimated thread size at which the conversation rolls over to a new thread.
+        summary_words (int): The length asked of the summary carried into the new thread.
+        encoding_name (str): The tiktoken encoding used when tiktoken is installed.
+        """
+        self.max_tokens = max_tokens
+        self.summary_words = summary_words
+        self.encoding = None
+        if importlib.util.find_spec("tiktoken") is not None:
+            import tiktoken
+            try:
+                self.encoding = tiktoken.get_encoding(encoding_name)
+            except Exception:
+                # The encoding files are downloaded on first use; estimate when that is not possible
+                self.encoding = None
+
+    @property
+    def summary_instructions(self):
+        """
+        The instructions for the run that summarizes a thread before it rolls over.
+        """
+        return (
+            "Summarize the conversation so far so that it can be continued in a new conversation. "
+            "Keep every fact, decision, open question and file reference needed to carry on, "
+            f"in at most {self.summary_words} words. Reply with the summary only."
+        )
+
+    def count_text(self, text):
+        """
+        Counts or estimates the tokens in a text.
+
+        Parameters:
+        text (str): The text to count.
+
+        Returns:
+        int: The number of tokens.
+        """
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+    def count_message(self, text):
+        """
+        Counts the tokens a message adds to a thread, including the per-message overhead.
+
+        Parameters:
+        text (str): The message's text.
+
+        Returns:
+        int: The number of tokens.
+        """
+        return self.count_text(text) + MESSAGE_OVERHEAD_TOKENS
+
+    def exceeded(self, tokens):
+        """
+        Returns True when a thread of the given size should roll over.
+
+        Parameters:
+        tokens (int): The thread's estimated size.
+
+        Returns:
+        bool: Whether the budget is used up.
+        """
+        return tokens >= self.max_tokens
+
+
+def context_budget_from_environment():
+    """
+    Creates the chat's context budget, sized by GPT4_ASSISTANT_CONTEXT_TOKENS when it is set.
+
+    Setting it to 0 turns rollover off.
+
+    Returns:
+    ContextBudget: The budget to pass to ThreadManager, or None when rollover is off.
+    """
+    max_tokens = int(os.environ.get("GPT4_ASSISTANT_CONTEXT_TOKENS", DEFAULT_MAX_TOKENS))
+    if max_tokens <= 0:
+        return None
+    return ContextBudget(max_tokens=max_tokens)
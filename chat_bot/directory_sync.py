@@ -0,0 +1,226 @@
+# ./chat_bot/directory_sync.py
+
+import argparse
+import hashlib
+import json
+import os
+from chat_bot.assistant_manager import AssistantManager, MAX_ASSISTANT_FILES
+from chat_bot.local_state import state_path
+from chat_bot.upload_cache import hash_file
+from chat_bot.utility import iter_files_in_path
+
+
+class DirectorySync:
+    """
+    Keeps an assistant's files in step with a local directory tree.
+
+    A manifest stored in the local state directory records, for every synced file, its
+    modification time, size, content hash and the ID of the uploaded file. A sync only hashes
+    files whose size or modification time changed, uploads new or changed content concurrently,
+    and updates the assistant's files in one call. Files attached to the assistant by other
+    means are left alone.
+
+    Uploads go through the upload cache, so a file ID may be shared with other syncs, other
+    assistants or files attached by hand. Remote files whose source is gone are only deleted
+    on request, and only when this sync uploaded them and no assistant or other sync still
+    uses them. Files referenced from thread messages cannot be checked.
+    """
+    def __init__(self, assistant_manager, manifest_dir=None):
+        """
+        Initializes the sync engine.
+
+        Parameters:
+        assistant_manager (AssistantManager): Manager for the assistant; its file manager performs uploads and deletions.
+        manifest_dir (str, optional): Directory holding the manifests. Defaults to the local state directory.
+        """
+        self.assistant_manager = assistant_manager
+        self.file_manager = assistant_manager.file_manager
+        self.manifest_dir = manifest_dir
+
+    def manifest_path(self, directory, assistant_id):
+        """
+        Returns the manifest path for a directory synced to an assistant.
+
+        Parameters:
+        directory (str): The synced directory.
+        assistant_id (str): The ID of the assistant.
+
+        Returns:
+        str: The path of the JSON manifest.
+        """
+        key = hashlib.sha1(f"{assistant_id}:{os.path.abspath(directory)}".encode()).hexdigest()[:16]
+        file_name = f"sync_{key}.json"
+        if self.manifest_dir is None:
+            return state_path(file_name)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        return os.path.join(self.manifest_dir, file_name)
+
+    def sync(self, directory, assistant_id, purpose="assistants", delete_removed=False, max_workers=8, dry_run=False):
+        """
+        Brings the assistant's files up to date with the directory.
+
+        Parameters:
+        directory (str): The root of the directory tree to sync.
+        assistant_id (str): The ID of the assistant to update.
+        purpose (str): The purpose used for uploaded files.
+        delete_removed (bool): Delete remote files whose source was removed or replaced, when this sync
+            uploaded them and nothing else uses them.
+        max_workers (int): The maximum number of concurrent uploads.
+        dry_run (bool): Only report what would change, without uploading or updating anything.
+
+        Returns:
+        dict: Lists of relative paths under 'added', 'changed', 'removed', 'unchanged' and 'failed'.
+
+        Raises:
+        ValueError: If the synced files would exceed the per-assistant file limit.
+        """
+        manifest_path = self.manifest_path(directory, assistant_id)
+        manifest = _load_manifest(manifest_path)
+        summary = {"added": [], "changed": [], "removed": [], "unchanged": [], "failed": []}
+        current = {}
+        to_upload = []
+
+        for file_path in iter_files_in_path(directory):
+            relative_path = os.path.relpath(file_path, directory)
+            stat = os.stat(file_path)
+            entry = manifest.get(relative_path)
+            if entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                current[relative_path] = entry
+                summary["unchanged"].append(relative_path)
+                continue
+
+            content_hash = hash_file(file_path)
+            if entry is not None and entry["hash"] == content_hash:
+                # Touched but not modified: refresh the stat fields only
+                current[relative_path] = dict(entry, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                summary["unchanged"].append(relative_path)
+                continue
+
+            summary["changed" if entry is not None else "added"].append(relative_path)
+            to_upload.append((relative_path, file_path, stat, content_hash))
+
+        uploading = {item[0] for item in to_upload}
+        summary["removed"] = [path for path in manifest if path not in current and path not in uploading]
+
+        if dry_run or not (to_upload or summary["removed"]):
+            return summary
+
+        if to_upload:
+            # Check the file limit before uploading anything, counting files attached by other means
+            assistant = self.assistant_manager.load_assistant(assistant_id)
+            synced_file_ids = {entry["file_id"] for entry in manifest.values()}
+            other_file_ids = set(assistant.file_ids or []) - synced_file_ids
+            kept_file_ids = {entry["file_id"] for entry in current.values()}
+            expected_count = len(other_file_ids) + len(kept_file_ids) + len(to_upload)
+            if expected_count > MAX_ASSISTANT_FILES:
+                raise ValueError(
+                    f"Syncing '{directory}' would leave the assistant with {expected_count} files, but an "
+                    f"assistant can have at most {MAX_ASSISTANT_FILES}. Narrow the directory before syncing."
+                )
+
+        # Content the upload cache already knows is reused, not uploaded, and so not this sync's to delete
+        upload_cache = self.file_manager.upload_cache
+        reused = [upload_cache is not None and upload_cache.get(content_hash, purpose) is not None
+                  for _, _, _, content_hash in to_upload]
+        results = self.file_manager.create_many(
+            [item[1] for item in to_upload], purpose, max_workers=max_workers, show_progress=bool(to_upload)
+        )
+        for (relative_path, file_path, stat, content_hash), result, was_reused in zip(to_upload, results, reused):
+            if result["file_id"] is None:
+                summary["failed"].append(relative_path)
+                # Keep the previous upload, if any, until the file uploads successfully
+                if relative_path in manifest:
+                    current[relative_path] = manifest[relative_path]
+                continue
+            current[relative_path] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "hash": content_hash,
+                "file_id": result["file_id"],
+                "uploaded": not was_reused,
+            }
+
+        # Remote files that no synced path refers to any more
+        live_file_ids = {entry["file_id"] for entry in current.values()}
+        stale_file_ids = {entry["file_id"] for entry in manifest.values()} - live_file_ids
+        new_file_ids = live_file_ids - {entry["file_id"] for entry in manifest.values()}
+
+        self.assistant_manager.update_assistant_files(
+            assistant_id, add_file_ids=sorted(new_file_ids), remove_file_ids=stale_file_ids
+        )
+        _save_manifest(manifest_path, current)
+
+        if delete_removed:
+            uploaded_file_ids = {entry["file_id"] for entry in manifest.values() if entry.get("uploaded")}
+            for file_id in self._unused_file_ids(stale_file_ids & uploaded_file_ids, manifest_path):
+                self.file_manager.delete(file_id)
+        return summary
+
+    def _unused_file_ids(self, file_ids, manifest_path):
+        """
+        Returns the file IDs that no assistant and no other sync manifest refers to.
+        """
+        if not file_ids:
+            return set()
+        unused = set(file_ids)
+        for assistant in self.assistant_manager.iter_assistants():
+            unused -= set(assistant.file_ids or [])
+        manifest_dir = os.path.dirname(manifest_path)
+        for file_name in os.listdir(manifest_dir):
+            other_path = os.path.join(manifest_dir, file_name)
+            if file_name.startswith("sync_") and file_name.endswith(".json") and other_path != manifest_path:
+                unused -= {entry["file_id"] for entry in _load_manifest(other_path).values()}
+        return unused
+
+
+def _load_manifest(manifest_path):
+    try:
+        with open(manifest_path) as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(manifest_path, manifest):
+    temporary_path = manifest_path + ".tmp"
+    with open(temporary_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(temporary_path, manifest_path)
+
+
+def print_sync_summary(summary):
+    """
+    Prints the outcome of a sync.
+
+    Parameters:
+    summary (dict): The summary returned by DirectorySync.sync.
+
+    Returns:
+    None
+    """
+    for label in ("added", "changed", "removed", "failed"):
+        for relative_path in summary[label]:
+            print(f"{label}: {relative_path}")
+    print(", ".join(f"{len(summary[label])} {label}" for label in summary))
+
+
+if __name__ == "__main__":
+    from chat_bot.openai_assistant import create_file_manager
+    from chat_bot.utility import initiate_client
+
+    parser = argparse.ArgumentParser(description="Sync a directory tree to an assistant's files.")
+    parser.add_argument("directory", help="The directory to sync.")
+    parser.add_argument("assistant_id", help="The ID of the assistant to update.")
+    parser.add_argument("--purpose", default="assistants", help="Purpose of the uploaded files.")
+    parser.add_argument("--delete-removed", action="store_true",
+                        help="Delete remote files whose source is gone, if this sync uploaded them and nothing else uses them.")
+    parser.add_argument("--workers", type=int, default=8, help="Maximum number of concurrent uploads.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change.")
+    args = parser.parse_args()
+
+    client = initiate_client()
+    sync_engine = DirectorySync(AssistantManager(client, file_manager=create_file_manager(client)))
+    print_sync_summary(sync_engine.sync(
+        args.directory, args.assistant_id, purpose=args.purpose, delete_removed=args.delete_removed,
+        max_workers=args.workers, dry_run=args.dry_run
+    ))
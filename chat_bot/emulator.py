@@ -0,0 +1,644 @@
+# ./chat_bot/emulator.py
+
+import argparse
+import email.parser
+import functools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def sample(distribution, rng):
+    """
+    Draws a duration in seconds from a distribution spec.
+
+    Parameters:
+    distribution: A number (constant), ('constant', x), ('uniform', low, high),
+        ('normal', mean, stddev) or ('lognormal', mu, sigma). Negative draws become 0.
+    rng (random.Random): The random generator to draw from.
+
+    Returns:
+    float: The sampled duration.
+    """
+    if isinstance(distribution, (int, float)):
+        return float(distribution)
+    kind, *parameters = distribution
+    if kind == "constant":
+        value = parameters[0]
+    elif kind == "uniform":
+        value = rng.uniform(*parameters)
+    elif kind == "normal":
+        value = rng.gauss(*parameters)
+    elif kind == "lognormal":
+        value = rng.lognormvariate(*parameters)
+    else:
+        raise ValueError(f"Unknown distribution '{kind}'.")
+    return max(0.0, value)
+
+
+def echo_reply(prompt):
+    """
+    Default reply generator: repeats the user's message back.
+    """
+    return f"You said: {prompt.strip()}"
+
+
+class EmulatorConfig:
+    """
+    Behaviour of the emulated API: latencies, run timing, failures and rate limits.
+    """
+    def __init__(self, latency=0.0, queue_time=0.0, run_duration=0.5, token_interval=0.01, failure_rate=0.0,
+                 run_failure_rate=0.0, stream_error_rate=0.0, cancel_duration=0.0, rate_limit=None,
+                 rate_limit_window=1.0, reply=echo_reply, seed=None):
+        """
+        Initializes the configuration.
+
+        Parameters:
+        latency: Distribution of the delay added to every response (see sample()).
+        queue_time: Distribution of the time a run spends queued.
+        run_duration: Distribution of the time a run spends in progress.
+        token_interval (float): Delay between streamed reply fragments, in seconds.
+        failure_rate (float): Probability that a request fails with a 500 error.
+        run_failure_rate (float): Probability that a run ends with status 'failed'.
+        stream_error_rate (float): Probability that a streamed run breaks off with an error event after its
+            first fragment.
+        cancel_duration (float): Seconds a cancelled run stays 'cancelling'. It is reported as
+            'cancelling' by the cancel call itself and becomes 'cancelled' once polled after this time.
+        rate_limit (int, optional): Requests allowed per window before answering 429.
+        rate_limit_window (float): Length of the rate limit window, in seconds.
+        reply (callable): Maps the last user message to the assistant's reply text.
+        seed (int, optional): Seed for reproducible latencies and failures.
+        """
+        self.latency = latency
+        self.queue_time = queue_time
+        self.run_duration = run_duration
+        self.token_interval = token_interval
+        self.failure_rate = failure_rate
+        self.run_failure_rate = run_failure_rate
+        self.stream_error_rate = stream_error_rate
+        self.cancel_duration = cancel_duration
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.reply = reply
+        self.seed = seed
+
+
+class EmulatorState:
+    """
+    In-memory store of the emulated assistants, files, threads, messages and runs.
+    """
+    def __init__(self, config):
+        """
+        Initializes an empty store.
+
+        Parameters:
+        config (EmulatorConfig): The emulator's behaviour.
+        """
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.lock = threading.RLock()
+        self.counter = 0
+        self.assistants = {}
+        self.files = {}
+        self.threads = {}
+        self.messages = {}
+        self.runs = {}
+        self.request_log = []
+        self.window_start = time.monotonic()
+        self.window_count = 0
+
+    def new_id(self, prefix):
+        with self.lock:
+            self.counter += 1
+            return f"{prefix}{self.counter:012d}"
+
+    def draw(self, distribution):
+        with self.lock:
+            return sample(distribution, self.rng)
+
+    def chance(self, probability):
+        with self.lock:
+            return probability > 0 and self.rng.random() < probability
+
+    def rate_limit_status(self):
+        """
+        Counts a request against the rate limit window.
+
+        Returns:
+        tuple: (allowed, remaining requests, seconds until the window resets).
+        """
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= self.config.rate_limit_window:
+                self.window_start = now
+                self.window_count = 0
+            self.window_count += 1
+            reset = self.config.rate_limit_window - (now - self.window_start)
+            if self.config.rate_limit is None:
+                return True, None, reset
+            remaining = self.config.rate_limit - self.window_count
+            return remaining >= 0, max(0, remaining), reset
+
+    def add_message(self, thread_id, role, content, file_ids=None, assistant_id=None, run_id=None):
+        message = {
+            "id": self.new_id("msg_"), "object": "thread.message", "created_at": int(time.time()),
+            "thread_id": thread_id, "role": role, "status": "completed",
+            "content": [{"type": "text", "text": {"value": content, "annotations": []}}],
+            "file_ids": file_ids or [], "assistant_id": assistant_id, "run_id": run_id, "metadata": {},
+            "completed_at": int(time.time()), "incomplete_at": None, "incomplete_details": None,
+        }
+        with self.lock:
+            self.messages[thread_id].append(message)
+        return message
+
+    def reply_text(self, thread_id):
+        with self.lock:
+            user_messages = [message for message in self.messages[thread_id] if message["role"] == "user"]
+        prompt = user_messages[-1]["content"][0]["text"]["value"] if user_messages else ""
+        return self.config.reply(prompt)
+
+    def advance_run(self, run):
+        """
+        Moves a polled run through queued, in_progress and its final status according to the clock.
+
+        A streamed run's status is kept by the stream itself.
+        """
+        with self.lock:
+            if run["status"] == "cancelling":
+                if time.monotonic() - run["_cancel_requested"] >= self.config.cancel_duration:
+                    run["status"] = "cancelled"
+                    run["cancelled_at"] = int(time.time())
+                return run
+            if run["status"] not in ("queued", "in_progress") or run["_streamed"]:
+                return run
+            elapsed = time.monotonic() - run["_created"]
+            if elapsed < run["_queue_time"]:
+                return run
+            if run["started_at"] is None:
+                run["status"] = "in_progress"
+                run["started_at"] = int(time.time())
+            if elapsed < run["_queue_time"] + run["_duration"]:
+                return run
+            self.finish_run(run)
+            return run
+
+    def finish_run(self, run):
+        with self.lock:
+            if run["_fails"]:
+                run["status"] = "failed"
+                run["failed_at"] = int(time.time())
+                run["last_error"] = {"code": "server_error", "message": "Emulated run failure."}
+            else:
+                self.add_message(run["thread_id"], "assistant", self.reply_text(run["thread_id"]),
+                                 assistant_id=run["assistant_id"], run_id=run["id"])
+                run["status"] = "completed"
+                run["completed_at"] = int(time.time())
+
+
+@functools.lru_cache(maxsize=None)
+def route_pattern(template):
+    """
+    Compiles a route template such as '/v1/threads/{thread_id}/runs' into a regular expression.
+    """
+    return re.compile(re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", template))
+
+
+def public(record):
+    """
+    Strips the emulator's private bookkeeping fields from a stored object.
+    """
+    return {key: value for key, value in record.items() if not key.startswith("_")}
+
+
+def list_page(items, query, default_order="desc"):
+    """
+    Builds a cursor-paginated list response from items stored in creation order.
+    """
+    order = query.get("order", default_order)
+    limit = int(query.get("limit", 20))
+    ordered = list(items) if order == "asc" else list(reversed(items))
+    after = query.get("after")
+    if after is not None:
+        ids = [item["id"] for item in ordered]
+        ordered = ordered[ids.index(after) + 1:] if after in ids else []
+    page = ordered[:limit]
+    return {
+        "object": "list",
+        "data": [public(item) for item in page],
+        "first_id": page[0]["id"] if page else None,
+        "last_id": page[-1]["id"] if page else None,
+        "has_more": len(ordered) > limit,
+    }
+
+
+class EmulatorHandler(BaseHTTPRequestHandler):
+    """
+    Serves the subset of the v1 Assistants, Threads, Messages, Runs and Files endpoints this project uses.
+    """
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, delayed ACKs add ~40 ms to every response
+    disable_nagle_algorithm = True
+    routes = [
+        ("GET", "/v1/models", "list_models"),
+        ("POST", "/v1/assistants", "create_assistant"),
+        ("GET", "/v1/assistants", "list_assistants"),
+        ("GET", "/v1/assistants/{assistant_id}", "retrieve_assistant"),
+        ("POST", "/v1/assistants/{assistant_id}", "update_assistant"),
+        ("DELETE", "/v1/assistants/{assistant_id}", "delete_assistant"),
+        ("POST", "/v1/files", "create_file"),
+        ("GET", "/v1/files", "list_files"),
+        ("GET", "/v1/files/{file_id}", "retrieve_file"),
+        ("DELETE", "/v1/files/{file_id}", "delete_file"),
+        ("POST", "/v1/threads", "create_thread"),
+        ("GET", "/v1/threads/{thread_id}", "retrieve_thread"),
+        ("DELETE", "/v1/threads/{thread_id}", "delete_thread"),
+        ("POST", "/v1/threads/{thread_id}/messages", "create_message"),
+        ("GET", "/v1/threads/{thread_id}/messages", "list_messages"),
+        ("POST", "/v1/threads/{thread_id}/runs", "create_run"),
+        ("GET", "/v1/threads/{thread_id}/runs/{run_id}", "retrieve_run"),
+        ("POST", "/v1/threads/{thread_id}/runs/{run_id}/cancel", "cancel_run"),
+    ]
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def dispatch(self, method):
+        self.started = time.monotonic()
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length) if length else b""
+
+        for route_method, template, handler_name in self.routes:
+            match = route_pattern(template).fullmatch(url.path)
+            if route_method == method and match:
+                route = template
+                break
+        else:
+            route, handler_name, match = url.path, None, None
+        self.log_entry = {"method": method, "route": route, "path": url.path}
+
+        time.sleep(self.state.draw(self.state.config.latency))
+        allowed, remaining, reset = self.state.rate_limit_status()
+        self.rate_headers = {}
+        if remaining is not None:
+            self.rate_headers = {
+                "x-ratelimit-limit-requests": str(self.state.config.rate_limit),
+                "x-ratelimit-remaining-requests": str(remaining),
+                "x-ratelimit-reset-requests": f"{max(reset, 0.001):.3f}s",
+            }
+
+        if not allowed:
+            self.send_error_json(429, "Rate limit reached (emulated).", {"retry-after-ms": str(int(reset * 1000))})
+        elif handler_name is None:
+            self.send_error_json(404, f"Unknown endpoint {method} {url.path}.")
+        elif self.state.chance(self.state.config.failure_rate):
+            self.send_error_json(500, "Emulated server error.")
+        else:
+            try:
+                getattr(self, handler_name)(query, **match.groupdict())
+            except KeyError as e:
+                self.send_error_json(404, f"No such object: {e}.")
+
+    def start_response(self, status, headers):
+        """
+        Logs the request and sends the status line and headers.
+
+        The log entry is written before the response, so a client that has its answer always
+        finds its request in the log. For streams the duration is the time to the first byte.
+        """
+        with self.state.lock:
+            self.state.request_log.append(dict(self.log_entry, status=status,
+                                               duration=time.monotonic() - self.started))
+        self.send_response(status)
+        for name, value in dict(self.rate_headers, **headers).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def json_body(self):
+        return json.loads(self.body or b"{}")
+
+    def send_json(self, payload, status=200, headers=None):
+        data = json.dumps(payload).encode()
+        self.start_response(status, dict(headers or {}, **{"Content-Type": "application/json",
+                                                           "Content-Length": str(len(data))}))
+        self.wfile.write(data)
+
+    def send_error_json(self, status, message, headers=None):
+        self.send_json({"error": {"message": message, "type": "emulator_error", "code": None}}, status, headers)
+
+    def log_message(self, format, *args):
+        pass
+
+    # Models
+
+    def list_models(self, query):
+        self.send_json({"object": "list", "data": [{"id": "gpt-4-1106-preview", "object": "model",
+                                                           "created": 0, "owned_by": "emulator"}]})
+
+    # Assistants
+
+    def create_assistant(self, query):
+        body = self.json_body()
+        assistant = {
+            "id": self.state.new_id("asst_"), "object": "assistant", "created_at": int(time.time()),
+            "name": body.get("name"), "description": body.get("description"), "model": body.get("model"),
+            "instructions": body.get("instructions"), "tools": body.get("tools", []),
+            "file_ids": body.get("file_ids", []), "metadata": body.get("metadata") or {},
+        }
+        with self.state.lock:
+            self.state.assistants[assistant["id"]] = assistant
+        self.send_json(assistant)
+
+    def list_assistants(self, query):
+        with self.state.lock:
+            self.send_json(list_page(self.state.assistants.values(), query))
+
+    def retrieve_assistant(self, query, assistant_id):
+        with self.state.lock:
+            self.send_json(self.state.assistants[assistant_id])
+
+    def update_assistant(self, query, assistant_id):
+        body = self.json_body()
+        with self.state.lock:
+            assistant = self.state.assistants[assistant_id]
+            for key in ("name", "description", "model", "instructions", "tools", "file_ids", "metadata"):
+                if key in body:
+                    assistant[key] = body[key]
+            self.send_json(assistant)
+
+    def delete_assistant(self, query, assistant_id):
+        with self.state.lock:
+            del self.state.assistants[assistant_id]
+        self.send_json({"id": assistant_id, "object": "assistant.deleted", "deleted": True})
+
+    # Files
+
+    def create_file(self, query):
+        message = email.parser.BytesParser().parsebytes(
+            b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + self.body
+        )
+        fields = {}
+        filename, content = None, b""
+        for part in message.get_payload():
+            name = part.get_param("name", header="content-disposition")
+            if part.get_filename() is not None:
+                filename, content = part.get_filename(), part.get_payload(decode=True)
+            else:
+                fields[name] = part.get_payload(decode=True).decode()
+        file = {
+            "id": self.state.new_id("file-"), "object": "file", "bytes": len(content),
+            "created_at": int(time.time()), "filename": filename, "purpose": fields.get("purpose"),
+            "status": "processed", "status_details": None,
+        }
+        with self.state.lock:
+            self.state.files[file["id"]] = file
+        self.send_json(file)
+
+    def list_files(self, query):
+        with self.state.lock:
+            files = [file for file in self.state.files.values()
+                     if "purpose" not in query or file["purpose"] == query["purpose"]]
+            self.send_json(list_page(files, dict({"limit": 10000}, **query)))
+
+    def retrieve_file(self, query, file_id):
+        with self.state.lock:
+            self.send_json(self.state.files[file_id])
+
+    def delete_file(self, query, file_id):
+        with self.state.lock:
+            del self.state.files[file_id]
+        self.send_json({"id": file_id, "object": "file", "deleted": True})
+
+    # Threads and messages
+
+    def create_thread(self, query):
+        body = self.json_body()
+        thread = {"id": self.state.new_id("thread_"), "object": "thread", "created_at": int(time.time()),
+                  "metadata": body.get("metadata") or {}}
+        with self.state.lock:
+            self.state.threads[thread["id"]] = thread
+            self.state.messages[thread["id"]] = []
+        for message in body.get("messages", []):
+            self.state.add_message(thread["id"], message.get("role", "user"), message["content"],
+                                   message.get("file_ids"))
+        self.send_json(thread)
+
+    def retrieve_thread(self, query, thread_id):
+        with self.state.lock:
+            self.send_json(self.state.threads[thread_id])
+
+    def delete_thread(self, query, thread_id):
+        with self.state.lock:
+            del self.state.threads[thread_id]
+            del self.state.messages[thread_id]
+        self.send_json({"id": thread_id, "object": "thread.deleted", "deleted": True})
+
+    def create_message(self, query, thread_id):
+        body = self.json_body()
+        with self.state.lock:
+            self.state.threads[thread_id]
+            active_runs = [run["id"] for run in self.state.runs.values() if run["thread_id"] == thread_id
+                           and self.state.advance_run(run)["status"] in ("queued", "in_progress", "cancelling")]
+        if active_runs:
+            self.send_error_json(400, f"Can't add messages to {thread_id} while a run {active_runs[0]} is active.")
+            return
+        message = self.state.add_message(thread_id, body.get("role", "user"), body["content"], body.get("file_ids"))
+        self.send_json(message)
+
+    def list_messages(self, query, thread_id):
+        with self.state.lock:
+            messages = self.state.messages[thread_id]
+            if "run_id" in query:
+                messages = [message for message in messages if message["run_id"] == query["run_id"]]
+            self.send_json(list_page(messages, query))
+
+    # Runs
+
+    def create_run(self, query, thread_id):
+        body = self.json_body()
+        with self.state.lock:
+            assistant = self.state.assistants.get(body["assistant_id"], {})
+            self.state.threads[thread_id]
+        run = {
+            "id": self.state.new_id("run_"), "object": "thread.run", "created_at": int(time.time()),
+            "thread_id": thread_id, "assistant_id": body["assistant_id"], "status": "queued",
+            "required_action": None, "last_error": None, "expires_at": None, "started_at": None,
+            "cancelled_at": None, "failed_at": None, "completed_at": None,
+            "model": assistant.get("model", "gpt-4-1106-preview"), "instructions": assistant.get("instructions", ""),
+            "tools": assistant.get("tools", []), "file_ids": assistant.get("file_ids", []), "metadata": {},
+            "usage": None, "incomplete_details": None, "max_completion_tokens": None, "max_prompt_tokens": None,
+            "truncation_strategy": None, "tool_choice": "auto", "response_format": "auto", "temperature": 1.0,
+            "_created": time.monotonic(), "_queue_time": self.state.draw(self.state.config.queue_time),
+            "_duration": self.state.draw(self.state.config.run_duration),
+            "_fails": self.state.chance(self.state.config.run_failure_rate),
+            "_stream_error": self.state.chance(self.state.config.stream_error_rate),
+            "_streamed": bool(body.get("stream")), "_cancel_requested": None,
+        }
+        with self.state.lock:
+            self.state.runs[run["id"]] = run
+        if body.get("stream"):
+            self.stream_run(run)
+            return
+        self.send_json(public(run))
+
+    def retrieve_run(self, query, thread_id, run_id):
+        run = self.state.advance_run(self.state.runs[run_id])
+        with self.state.lock:
+            self.send_json(public(run))
+
+    def cancel_run(self, query, thread_id, run_id):
+        with self.state.lock:
+            run = self.state.runs[run_id]
+            if run["status"] in ("queued", "in_progress"):
+                run["status"] = "cancelling"
+                run["_cancel_requested"] = time.monotonic()
+            self.send_json(public(run))
+
+    def stream_run(self, run):
+        """
+        Plays a run out as server-sent events: lifecycle events, reply deltas and the final message.
+        """
+        self.start_response(200, {"Content-Type": "text/event-stream", "Connection": "close"})
+        self.close_connection = True
+
+        def send_event(event, data):
+            self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+            self.wfile.flush()
+
+        send_event("thread.run.created", public(run))
+        time.sleep(run["_queue_time"])
+        with self.state.lock:
+            run["status"] = "in_progress"
+            run["started_at"] = int(time.time())
+        send_event("thread.run.in_progress", public(run))
+
+        if run["_fails"]:
+            time.sleep(run["_duration"])
+            self.state.finish_run(run)
+            send_event("thread.run.failed", public(run))
+        else:
+            text = self.state.reply_text(run["thread_id"])
+            message_id = self.state.new_id("msg_")
+            fragments = re.findall(r"\S+\s*", text) or [text]
+            # The run duration is spread before the first token; fragments then follow at token_interval
+            time.sleep(max(0.0, run["_duration"] - self.state.config.token_interval * len(fragments)))
+            for index, fragment in enumerate(fragments):
+                send_event("thread.message.delta", {
+                    "id": message_id, "object": "thread.message.delta",
+                    "delta": {"content": [{"index": 0, "type": "text", "text": {"value": fragment}}]},
+                })
+                time.sleep(self.state.config.token_interval)
+                if run["_stream_error"]:
+                    break
+            if run["_stream_error"]:
+                error = {"code": "server_error", "message": "Emulated stream error.", "param": None,
+                         "type": "server_error"}
+                with self.state.lock:
+                    run["status"] = "failed"
+                    run["failed_at"] = int(time.time())
+                    run["last_error"] = {"code": "server_error", "message": error["message"]}
+                send_event("error", error)
+                self.wfile.write(b"event: done\ndata: [DONE]\n\n")
+                self.wfile.flush()
+                return
+            message = self.state.add_message(run["thread_id"], "assistant", text,
+                                             assistant_id=run["assistant_id"], run_id=run["id"])
+            with self.state.lock:
+                # Keep the ID announced in the deltas
+                message["id"] = message_id
+                run["status"] = "completed"
+                run["completed_at"] = int(time.time())
+            send_event("thread.message.completed", message)
+            send_event("thread.run.completed", public(run))
+        self.wfile.write(b"event: done\ndata: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class EmulatorServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server holding the emulator's state.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, config=None):
+        """
+        Binds the server.
+
+        Parameters:
+        address (tuple): (host, port); port 0 picks a free port.
+        config (EmulatorConfig, optional): The emulator's behaviour. Defaults to EmulatorConfig().
+        """
+        super().__init__(address, EmulatorHandler)
+        self.state = EmulatorState(config if config is not None else EmulatorConfig())
+
+    @property
+    def base_url(self):
+        """
+        The URL to pass as base_url to initiate_client.
+        """
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_emulator(config=None, host="127.0.0.1", port=0):
+    """
+    Starts an emulator in a background thread.
+
+    Parameters:
+    config (EmulatorConfig, optional): The emulator's behaviour.
+    host (str): The interface to bind.
+    port (int): The port to bind; 0 picks a free port.
+
+    Returns:
+    EmulatorServer: The running server; call shutdown() to stop it.
+    """
+    server = EmulatorServer((host, port), config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Assistants API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean response latency in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Standard deviation of the response latency.")
+    parser.add_argument("--queue-time", type=float, default=0.2, help="Seconds a run stays queued.")
+    parser.add_argument("--run-duration", type=float, default=1.0, help="Seconds a run stays in progress.")
+    parser.add_argument("--token-interval", type=float, default=0.02, help="Seconds between streamed fragments.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability of a 500 response.")
+    parser.add_argument("--run-failure-rate", type=float, default=0.0, help="Probability that a run fails.")
+    parser.add_argument("--stream-error-rate", type=float, default=0.0,
+                        help="Probability that a streamed run breaks off with an error event.")
+    parser.add_argument("--rate-limit", type=int, help="Requests per second before answering 429.")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    emulator_config = EmulatorConfig(
+        latency=("normal", args.latency, args.jitter) if args.jitter else args.latency,
+        queue_time=args.queue_time, run_duration=args.run_duration, token_interval=args.token_interval,
+        failure_rate=args.failure_rate, run_failure_rate=args.run_failure_rate,
+        stream_error_rate=args.stream_error_rate, rate_limit=args.rate_limit, seed=args.seed,
+    )
+    emulator = EmulatorServer((args.host, args.port), emulator_config)
+    print(f"Assistants API emulator listening on {emulator.base_url}")
+    print(f"Use it with initiate_client(base_url='{emulator.base_url}').")
+    try:
+        emulator.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,198 @@
+# ./chat_bot/file_index.py
+
+import hashlib
+import json
+import os
+import re
+from chat_bot.local_state import state_path
+from chat_bot.utility import DEFAULT_EXCLUDE, path_is_excluded
+
+
+class FileIndex:
+    """
+    Persistent index of the files under a directory, used to pick files for upload.
+
+    The index stores every directory's modification time with its file and subdirectory names.
+    A refresh stats each known directory and only rescans those whose modification time changed,
+    since adding, removing or renaming an entry updates its parent directory. Searches run over
+    the in-memory list of relative paths.
+    """
+    def __init__(self, root, exclude=None, index_path=None):
+        """
+        Initializes the index and loads the saved copy for this root if there is one.
+
+        Parameters:
+        root (str): The directory to index.
+        exclude (list, optional): Gitignore-style patterns to leave out. Defaults to DEFAULT_EXCLUDE.
+        index_path (str, optional): Path of the saved index. Defaults to a file in the local state directory.
+        """
+        self.root = os.path.abspath(root)
+        self.exclude = DEFAULT_EXCLUDE if exclude is None else exclude
+        if index_path is None:
+            key = hashlib.sha1(f"{self.root}:{self.exclude}".encode()).hexdigest()[:16]
+            index_path = state_path(f"file_index_{key}.json")
+        self.index_path = index_path
+        self.directories = self._load()
+        self.paths = None
+        self.lowered_paths = None
+
+    def refresh(self):
+        """
+        Brings the index up to date, rescanning only directories that changed, and saves it.
+
+        Returns:
+        int: The number of directories that had to be rescanned.
+        """
+        directories = {}
+        rescanned = 0
+        stack = ['']
+        while stack:
+            relative_directory = stack.pop()
+            directory = os.path.join(self.root, relative_directory)
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            entry = self.directories.get(relative_directory)
+            if entry is None or entry["mtime_ns"] != mtime_ns:
+                entry = self._scan(directory, relative_directory, mtime_ns)
+                rescanned += 1
+            directories[relative_directory] = entry
+            stack.extend(relative_directory + name + '/' for name in entry["subdirectories"])
+
+        changed = rescanned or directories.keys() != self.directories.keys()
+        self.directories = directories
+        self.paths = None
+        self.lowered_paths = None
+        if changed:
+            self._save()
+        return rescanned
+
+    def all_paths(self):
+        """
+        Returns every indexed file path relative to the root.
+
+        Returns:
+        list: The relative file paths, directory by directory.
+        """
+        if self.paths is None:
+            self.paths = [
+                relative_directory + name
+                for relative_directory in sorted(self.directories)
+                for name in self.directories[relative_directory]["files"]
+            ]
+        return self.paths
+
+    def search(self, query, limit=20):
+        """
+        Finds files whose path matches the query by substring or as a fuzzy subsequence.
+
+        Matches in the file name rank above matches elsewhere in the path, substring matches
+        above scattered ones, and tighter, shorter matches above looser, longer ones.
+
+        Parameters:
+        query (str): Part of the file name or path, case-insensitive.
+        limit (int): The maximum number of results.
+
+        Returns:
+        list: Absolute paths of the best matching files, best first.
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        paths = self.all_paths()
+        if self.lowered_paths is None:
+            self.lowered_paths = [path.lower() for path in paths]
+
+        # Substring matches are found with a C-level scan; scoring fuzzy matches only when they are too few
+        substring_hits = [index for index, lowered in enumerate(self.lowered_paths) if query in lowered]
+        scored = [
+            ((0 if query in self.lowered_paths[index].rsplit('/', 1)[-1] else 1, 0, len(paths[index])), index)
+            for index in substring_hits
+        ]
+        if len(scored) < limit:
+            # Each '[^c]*c' step can only match one way, so the scan never backtracks
+            subsequence = re.compile(re.escape(query[0]) + ''.join(
+                f"[^{re.escape(character)}]*{re.escape(character)}" for character in query[1:]
+            ))
+            substring_set = set(substring_hits)
+            for index, lowered in enumerate(self.lowered_paths):
+                if index in substring_set:
+                    continue
+                match = subsequence.search(lowered)
+                if match is not None:
+                    scored.append(((2, match.end() - match.start(), len(paths[index])), index))
+        scored.sort()
+        return [os.path.join(self.root, paths[index]) for _, index in scored[:limit]]
+
+    def _scan(self, directory, relative_directory, mtime_ns):
+        files = []
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    relative_path = relative_directory + entry.name
+                    try:
+                        # Linked directories are not entered, matching iter_files_in_path's default
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if not is_dir and not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    if path_is_excluded(self.exclude, relative_path, is_dir):
+                        continue
+                    (subdirectories if is_dir else files).append(entry.name)
+        except OSError:
+            pass
+        return {"mtime_ns": mtime_ns, "files": sorted(files), "subdirectories": sorted(subdirectories)}
+
+    def _load(self):
+        try:
+            with open(self.index_path) as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        temporary_path = self.index_path + ".tmp"
+        with open(temporary_path, "w") as index_file:
+            json.dump(self.directories, index_file)
+        os.replace(temporary_path, self.index_path)
+
+
+def search_file_for_upload(file_path, limit=20):
+    """
+    Lets the user find a file for upload by typing part of its name.
+
+    Parameters:
+    file_path (str): The path where files are located.
+    limit (int): The maximum number of matches shown per search.
+
+    Returns:
+    str: The path of the selected file, or None if the selection is canceled or invalid.
+    """
+    index = FileIndex(file_path)
+    index.refresh()
+    print(f"{len(index.all_paths())} files indexed in {file_path}.")
+    while True:
+        query = input("Type part of the file name to search, or press Enter to cancel: ").strip()
+        if not query:
+            print("Operation canceled.")
+            return None
+        matches = index.search(query, limit=limit)
+        if not matches:
+            print("No matching files.")
+            continue
+        for position, match in enumerate(matches, start=1):
+            print(f"{position}. {os.path.relpath(match, index.root)}")
+        selection = input("Enter the number of the file you want to upload, or press Enter to search again: ").strip()
+        if not selection:
+            continue
+        try:
+            selected_index = int(selection) - 1
+        except ValueError:
+            selected_index = -1
+        if 0 <= selected_index < len(matches):
+            return matches[selected_index]
+        print("Invalid selection.")
+        return None
@@ -0,0 +1,123 @@
+# ./chat_bot/file_list_cache.py
+
+import json
+import os
+import threading
+import time
+from chat_bot.local_state import state_path
+
+
+class FileListCache:
+    """
+    Time-limited cache of the file listing used by FileManager.list.
+
+    Uploads and deletions made through FileManager are written through to the cache, and
+    every change is saved to a JSON snapshot so a restarted CLI starts with a warm cache.
+    Instances sharing a snapshot pick up each other's changes when the snapshot is newer.
+    Each endpoint and account (see local_state.account_key) has its own snapshot.
+    """
+    def __init__(self, ttl=300, snapshot_path=None, account_key=None):
+        """
+        Initializes the cache and loads the snapshot from disk if there is one.
+
+        Parameters:
+        ttl (float): Seconds a listing fetched from the API stays valid.
+        snapshot_path (str, optional): Path of the JSON snapshot. Defaults to files.json in the local state directory.
+        account_key (str, optional): The key from local_state.account_key, added to the default snapshot name.
+        """
+        self.ttl = ttl
+        if snapshot_path is None:
+            snapshot_path = state_path(f"files_{account_key}.json" if account_key else "files.json")
+        self.snapshot_path = snapshot_path
+        self.lock = threading.Lock()
+        self.files = None
+        self.fetched_at = 0.0
+        self.snapshot_mtime = None
+        self._load()
+
+    def get(self):
+        """
+        Returns the cached listing if it has not expired.
+
+        Returns:
+        dict: A copy of the cached listing, or None if it is missing or stale.
+        """
+        with self.lock:
+            if self._snapshot_changed():
+                self._load()
+            if self.files is None or time.time() - self.fetched_at > self.ttl:
+                return None
+            return dict(self.files)
+
+    def store(self, files):
+        """
+        Replaces the cached listing with one freshly fetched from the API.
+
+        Parameters:
+        files (dict): File IDs mapped to their details, as returned by FileManager.list.
+        """
+        with self.lock:
+            self.files = dict(files)
+            self.fetched_at = time.time()
+            self._save()
+
+    def add(self, file_id, details):
+        """
+        Writes a newly created file through to the cached listing.
+
+        Parameters:
+        file_id (str): The ID of the created file.
+        details (dict): The file's details (filename and purpose).
+        """
+        with self.lock:
+            if self._snapshot_changed():
+                self._load()
+            if self.files is not None:
+                self.files[file_id] = details
+                self._save()
+
+    def remove(self, file_id):
+        """
+        Writes a deletion through to the cached listing.
+
+        Parameters:
+        file_id (str): The ID of the deleted file.
+        """
+        with self.lock:
+            if self._snapshot_changed():
+                self._load()
+            if self.files is not None and self.files.pop(file_id, None) is not None:
+                self._save()
+
+    def invalidate(self):
+        """
+        Discards the cached listing so the next read goes to the API.
+        """
+        with self.lock:
+            self.files = None
+            self.fetched_at = 0.0
+            self._save()
+
+    def _snapshot_changed(self):
+        try:
+            return os.stat(self.snapshot_path).st_mtime_ns != self.snapshot_mtime
+        except OSError:
+            return False
+
+    def _load(self):
+        try:
+            self.snapshot_mtime = os.stat(self.snapshot_path).st_mtime_ns
+            with open(self.snapshot_path) as snapshot:
+                data = json.load(snapshot)
+            self.files = data["files"]
+            self.fetched_at = data["fetched_at"]
+        except (OSError, ValueError, KeyError):
+            self.files = None
+            self.fetched_at = 0.0
+
+    def _save(self):
+        temporary_path = self.snapshot_path + ".tmp"
+        with open(temporary_path, "w") as snapshot:
+            json.dump({"fetched_at": self.fetched_at, "files": self.files}, snapshot)
+        os.replace(temporary_path, self.snapshot_path)
+        self.snapshot_mtime = os.stat(self.snapshot_path).st_mtime_ns
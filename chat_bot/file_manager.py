@@ -1,43 +1,205 @@
 # ./chat_bot/file_manager.py
 
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from openai import APIConnectionError, APIError, InternalServerError, NotFoundError, RateLimitError
+from chat_bot.pagination import iterate_pages
+from chat_bot.rate_limiter import NO_RETRY_HEADER
+from chat_bot.upload_cache import hash_file
+
+# Errors worth retrying: the request may succeed if sent again a little later.
+TRANSIENT_ERRORS = (APIConnectionError, InternalServerError, RateLimitError)
+
+
 class FileManager:
     """
         FileManager handles operations related to file management in the context of the GPT-4-Turbo-Assistant.
         It provides functionalities to create, list, and delete files within the assistant's environment.
         """
-    def __init__(self, client):
+    def __init__(self, client, upload_cache=None, list_cache=None, response_cache=None):
         """
         Initializes the FileManager with a client to manage files.
 
         Parameters:
         client (OpenAI_Client): The client object used for file operations.
+        upload_cache (UploadCache, optional): Index of already uploaded content; when given,
+            files whose content was uploaded before are not sent again.
+        list_cache (FileListCache, optional): Cache serving list() without an API call while it is fresh.
+        response_cache (ResponseCache, optional): Cached replies that used a file are dropped when it is deleted.
         """
         self.client = client.files
+        # create_many retries uploads itself, so they are sent through a copy of the client that does not,
+        # marked so that a rate limiting transport does not retry them either
+        self.single_attempt_client = client.with_options(max_retries=0, default_headers={NO_RETRY_HEADER: "1"}).files
+        self.upload_cache = upload_cache
+        self.list_cache = list_cache
+        self.response_cache = response_cache
 
-    def create(self, file_path, purpose):
+    def create(self, file_path, purpose, retry=True):
         """
         Creates a new file in the assistant's environment.
 
+        With an upload cache, content that was already uploaded for the same purpose is
+        not sent again; the cached file ID is returned after checking it still exists.
+
         Parameters:
         file_path (str): The path to the file to be uploaded.
         purpose (str): The purpose of the file.
+        retry (bool): Whether the client may retry a failed upload. Callers retrying on their own pass False.
 
         Returns:
         str: The ID of the created file.
         """
+        content_hash = None
+        if self.upload_cache is not None:
+            content_hash = hash_file(file_path)
+            cached_file_id = self.upload_cache.get(content_hash, purpose)
+            if cached_file_id is not None:
+                if self.exists(cached_file_id):
+                    return cached_file_id
+                self.upload_cache.forget(cached_file_id)
+
         with open(file_path, 'rb') as file_object:
-            response = self.client.create(file=file_object, purpose=purpose)
-            return response.id
+            files_client = self.client if retry else self.single_attempt_client
+            response = files_client.create(file=file_object, purpose=purpose)
+
+        if self.upload_cache is not None:
+            self.upload_cache.put(content_hash, purpose, response.id, file_path, os.path.getsize(file_path))
+        if self.list_cache is not None:
+            self.list_cache.add(response.id, {"filename": response.filename, "purpose": response.purpose})
+        return response.id
+
+    def create_many(self, file_paths, purpose, max_workers=8, max_retries=3, show_progress=True):
+        """
+        Uploads several files concurrently through a bounded pool of worker threads.
+
+        Transient failures (connection errors, rate limits, server errors) are retried here with
+        jittered exponential backoff, and not by the client, so each file is sent at most
+        max_retries + 1 times. Other errors are recorded and the remaining uploads continue.
+
+        Parameters:
+        file_paths (list): The paths of the files to be uploaded.
+        purpose (str): The purpose of the files.
+        max_workers (int): The maximum number of uploads in flight at once.
+        max_retries (int): How many times a transient failure is retried per file.
+        show_progress (bool): Whether to print per-file progress and a throughput summary.
+
+        Returns:
+        list: One dict per path, in input order, with keys 'path', 'file_id', 'error' and 'attempts'.
+        """
+        file_paths = list(file_paths)
+        results = [None] * len(file_paths)
+        progress = {"done": 0, "bytes": 0}
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._create_with_retry, file_path, purpose, max_retries): index
+                for index, file_path in enumerate(file_paths)
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                progress["done"] += 1
+                if result["file_id"] is not None:
+                    progress["bytes"] += result["size"]
+                if show_progress:
+                    status = result["file_id"] if result["file_id"] is not None else f"failed: {result['error']}"
+                    print(f"[{progress['done']}/{len(file_paths)}] {result['path']} -> {status}")
+
+        if show_progress:
+            elapsed = max(time.monotonic() - started, 1e-9)
+            uploaded = sum(1 for result in results if result["file_id"] is not None)
+            print(f"Uploaded {uploaded}/{len(file_paths)} files, {progress['bytes'] / 1e6:.2f} MB in "
+                  f"{elapsed:.1f}s ({uploaded / elapsed:.2f} files/s, {progress['bytes'] / 1e6 / elapsed:.2f} MB/s).")
+        return results
+
+    def _create_with_retry(self, file_path, purpose, max_retries):
+        """
+        Uploads one file for create_many, retrying transient failures.
+
+        Returns:
+        dict: The outcome of the upload, as described in create_many.
+        """
+        result = {"path": file_path, "file_id": None, "error": None, "attempts": 0, "size": 0}
+        for attempt in range(max_retries + 1):
+            result["attempts"] = attempt + 1
+            try:
+                result["size"] = os.path.getsize(file_path)
+                result["file_id"] = self.create(file_path, purpose, retry=False)
+                result["error"] = None
+                return result
+            except TRANSIENT_ERRORS as e:
+                result["error"] = str(e)
+                if attempt < max_retries:
+                    time.sleep(min(8.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.5))
+            except (OSError, APIError) as e:
+                result["error"] = str(e)
+                return result
+        return result
 
-    def list(self):
+    def list(self, refresh=False):
         """
         Lists all files currently managed by the assistant.
 
+        With a list cache, a fresh cached listing is returned without calling the API.
+
+        Parameters:
+        refresh (bool): Bypass the list cache and fetch the listing from the API.
+
         Returns:
         dict: A dictionary with file IDs as keys and file details (filename and purpose) as values.
         """
-        files_data = self.client.list().data
-        return {file.id: {"filename": file.filename, "purpose": file.purpose} for file in files_data}
+        if self.list_cache is not None and not refresh:
+            cached_files = self.list_cache.get()
+            if cached_files is not None:
+                return cached_files
+
+        files = dict(self.iter_files())
+        if self.upload_cache is not None:
+            self.upload_cache.retain(files)
+        if self.list_cache is not None:
+            self.list_cache.store(files)
+        return files
+
+    def iter_files(self, page_size=100, prefetch=True):
+        """
+        Iterates over all files without building the full listing in memory.
+
+        Pages are requested with the `limit`/`after` cursor; a server that returns the whole
+        listing at once is handled as a single page.
+
+        Parameters:
+        page_size (int): The number of files requested per page.
+        prefetch (bool): Whether to fetch the next page while the current one is consumed.
+
+        Returns:
+        generator: (file ID, file details) pairs, with details as in list().
+        """
+        def fetch_page(after, limit):
+            query = {"limit": limit} if after is None else {"limit": limit, "after": after}
+            return self.client.list(extra_query=query).data
+
+        for file in iterate_pages(fetch_page, page_size=page_size, prefetch=prefetch):
+            yield file.id, {"filename": file.filename, "purpose": file.purpose}
+
+    def exists(self, file_id):
+        """
+        Checks whether a file still exists, with a single targeted request.
+
+        Parameters:
+        file_id (str): The ID of the file to check.
+
+        Returns:
+        bool: True if the file exists, False if it was not found.
+        """
+        try:
+            self.client.retrieve(file_id)
+            return True
+        except NotFoundError:
+            return False
 
     def delete(self, file_id):
         """
@@ -50,4 +212,10 @@ class FileManager:
         str: Confirmation message stating the file has been deleted.
         """
         self.client.delete(file_id)
+        if self.upload_cache is not None:
+            self.upload_cache.forget(file_id)
+        if self.list_cache is not None:
+            self.list_cache.remove(file_id)
+        if self.response_cache is not None:
+            self.response_cache.forget_file(file_id)
         return f"File with ID {file_id} has been deleted."
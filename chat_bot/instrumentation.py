@@ -0,0 +1,466 @@
+# ./chat_bot/instrumentation.py
+
+import atexit
+import collections
+import json
+import os
+import re
+import secrets
+import threading
+import time
+import httpx
+
+# Upper bounds of the request latency histogram, in seconds.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+EXPORT_FORMATS = ("prometheus", "otlp", "json")
+_ID_SEGMENTS = (
+    (re.compile(r"/asst_[^/]+"), "/{assistant_id}"),
+    (re.compile(r"/thread_[^/]+"), "/{thread_id}"),
+    (re.compile(r"/msg_[^/]+"), "/{message_id}"),
+    (re.compile(r"/run_[^/]+"), "/{run_id}"),
+    (re.compile(r"/step_[^/]+"), "/{step_id}"),
+    (re.compile(r"/file-[^/]+"), "/{file_id}"),
+)
+
+
+def endpoint_name(request):
+    """
+    Returns the request's path with object IDs replaced by placeholders, e.g. '/v1/threads/{thread_id}/runs'.
+
+    Parameters:
+    request (httpx.Request): The outgoing request.
+
+    Returns:
+    str: The endpoint template.
+    """
+    path = request.url.path
+    for pattern, placeholder in _ID_SEGMENTS:
+        path = pattern.sub(placeholder, path)
+    return path
+
+
+def run_timing(run):
+    """
+    Splits a finished run's lifetime into the time spent queued and the time spent executing.
+
+    Parameters:
+    run (dict): A run object as returned by the API.
+
+    Returns:
+    tuple: (queue seconds, execution seconds), or None if the run has not finished.
+    The API reports whole seconds.
+    """
+    finished_at = run.get("completed_at") or run.get("failed_at") or run.get("cancelled_at")
+    if not run.get("started_at") or not finished_at:
+        return None
+    return run["started_at"] - run["created_at"], finished_at - run["started_at"]
+
+
+def _last_run_object(body):
+    """
+    Returns the last run object in a JSON or server-sent events response body.
+    """
+    try:
+        text = body.decode()
+        if not text.lstrip().startswith("event:"):
+            payload = json.loads(text)
+            return payload if payload.get("object") == "thread.run" else None
+        for line in reversed(text.splitlines()):
+            if line.startswith("data: {") and '"thread.run"' in line:
+                payload = json.loads(line[len("data: "):])
+                if payload.get("object") == "thread.run":
+                    return payload
+    except (UnicodeDecodeError, ValueError, AttributeError):
+        pass
+    return None
+
+
+class Instrumentation:
+    """
+    Records every API call made through an instrumented client.
+
+    Each call becomes a record with its endpoint, status, latency, retries and bytes sent and
+    received. Finished runs also record how long they were queued and how long they executed.
+    Records can be exported as Prometheus text, OpenTelemetry (OTLP/JSON) spans or a JSON log.
+    When the instrumentation is disabled, the transport passes requests straight through.
+    """
+    def __init__(self, enabled=True, max_records=10000, log_path=None, service_name="gpt-4-turbo-assistant"):
+        """
+        Initializes the instrumentation.
+
+        Parameters:
+        enabled (bool): Whether calls are recorded; can be switched at any time.
+        max_records (int): The number of most recent records kept for span and log export.
+            The Prometheus metrics cover every call.
+        log_path (str, optional): A file each record is appended to as a JSON line as it is made.
+        service_name (str): The service name reported with exported spans.
+        """
+        self.enabled = enabled
+        self.log_path = log_path
+        self.service_name = service_name
+        self.lock = threading.Lock()
+        self.records = collections.deque(maxlen=max_records)
+        self.recorded_runs = collections.deque(maxlen=1000)
+        self.trace_id = secrets.token_hex(16)
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        """
+        Clears the records and the aggregated metrics.
+        """
+        with self.lock:
+            self.records.clear()
+            self.requests = collections.Counter()
+            self.retries = collections.Counter()
+            self.bytes_sent = collections.Counter()
+            self.bytes_received = collections.Counter()
+            self.latency_buckets = collections.defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+            self.latency_sums = collections.Counter()
+            self.run_queue_seconds = []
+            self.run_execution_seconds = []
+
+    def record(self, entry):
+        """
+        Adds a finished call to the records and metrics.
+
+        Parameters:
+        entry (dict): The call's fields, as built by InstrumentedTransport.
+        """
+        key = (entry["method"], entry["endpoint"])
+        with self.lock:
+            self.records.append(entry)
+            self.requests[key + (str(entry["status"]),)] += 1
+            self.retries[key] += entry["retries"]
+            self.bytes_sent[key] += entry["bytes_sent"]
+            self.bytes_received[key] += entry["bytes_received"]
+            self.latency_sums[key] += entry["duration"]
+            buckets = self.latency_buckets[key]
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if entry["duration"] <= bound:
+                    buckets[index] += 1
+                    break
+            else:
+                buckets[-1] += 1
+            if entry.get("run_queue_seconds") is not None:
+                self.run_queue_seconds.append(entry["run_queue_seconds"])
+                self.run_execution_seconds.append(entry["run_execution_seconds"])
+            if self.log_path is not None:
+                with open(self.log_path, "a") as log_file:
+                    log_file.write(json.dumps(entry) + "\n")
+
+    def claim_run(self, run_id):
+        """
+        Returns True the first time a finished run is seen, so its timing is only recorded once.
+        """
+        with self.lock:
+            if run_id in self.recorded_runs:
+                return False
+            self.recorded_runs.append(run_id)
+            return True
+
+    def prometheus_text(self):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+
+        Returns:
+        str: Request counts, a latency histogram, retries and bytes per method and endpoint,
+        and run queue and execution time summaries.
+        """
+        def labels(method, endpoint, **extra):
+            pairs = dict({"method": method, "endpoint": endpoint}, **extra)
+            return "{" + ",".join(f'{name}="{value}"' for name, value in pairs.items()) + "}"
+
+        lines = []
+        with self.lock:
+            lines.append("# HELP openai_api_requests_total API requests by method, endpoint and status.")
+            lines.append("# TYPE openai_api_requests_total counter")
+            for (method, endpoint, status), count in sorted(self.requests.items()):
+                lines.append(f"openai_api_requests_total{labels(method, endpoint, status=status)} {count}")
+
+            lines.append("# HELP openai_api_request_duration_seconds API request latency, including the response body.")
+            lines.append("# TYPE openai_api_request_duration_seconds histogram")
+            for (method, endpoint), buckets in sorted(self.latency_buckets.items()):
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), buckets):
+                    cumulative += count
+                    lines.append(f"openai_api_request_duration_seconds_bucket{labels(method, endpoint, le=bound)} {cumulative}")
+                lines.append(f"openai_api_request_duration_seconds_sum{labels(method, endpoint)} "
+                             f"{self.latency_sums[(method, endpoint)]:.6f}")
+                lines.append(f"openai_api_request_duration_seconds_count{labels(method, endpoint)} {cumulative}")
+
+            for name, counter, description in (
+                ("openai_api_request_retries_total", self.retries, "Retried attempts made for API requests."),
+                ("openai_api_request_bytes_sent_total", self.bytes_sent, "Request body bytes sent."),
+                ("openai_api_response_bytes_received_total", self.bytes_received, "Response body bytes received."),
+            ):
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} counter")
+                for (method, endpoint), value in sorted(counter.items()):
+                    lines.append(f"{name}{labels(method, endpoint)} {value}")
+
+            for name, values, description in (
+                ("openai_run_queue_seconds", self.run_queue_seconds, "Time finished runs spent queued."),
+                ("openai_run_execution_seconds", self.run_execution_seconds, "Time finished runs spent executing."),
+            ):
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} summary")
+                lines.append(f"{name}_sum {sum(values)}")
+                lines.append(f"{name}_count {len(values)}")
+        return "\n".join(lines) + "\n"
+
+    def otlp_spans(self):
+        """
+        Returns the recorded calls as client spans in the OTLP/JSON trace format.
+
+        The payload can be posted to an OpenTelemetry collector's /v1/traces endpoint.
+
+        Returns:
+        dict: The export request, with one span per recorded call.
+        """
+        def attribute(key, value):
+            if isinstance(value, bool) or value is None:
+                return {"key": key, "value": {"stringValue": str(value)}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            if isinstance(value, float):
+                return {"key": key, "value": {"doubleValue": value}}
+            return {"key": key, "value": {"stringValue": value}}
+
+        with self.lock:
+            records = list(self.records)
+        spans = []
+        for entry in records:
+            attributes = [
+                attribute("http.request.method", entry["method"]),
+                attribute("url.path", entry["path"]),
+                attribute("http.route", entry["endpoint"]),
+                attribute("http.request.body.size", entry["bytes_sent"]),
+                attribute("http.response.body.size", entry["bytes_received"]),
+                attribute("http.request.resend_count", entry["retries"]),
+            ]
+            if entry["status"] is not None:
+                attributes.append(attribute("http.response.status_code", entry["status"]))
+            if entry["error"] is not None:
+                attributes.append(attribute("error.type", entry["error"]))
+            if entry.get("run_queue_seconds") is not None:
+                attributes.append(attribute("openai.run.queue_seconds", entry["run_queue_seconds"]))
+                attributes.append(attribute("openai.run.execution_seconds", entry["run_execution_seconds"]))
+            failed = entry["error"] is not None or (entry["status"] or 0) >= 400
+            spans.append({
+                "traceId": self.trace_id,
+                "spanId": entry["span_id"],
+                "name": f"{entry['method']} {entry['endpoint']}",
+                "kind": 3,
+                "startTimeUnixNano": str(entry["start_time_ns"]),
+                "endTimeUnixNano": str(entry["start_time_ns"] + int(entry["duration"] * 1e9)),
+                "attributes": attributes,
+                "status": {"code": 2 if failed else 1},
+            })
+        return {"resourceSpans": [{
+            "resource": {"attributes": [attribute("service.name", self.service_name)]},
+            "scopeSpans": [{"scope": {"name": "chat_bot.instrumentation"}, "spans": spans}],
+        }]}
+
+    def json_log(self):
+        """
+        Returns the recorded calls as JSON lines, oldest first.
+        """
+        with self.lock:
+            return "".join(json.dumps(entry) + "\n" for entry in self.records)
+
+    def export(self, path, export_format="prometheus"):
+        """
+        Writes the metrics or records to a file.
+
+        Parameters:
+        path (str): The file to write.
+        export_format (str): 'prometheus', 'otlp' or 'json'.
+        """
+        if export_format == "prometheus":
+            content = self.prometheus_text()
+        elif export_format == "otlp":
+            content = json.dumps(self.otlp_spans())
+        elif export_format == "json":
+            content = self.json_log()
+        else:
+            raise ValueError(f"Unknown export format '{export_format}'; use one of {', '.join(EXPORT_FORMATS)}.")
+        with open(path, "w") as export_file:
+            export_file.write(content)
+
+
+def instrumentation_from_environment():
+    """
+    Creates instrumentation when GPT4_ASSISTANT_METRICS names an export file, or returns None.
+
+    The format comes from GPT4_ASSISTANT_METRICS_FORMAT ('prometheus', 'otlp' or 'json',
+    defaulting to 'prometheus'), and the file is written when the process exits.
+
+    Returns:
+    Instrumentation: The instrumentation to pass to initiate_client, or None when metrics are off.
+    """
+    path = os.environ.get("GPT4_ASSISTANT_METRICS")
+    if not path:
+        return None
+    export_format = os.environ.get("GPT4_ASSISTANT_METRICS_FORMAT", "prometheus")
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown GPT4_ASSISTANT_METRICS_FORMAT '{export_format}'; use one of {', '.join(EXPORT_FORMATS)}.")
+    instrumentation = Instrumentation()
+    atexit.register(instrumentation.export, path, export_format)
+    return instrumentation
+
+
+class _RecordingStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """
+    Response body wrapper that counts bytes as they are read and records the call when the body is closed.
+    """
+    def __init__(self, stream, finish, keep_body):
+        self.stream = stream
+        self.finish = finish
+        self.keep_body = keep_body
+        self.received = 0
+        self.chunks = []
+        self.finished = False
+
+    def _count(self, chunk):
+        self.received += len(chunk)
+        if self.keep_body:
+            self.chunks.append(chunk)
+
+    def _finish(self):
+        if not self.finished:
+            self.finished = True
+            self.finish(self.received, b"".join(self.chunks) if self.keep_body else None)
+
+    def __iter__(self):
+        for chunk in self.stream:
+            self._count(chunk)
+            yield chunk
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            self._count(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            self.stream.close()
+        finally:
+            self._finish()
+
+    async def aclose(self):
+        try:
+            await self.stream.aclose()
+        finally:
+            self._finish()
+
+
+class _InstrumentedCall:
+    """
+    Bookkeeping for one request from the moment it is sent until its response body is closed.
+    """
+    def __init__(self, instrumentation, request):
+        self.instrumentation = instrumentation
+        self.request = request
+        self.endpoint = endpoint_name(request)
+        self.start_time_ns = time.time_ns()
+        self.started = time.perf_counter()
+
+    def failed(self, error):
+        self._record(None, 0, 0, None, type(error).__name__)
+
+    def wrap(self, response):
+        retries = response.extensions.get("retries", 0)
+        keep_body = "/runs" in self.endpoint
+        response.stream = _RecordingStream(
+            response.stream,
+            lambda received, body: self._record(response.status_code, retries, received, body, None),
+            keep_body
+        )
+        return response
+
+    def _record(self, status, retries, received, body, error):
+        entry = {
+            "method": self.request.method,
+            "endpoint": self.endpoint,
+            "path": self.request.url.path,
+            "status": status,
+            "start_time_ns": self.start_time_ns,
+            "duration": time.perf_counter() - self.started,
+            "retries": retries,
+            "bytes_sent": int(self.request.headers.get("content-length") or 0),
+            "bytes_received": received,
+            "error": error,
+            "span_id": secrets.token_hex(8),
+            "run_queue_seconds": None,
+            "run_execution_seconds": None,
+        }
+        run = _last_run_object(body) if body else None
+        timing = run_timing(run) if run is not None else None
+        if timing is not None and self.instrumentation.claim_run(run["id"]):
+            entry["run_queue_seconds"], entry["run_execution_seconds"] = timing
+        self.instrumentation.record(entry)
+
+
+class InstrumentedTransport(httpx.BaseTransport):
+    """
+    httpx transport that records every request made through it with an Instrumentation.
+
+    It wraps the outermost transport, so a call is recorded once however often a
+    RateLimitedTransport beneath it retried the request, and its latency includes any time spent
+    waiting for the rate limiter. The call is recorded when its response body is closed, so a
+    streamed run's latency covers the whole stream.
+    """
+    def __init__(self, transport, instrumentation):
+        """
+        Wraps a transport.
+
+        Parameters:
+        transport (httpx.BaseTransport): The transport that performs the requests.
+        instrumentation (Instrumentation): Where the calls are recorded.
+        """
+        self.transport = transport
+        self.instrumentation = instrumentation
+
+    def handle_request(self, request):
+        if not self.instrumentation.enabled:
+            return self.transport.handle_request(request)
+        call = _InstrumentedCall(self.instrumentation, request)
+        try:
+            response = self.transport.handle_request(request)
+        except Exception as e:
+            call.failed(e)
+            raise
+        return call.wrap(response)
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncInstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    Async counterpart of InstrumentedTransport, for clients created by initiate_async_client.
+    """
+    def __init__(self, transport, instrumentation):
+        """
+        Wraps an async transport.
+
+        Parameters:
+        transport (httpx.AsyncBaseTransport): The transport that performs the requests.
+        instrumentation (Instrumentation): Where the calls are recorded.
+        """
+        self.transport = transport
+        self.instrumentation = instrumentation
+
+    async def handle_async_request(self, request):
+        if not self.instrumentation.enabled:
+            return await self.transport.handle_async_request(request)
+        call = _InstrumentedCall(self.instrumentation, request)
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception as e:
+            call.failed(e)
+            raise
+        return call.wrap(response)
+
+    async def aclose(self):
+        await self.transport.aclose()
@@ -0,0 +1,42 @@
+# ./chat_bot/local_state.py
+
+import hashlib
+import os
+
+# Directory holding the local caches and indexes; override with GPT4_ASSISTANT_STATE_DIR.
+STATE_DIR = os.environ.get(
+    "GPT4_ASSISTANT_STATE_DIR",
+    os.path.join(os.path.expanduser("~"), ".gpt4_turbo_assistant")
+)
+
+
+def state_path(file_name):
+    """
+    Returns the path of a file inside the local state directory, creating the directory if needed.
+
+    Parameters:
+    file_name (str): The name of the state file.
+
+    Returns:
+    str: The absolute path of the state file.
+    """
+    os.makedirs(STATE_DIR, exist_ok=True)
+    return os.path.join(STATE_DIR, file_name)
+
+
+def account_key(client):
+    """
+    Returns a short key for the API endpoint and account a client talks to.
+
+    State describing remote objects, such as uploaded file IDs, is only valid for the endpoint
+    and account that created them, so its file names include this key. The API key is hashed
+    and never written to disk.
+
+    Parameters:
+    client: OpenAI client instance.
+
+    Returns:
+    str: A 16 character hexadecimal key.
+    """
+    identity = f"{client.base_url}:{client.api_key}:{client.organization or ''}"
+    return hashlib.sha1(identity.encode()).hexdigest()[:16]
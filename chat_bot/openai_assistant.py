@@ -1,8 +1,37 @@
 # ./chat_bot/openai_assistant.py
-from chat_bot.utility import new_assistant, select_file_for_upload, initiate_client
+import os
+import time
+from chat_bot.utility import new_assistant, initiate_client, get_all_files_in_path
+from chat_bot.file_index import search_file_for_upload
+from chat_bot.context_budget import context_budget_from_environment
+from chat_bot.response_cache import response_cache_from_environment
+from chat_bot.instrumentation import instrumentation_from_environment
+from chat_bot.rate_limiter import RateLimitScheduler
 from chat_bot.file_manager import FileManager
+from chat_bot.upload_cache import UploadCache
+from chat_bot.file_list_cache import FileListCache
+from chat_bot.local_state import account_key
 from chat_bot.assistant_manager import AssistantManager
 from chat_bot.thread_manager import ThreadManager
+from chat_bot.thread_registry import ThreadRegistry, message_entry, print_search_results
+from chat_bot.directory_sync import DirectorySync, print_sync_summary
+
+
+def create_file_manager(client, response_cache=None):
+    """
+    Creates the FileManager used by the CLI, backed by the local upload and file list caches
+    of the client's endpoint and account.
+
+    Parameters:
+    client: OpenAI client instance used for file operations.
+    response_cache (ResponseCache, optional): Cached replies that used a deleted file are dropped from it.
+
+    Returns:
+    FileManager: A file manager sharing the on-disk caches with other CLI sessions.
+    """
+    key = account_key(client)
+    return FileManager(client, upload_cache=UploadCache(account_key=key), list_cache=FileListCache(account_key=key),
+                       response_cache=response_cache)
 
 
 def create_assistant(client, new_assistant=new_assistant):
@@ -26,18 +55,75 @@ def create_assistant(client, new_assistant=new_assistant):
     )
 
 
-def chat_with_assistant(thread_manager):
+def print_transcript(entries):
+    """
+    Prints transcript entries as a conversation.
+
+    Parameters:
+    entries (list): Transcript entries as stored by the ThreadRegistry, oldest first.
+
+    Returns:
+    None
+    """
+    for entry in entries:
+        speaker = "You" if entry["role"] == "user" else "Assistant"
+        print(f"{speaker}: {entry['content'].rstrip()}")
+
+
+def chose_conversation(registry, assistant_id, limit=10):
+    """
+    Offers the assistant's recent conversations to continue.
+
+    Parameters:
+    registry (ThreadRegistry): The registry of local conversations.
+    assistant_id (str): The ID of the assistant.
+    limit (int, optional): The number of recent conversations listed. Defaults to 10.
+
+    Returns:
+    str: The ID of the thread to continue, or None to start a new conversation.
+    """
+    threads = registry.list_threads(assistant_id, limit=limit)
+    if not threads:
+        return None
+
+    print("\nConversations")
+    print("-------------")
+    for index, thread in enumerate(threads, start=1):
+        last_activity = time.strftime("%Y-%m-%d %H:%M", time.localtime(thread["last_activity"]))
+        print(f"{index}. {thread['title'] or 'Untitled'} ({thread['message_count']} messages, {last_activity})")
+    print("0. Start a new conversation.")
+    print("-------------")
+
+    choice = input("Choose a conversation to continue or '0' for a new one: ")
+    try:
+        thread_index = int(choice) - 1
+    except ValueError:
+        thread_index = -1
+    if 0 <= thread_index < len(threads):
+        return threads[thread_index]["thread_id"]
+    if choice != '0':
+        print("Invalid choice, starting a new conversation.")
+    return None
+
+
+def chat_with_assistant(thread_manager, thread_id=None):
     """
     Facilitates a chat interaction with an assistant using the provided thread manager.
 
     Parameters:
     thread_manager (ThreadManager): An instance of ThreadManager to handle the chat thread.
+    thread_id (str, optional): An existing thread to continue. Defaults to starting a new one.
 
     Returns:
     None
     """
     print("Welcome to the Assistant Chat!")
-    thread_manager.create_thread()
+    if thread_id is None:
+        thread_manager.create_thread()
+    else:
+        # Show the cached conversation at once, then only what was added since it was stored
+        print_transcript(thread_manager.resume_thread(thread_id))
+        print_transcript([message_entry(message) for message in thread_manager.retrieve_messages()])
 
     while True:  # Main chat loop
         message_files = []
@@ -46,7 +132,7 @@ def chat_with_assistant(thread_manager):
         while True:
             action = input("1. Add a file\n2. Continue to add your message\nChoose an option: ")
             if action == "1":
-                file_id = chose_and_upload_file(client, file_path='context_update')
+                file_id = chose_and_upload_file(thread_manager.client, file_path='context_update')
                 if file_id is not None:
                     message_files.append(file_id)
                     print(f"File uploaded successfully with ID: {file_id}")
@@ -72,7 +158,7 @@ def chat_with_assistant(thread_manager):
                     break
 
         if user_message.strip():
-            thread_manager.add_message_and_wait_for_reply(user_message, message_files)
+            thread_manager.add_message_and_stream_reply(user_message, message_files)
         else:
             print("No message entered.")
 
@@ -91,43 +177,109 @@ def chose_and_upload_file(client, file_path='context_update'):
     Returns:
     str: The ID of the uploaded file, or None if the operation is unsuccessful or canceled.
     """
-    file_manager = FileManager(client)
-    chosen_file_path = select_file_for_upload(file_path)
+    file_manager = create_file_manager(client)
+    chosen_file_path = search_file_for_upload(file_path)
     if chosen_file_path:
-        print("Select the purpose of the file:")
-        print("1. Fine-tune")
-        print("2. Assistants")
-        print("3. Fine-tune results")
-        print("4. Assistants output")
-        purpose_choice = input("Enter the number for the purpose (1, 2, 3 or 4):")
-        if purpose_choice == "1":
-            purpose = "fine-tune"
-        elif purpose_choice == "2":
-            purpose = "assistants"
-        elif purpose_choice == "3":
-            purpose = "fine-tune-results"
-        elif purpose_choice == "4":
-            purpose = "assistants_output"
-        else:
-            print("Invalid option.")
+        purpose = chose_file_purpose()
+        if purpose is None:
             return
         file_id = file_manager.create(chosen_file_path, purpose)
         print(f"File uploaded successfully with ID: {file_id}")
         return file_id
 
 
+def chose_file_purpose():
+    """
+    Asks the user for the purpose of the files being uploaded.
+
+    Returns:
+    str: The selected purpose, or None if the choice is invalid.
+    """
+    print("Select the purpose of the file:")
+    print("1. Fine-tune")
+    print("2. Assistants")
+    print("3. Fine-tune results")
+    print("4. Assistants output")
+    purpose_choice = input("Enter the number for the purpose (1, 2, 3 or 4):")
+    if purpose_choice == "1":
+        return "fine-tune"
+    elif purpose_choice == "2":
+        return "assistants"
+    elif purpose_choice == "3":
+        return "fine-tune-results"
+    elif purpose_choice == "4":
+        return "assistants_output"
+    print("Invalid option.")
+    return None
+
+
+def upload_directory(client, file_path='context_update'):
+    """
+    Uploads every file in a directory concurrently.
+
+    Parameters:
+    client: OpenAI client instance used for file operations.
+    file_path (str, optional): The default directory offered to the user. Defaults to 'context_update'.
+
+    Returns:
+    list: The per-file upload results, or None if the operation is canceled.
+    """
+    directory = input(f"Enter the directory to upload (press Enter for '{file_path}'): ").strip() or file_path
+    if not os.path.isdir(directory):
+        print(f"'{directory}' is not a directory.")
+        return None
+    file_paths = get_all_files_in_path(directory)
+    if not file_paths:
+        print("No files found.")
+        return None
+    purpose = chose_file_purpose()
+    if purpose is None:
+        return None
+    return create_file_manager(client).create_many(file_paths, purpose)
+
+
+def parse_selection(selection, count):
+    """
+    Parses a selection of list numbers such as "1,3,5-7".
+
+    Parameters:
+    selection (str): Comma-separated numbers and ranges, counted from 1.
+    count (int): The number of entries in the list.
+
+    Returns:
+    list: The selected zero-based indexes in the order given, or None if the selection is invalid.
+    """
+    indexes = []
+    try:
+        for part in selection.split(','):
+            part = part.strip()
+            if '-' in part:
+                start, end = (int(bound) for bound in part.split('-', 1))
+                numbers = range(start, end + 1)
+            else:
+                numbers = [int(part)]
+            for number in numbers:
+                if not 1 <= number <= count:
+                    return None
+                if number - 1 not in indexes:
+                    indexes.append(number - 1)
+    except ValueError:
+        return None
+    return indexes or None
+
+
 def add_file_to_assistant(assistant_manager, assistant_id):
     """
-    Adds a file to the specified assistant.
+    Adds one or more files to the specified assistant.
 
     Parameters:
     assistant_manager (AssistantManager): An instance of AssistantManager to handle file addition.
-    assistant_id (str): The ID of the assistant to add the file to.
+    assistant_id (str): The ID of the assistant to add the files to.
 
     Returns:
     None
     """
-    file_manager = FileManager(client)
+    file_manager = assistant_manager.file_manager
     files = file_manager.list()
 
     print("Available Files:")
@@ -135,22 +287,61 @@ def add_file_to_assistant(assistant_manager, assistant_id):
     for index, (file_id, file_data) in enumerate(file_list, start=1):
         print(f"{index}. {file_data['filename']} (ID: {file_id})")
 
-    file_index = input("Select the number of the file you want to add or '0' to cancel: ")
-    if file_index == '0':
+    selection = input("Select the numbers of the files you want to add (e.g. 1,3,5-7) or '0' to cancel: ")
+    if selection.strip() == '0':
         print("Operation canceled.")
         return
 
+    indexes = parse_selection(selection, len(file_list))
+    if indexes is None:
+        print("Invalid selection. Please enter file numbers from the list.")
+        return
+
     try:
-        file_index = int(file_index) - 1
-        if 0 <= file_index < len(file_list):
-            file_id_to_add = file_list[file_index][0]
-            assistant_manager.add_file_to_assistant(assistant_id, file_id_to_add)
-            print("File added successfully.")
-            assistant_manager.print_assistant_details(assistant_id)
-        else:
-            print("Invalid file number.")
-    except ValueError:
-        print("Invalid input. Please enter a number.")
+        assistant_manager.add_files_to_assistant(assistant_id, [file_list[index][0] for index in indexes])
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    print("Files added successfully.")
+    assistant_manager.print_assistant_details(assistant_id)
+
+
+def remove_files_from_assistant(assistant_manager, assistant_id):
+    """
+    Detaches one or more files from the specified assistant.
+
+    Parameters:
+    assistant_manager (AssistantManager): An instance of AssistantManager to handle file removal.
+    assistant_id (str): The ID of the assistant to remove the files from.
+
+    Returns:
+    None
+    """
+    assistant = assistant_manager.load_assistant(assistant_id)
+    attached_file_ids = assistant.file_ids if assistant.file_ids is not None else []
+    if not attached_file_ids:
+        print("No files are associated with this assistant.")
+        return
+
+    files = assistant_manager.file_manager.list()
+    print("Attached Files:")
+    for index, file_id in enumerate(attached_file_ids, start=1):
+        filename = files.get(file_id, {}).get('filename', 'unknown')
+        print(f"{index}. {filename} (ID: {file_id})")
+
+    selection = input("Select the numbers of the files you want to remove (e.g. 1,3,5-7) or '0' to cancel: ")
+    if selection.strip() == '0':
+        print("Operation canceled.")
+        return
+
+    indexes = parse_selection(selection, len(attached_file_ids))
+    if indexes is None:
+        print("Invalid selection. Please enter file numbers from the list.")
+        return
+
+    assistant_manager.remove_files_from_assistant(assistant_id, [attached_file_ids[index] for index in indexes])
+    print("Files removed successfully.")
+    assistant_manager.print_assistant_details(assistant_id)
 
 
 def chose_assistant(assistant_manager, assistants):
@@ -159,15 +350,21 @@ def chose_assistant(assistant_manager, assistants):
 
     Parameters:
     assistant_manager (AssistantManager): An instance of AssistantManager for managing assistants.
-    assistants (list): A list of available assistants.
+    assistants (iterable): The available assistants; a lazy iterator is printed as its pages arrive.
 
     Returns:
     str: The ID of the selected assistant, or None if the operation is canceled.
     """
     print("\nSelect an Assistant")
     print("-------------------")
+    listed_assistants = []
     for index, assistant in enumerate(assistants, start=1):
         print(f"{index}. {assistant.name} (ID: {assistant.id})")
+        listed_assistants.append(assistant)
+    if not listed_assistants:
+        print("No assistants available.")
+        return None
+    assistants = listed_assistants
     print("0. Cancel - Return to the previous menu.")
     print("-------------------")
 
@@ -201,13 +398,15 @@ def chose_assistant_action():
     print("\nChoose an Action for the Assistant")
     print("------------------------------------")
     print("1. Chat - Chat with this assistant.")
-    print("2. Add File - Add a file to this assistant.")
+    print("2. Add Files - Add one or more files to this assistant.")
     print("3. Update - Update this assistant's parameters.")
     print("4. Delete - Delete this assistant.")
     print("5. Check Files - Cleanup assistant files that are not available.")
+    print("6. Remove Files - Detach one or more files from this assistant.")
+    print("7. Sync Directory - Upload changes from a directory and attach them.")
     print("0. Cancel - Return to the previous menu.")
     print("------------------------------------")
-    action = input("Choose an option (0-5): ")
+    action = input("Choose an option (0-7): ")
     return action
 
 
@@ -221,14 +420,10 @@ def manage_assistants(client):
     Returns:
     None
     """
-    assistant_manager = AssistantManager(client)
-    assistants = assistant_manager.list_assistants().data
-
-    if not assistants:
-        print("No assistants available.")
-        return
-
-    assistant_id = chose_assistant(assistant_manager, assistants)
+    response_cache = response_cache_from_environment()
+    file_manager = create_file_manager(client, response_cache=response_cache)
+    assistant_manager = AssistantManager(client, file_manager=file_manager, response_cache=response_cache)
+    assistant_id = chose_assistant(assistant_manager, assistant_manager.iter_assistants())
 
     if assistant_id is None:
         return
@@ -236,8 +431,11 @@ def manage_assistants(client):
     action = chose_assistant_action()
     if action == '1':
         # Chat with assistant
-        thread_manager = ThreadManager(client, assistant_id)
-        chat_with_assistant(thread_manager)
+        thread_manager = ThreadManager(client, assistant_id, registry=ThreadRegistry(),
+                                       context_budget=context_budget_from_environment(),
+                                       response_cache=response_cache)
+        thread_id = chose_conversation(thread_manager.registry, assistant_id)
+        chat_with_assistant(thread_manager, thread_id)
     elif action == '2':
         # Add file to assistant
         assistant_manager.clean_missing_files_from_assistant(assistant_id)
@@ -255,6 +453,17 @@ def manage_assistants(client):
     elif action == '5':
         assistant_manager.clean_missing_files_from_assistant(assistant_id)
     elif action == '6':
+        remove_files_from_assistant(assistant_manager, assistant_id)
+    elif action == '7':
+        directory = input("Enter the directory to sync (press Enter for 'context_update'): ").strip() or 'context_update'
+        if not os.path.isdir(directory):
+            print(f"'{directory}' is not a directory.")
+            return
+        try:
+            print_sync_summary(DirectorySync(assistant_manager).sync(directory, assistant_id))
+        except ValueError as e:
+            print(f"Error: {e}")
+    elif action == '0':
         # exit menu
         print("Operation canceled.")
     else:
@@ -271,25 +480,28 @@ def manage_files(client):
     Returns:
     None
     """
-    file_manager = FileManager(client)
+    file_manager = create_file_manager(client, response_cache=response_cache_from_environment())
 
     while True:
-        files = file_manager.list()
         print("\nFile Management Menu")
         print("----------------------")
         print("1. List Files - Display available files.")
         print("2. Delete File - Remove a specific file.")
         print("3. Upload File - Add a new file.")
+        print("4. Upload Directory - Upload every file in a directory at once.")
+        print("5. Refresh - Reload the file list from the server.")
         print("0. Cancel - Return to the previous menu.")
         print("----------------------")
 
-        choice = input("Select an option (0-3): ")
+        choice = input("Select an option (0-5): ")
 
         if choice == '1':
+            files = file_manager.list()
             print("Available Files:")
             for file_id, file_data in files.items():
                 print(f"ID: {file_id}, Filename: {file_data['filename']}, Purpose: {file_data['purpose']}")
         elif choice == '2':
+            files = file_manager.list()
             if not files:
                 print("No files available to delete.")
                 continue
@@ -316,6 +528,11 @@ def manage_files(client):
         elif choice == '3':
             file_id = chose_and_upload_file(client)
             print(f"File uploaded: ID {file_id}")
+        elif choice == '4':
+            upload_directory(client)
+        elif choice == '5':
+            files = file_manager.list(refresh=True)
+            print(f"File list refreshed: {len(files)} files.")
         elif choice == '0':
             print("Exiting File Management Menu.")
             break
@@ -339,10 +556,11 @@ def user_interaction(client):
         print("1. Manage Files - Handle file-related operations.")
         print("2. Manage Assistants - View, modify, or delete assistants.")
         print("3. Create a New Assistant - Start the process of creating a new assistant.")
+        print("4. Search Conversations - Find messages in earlier conversations.")
         print("0. Exit - Exit the user interaction menu.")
         print("--------------------------------")
 
-        choice = input("Enter your choice (0-3): ")
+        choice = input("Enter your choice (0-4): ")
         if choice == '1':
             manage_files(client)
         elif choice == '2':
@@ -350,6 +568,10 @@ def user_interaction(client):
         elif choice == '3':
             created_assistant = create_assistant(client, new_assistant)
             print(f"New assistant created with ID: {created_assistant.id}")
+        elif choice == '4':
+            query = input("Enter the words to search for: ").strip()
+            if query:
+                print_search_results(ThreadRegistry().search(query))
         elif choice == '0':
             print("Exiting user interaction menu.")
             break
@@ -358,5 +580,6 @@ def user_interaction(client):
 
 
 if __name__ == "__main__":
-    client = initiate_client()
+    client = initiate_client(warm_up=True, rate_limiter=RateLimitScheduler(),
+                             instrumentation=instrumentation_from_environment())
     user_interaction(client)
@@ -0,0 +1,107 @@
+# ./chat_bot/pagination.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+def iterate_pages(fetch_page, page_size=20, prefetch=True):
+    """
+    Lazily yields the items of a cursor-paginated listing, one page at a time.
+
+    The cursor is the ID of the last item of the previous page. With prefetching, the next
+    page is requested in a background thread while the current one is being consumed, so at
+    most two pages are held in memory. A page that starts with an item already yielded means
+    the server ignored or restarted at the cursor, and ends the listing.
+
+    Parameters:
+    fetch_page (callable): Called as fetch_page(after, limit); returns the list of items on that page.
+        `after` is None for the first page.
+    page_size (int): The number of items requested per page.
+    prefetch (bool): Whether to fetch the next page ahead of time.
+
+    Yields:
+    The items of every page, in order.
+    """
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        page = fetch_page(None, page_size)
+        seen_ids = set()
+        while page and page[0].id not in seen_ids:
+            # A short page is the last one; an oversized page means the server ignored the cursor.
+            last_page = len(page) != page_size
+            next_page = None
+            if not last_page and executor is not None:
+                next_page = executor.submit(fetch_page, page[-1].id, page_size)
+
+            seen_ids.update(item.id for item in page)
+            yield from page
+
+            if last_page:
+                return
+            page = next_page.result() if next_page is not None else fetch_page(page[-1].id, page_size)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+async def iterate_pages_async(fetch_page, page_size=20):
+    """
+    Async counterpart of iterate_pages, without prefetching.
+
+    Parameters:
+    fetch_page (callable): Coroutine function called as fetch_page(after, limit); returns the list of items on that page.
+    page_size (int): The number of items requested per page.
+
+    Yields:
+    The items of every page, in order.
+    """
+    page = await fetch_page(None, page_size)
+    seen_ids = set()
+    while page and page[0].id not in seen_ids:
+        seen_ids.update(item.id for item in page)
+        for item in page:
+            yield item
+        if len(page) != page_size:
+            return
+        page = await fetch_page(page[-1].id, page_size)
+
+
+def collect_cursor_pages(page):
+    """
+    Returns the items of an SDK cursor page and of the pages after it.
+
+    Iterating a cursor page asks for another page whenever the last one was not empty, which
+    costs a round trip that usually comes back empty. The server's has_more flag is followed
+    instead, falling back to the SDK's own check when a response does not include it.
+
+    Parameters:
+    page (SyncCursorPage): The first page returned by a list call.
+
+    Returns:
+    list: The items of every page, in order.
+    """
+    items = []
+    while True:
+        items.extend(page.data)
+        has_more = getattr(page, "has_more", None)
+        if not page.data or not (page.has_next_page() if has_more is None else has_more):
+            return items
+        page = page.get_next_page()
+
+
+async def collect_cursor_pages_async(page):
+    """
+    Async counterpart of collect_cursor_pages for AsyncCursorPage objects.
+
+    Parameters:
+    page (AsyncCursorPage): The first page, awaited from a list call.
+
+    Returns:
+    list: The items of every page, in order.
+    """
+    items = []
+    while True:
+        items.extend(page.data)
+        has_more = getattr(page, "has_more", None)
+        if not page.data or not (page.has_next_page() if has_more is None else has_more):
+            return items
+        page = await page.get_next_page()
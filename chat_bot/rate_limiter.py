@@ -0,0 +1,401 @@
+# ./chat_bot/rate_limiter.py
+
+import random
+import re
+import threading
+import time
+import httpx
+
+# Status codes retried by the scheduler.
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# Streamed request bodies up to this size are read into memory so they can be retried.
+MAX_BUFFERED_BODY_SIZE = 1024 * 1024
+# Request header telling RateLimitedTransport not to retry a request its caller retries itself.
+# The transport removes it before the request is sent.
+NO_RETRY_HEADER = "x-chat-bot-no-transport-retry"
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+
+
+def endpoint_class(request):
+    """
+    Groups a request by the kind of API endpoint it calls.
+
+    Parameters:
+    request (httpx.Request): The outgoing request.
+
+    Returns:
+    str: One of 'runs', 'messages', 'threads', 'assistants', 'files' or 'other'.
+    """
+    path = request.url.path
+    for name in ("runs", "messages", "threads", "assistants", "files"):
+        if f"/{name}" in path:
+            return name
+    return "other"
+
+
+def is_replayable(request):
+    """
+    Tells whether a request's body can be sent again without holding a large upload in memory.
+
+    Parameters:
+    request (httpx.Request): The outgoing request.
+
+    Returns:
+    bool: True if the body is already in memory or small enough to buffer.
+    """
+    if isinstance(request.stream, httpx.ByteStream):
+        return True
+    content_length = header_int(request.headers, "content-length")
+    return content_length is not None and content_length <= MAX_BUFFERED_BODY_SIZE
+
+
+def header_int(headers, name):
+    """
+    Reads a header holding a whole number.
+
+    Parameters:
+    headers (httpx.Headers): The request or response headers.
+    name (str): The header name.
+
+    Returns:
+    int: The header's value, or None if it is missing or not a number.
+    """
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+def parse_reset_duration(value):
+    """
+    Parses a rate limit reset header such as '20ms', '1s' or '6m0s' into seconds.
+
+    Parameters:
+    value (str): The header value.
+
+    Returns:
+    float: The duration in seconds, or None if the value cannot be parsed.
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """
+    Token bucket handing out reservations, so waiting callers are served in arrival order.
+
+    The balance may go negative; each reservation returns how long its caller must wait.
+    """
+    def __init__(self, rate, capacity):
+        """
+        Initializes a full bucket.
+
+        Parameters:
+        rate (float): Tokens added per second.
+        capacity (float): The maximum number of tokens, i.e. the burst size.
+        """
+        self.lock = threading.Lock()
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self, cost=1.0):
+        """
+        Takes tokens from the bucket.
+
+        Parameters:
+        cost (float): The number of tokens to take.
+
+        Returns:
+        float: Seconds the caller must wait before using the reservation.
+        """
+        with self.lock:
+            now = self._refill()
+            wait = max(0.0, (cost - self.tokens) / self.rate, self.blocked_until - now)
+            self.tokens -= cost
+            return wait
+
+    def limit_balance(self, tokens):
+        """
+        Lowers the balance to a count reported by the server, keeping outstanding reservations.
+
+        Parameters:
+        tokens (float): The number of tokens the server says are left.
+        """
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, tokens)
+
+    def set_rate(self, rate):
+        """
+        Changes the refill rate, keeping the current balance.
+
+        Parameters:
+        rate (float): Tokens added per second.
+        """
+        with self.lock:
+            self._refill()
+            self.rate = rate
+
+    def pause_until(self, deadline):
+        """
+        Makes every reservation wait until the given time.
+
+        Parameters:
+        deadline (float): A time.monotonic() timestamp.
+        """
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, deadline)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return now
+
+
+class RateLimitScheduler:
+    """
+    Paces API requests per endpoint class and retries throttled or failed ones.
+
+    Requests queue on a token bucket per endpoint class instead of failing. The x-ratelimit
+    response headers adjust the pace: the bucket's rate follows the remaining request budget
+    over its reset window, and an exhausted request budget pauses the class until the window
+    resets. The token budget is shared by the account, so it is kept in one more bucket whose
+    rate and balance follow the x-ratelimit-*-tokens headers; requests to endpoint classes that
+    report it reserve their estimated token cost from it before they are sent. The cost is
+    not known up front, so it is estimated from how far the remaining budget drops between
+    responses. 429 and 5xx responses are retried with jittered backoff, honouring retry-after
+    headers.
+    """
+    def __init__(self, requests_per_second=8.0, burst=8, min_rate=0.5, max_retries=4, base_delay=0.5, max_delay=30.0):
+        """
+        Initializes the scheduler.
+
+        Parameters:
+        requests_per_second (float): The starting rate for every endpoint class.
+        burst (int): The number of requests a class may send back to back.
+        min_rate (float): The lowest rate header feedback may lower a class to.
+        max_retries (int): How many times a 429 or 5xx response is retried.
+        base_delay (float): The first retry delay in seconds, doubled on each attempt.
+        max_delay (float): The upper bound for a retry delay in seconds.
+        """
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.stats = {}
+        # Created when a response first reports the token budget
+        self.token_bucket = None
+        self.token_costs = {}
+        self.remaining_tokens = None
+
+    def acquire(self, endpoint):
+        """
+        Waits until a request to the endpoint class may be sent.
+
+        Parameters:
+        endpoint (str): The endpoint class, as returned by endpoint_class.
+
+        Returns:
+        float: The number of seconds spent waiting.
+        """
+        bucket, stats = self._bucket(endpoint)
+        with self.lock:
+            stats["queue_depth"] += 1
+        wait = bucket.reserve()
+        with self.lock:
+            token_bucket, token_cost = self.token_bucket, self.token_costs.get(endpoint)
+        if token_bucket is not None and token_cost:
+            wait = max(wait, token_bucket.reserve(token_cost))
+        if wait > 0:
+            time.sleep(wait)
+        with self.lock:
+            stats["queue_depth"] -= 1
+            stats["requests"] += 1
+            stats["wait_seconds"] += wait
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait)
+        return wait
+
+    def observe(self, endpoint, response):
+        """
+        Adjusts the endpoint class's pace from a response's rate limit headers.
+
+        Parameters:
+        endpoint (str): The endpoint class of the request.
+        response (httpx.Response): The response received.
+        """
+        bucket, stats = self._bucket(endpoint)
+        headers = response.headers
+        now = time.monotonic()
+
+        remaining_requests = header_int(headers, "x-ratelimit-remaining-requests")
+        reset_requests = parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+        if remaining_requests is not None and reset_requests is not None:
+            if remaining_requests <= 0:
+                bucket.pause_until(now + reset_requests)
+            elif reset_requests > 0:
+                bucket.set_rate(max(self.min_rate, remaining_requests / reset_requests))
+
+        remaining_tokens = header_int(headers, "x-ratelimit-remaining-tokens")
+        reset_tokens = parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+        if remaining_tokens is not None and reset_tokens is not None:
+            self._observe_tokens(endpoint, remaining_tokens, reset_tokens,
+                                 header_int(headers, "x-ratelimit-limit-tokens"), now)
+
+        if response.status_code == 429:
+            with self.lock:
+                stats["throttled"] += 1
+
+    def retry_delay(self, attempt, response):
+        """
+        Returns how long to wait before retrying a failed request.
+
+        Parameters:
+        attempt (int): The number of retries already made.
+        response (httpx.Response): The failed response.
+
+        Returns:
+        float: The delay in seconds.
+        """
+        retry_after_ms = response.headers.get("retry-after-ms")
+        retry_after = response.headers.get("retry-after")
+        try:
+            if retry_after_ms is not None:
+                return min(self.max_delay, float(retry_after_ms) / 1000)
+            if retry_after is not None:
+                return min(self.max_delay, float(retry_after))
+        except ValueError:
+            pass
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _observe_tokens(self, endpoint, remaining, reset, limit, now):
+        with self.lock:
+            if self.token_bucket is None:
+                self.token_bucket = TokenBucket(1.0, max(limit or remaining, 1))
+            token_bucket = self.token_bucket
+            if self.remaining_tokens is not None and remaining < self.remaining_tokens:
+                # The drop since the previous response is this request's cost, less any refill
+                used = self.remaining_tokens - remaining
+                previous = self.token_costs.get(endpoint)
+                self.token_costs[endpoint] = used if previous is None else (previous + used) / 2
+            self.remaining_tokens = remaining
+        token_bucket.limit_balance(remaining)
+        if remaining <= 0:
+            token_bucket.pause_until(now + reset)
+        elif reset > 0:
+            token_bucket.set_rate(max(self.min_rate, remaining / reset))
+
+    def record_retry(self, endpoint):
+        """
+        Counts a retried request for the endpoint class.
+
+        Parameters:
+        endpoint (str): The endpoint class of the request.
+        """
+        _, stats = self._bucket(endpoint)
+        with self.lock:
+            stats["retries"] += 1
+
+    def metrics(self):
+        """
+        Returns a snapshot of the scheduler's counters per endpoint class.
+
+        Returns:
+        dict: Per class: queue_depth, requests, retries, throttled, wait_seconds,
+        max_wait_seconds, mean_wait_seconds, the current rate and the estimated tokens per
+        request (None until the token budget has been seen to drop).
+        """
+        with self.lock:
+            snapshot = {}
+            for endpoint, stats in self.stats.items():
+                snapshot[endpoint] = dict(
+                    stats,
+                    mean_wait_seconds=stats["wait_seconds"] / stats["requests"] if stats["requests"] else 0.0,
+                    rate=self.buckets[endpoint].rate,
+                    tokens_per_request=self.token_costs.get(endpoint),
+                )
+            return snapshot
+
+    def _bucket(self, endpoint):
+        with self.lock:
+            if endpoint not in self.buckets:
+                self.buckets[endpoint] = TokenBucket(self.requests_per_second, self.burst)
+                self.stats[endpoint] = {"queue_depth": 0, "requests": 0, "retries": 0, "throttled": 0,
+                                        "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+            return self.buckets[endpoint], self.stats[endpoint]
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """
+    httpx transport that sends every request through a RateLimitScheduler.
+
+    It sits between the OpenAI client and the connection pool, so all managers using the
+    client are paced together. The client's own retries should be disabled when it is used.
+    Large streamed bodies, and requests carrying NO_RETRY_HEADER, are paced but sent only once;
+    FileManager.create_many marks its uploads that way because it retries them on its own.
+    """
+    def __init__(self, transport, scheduler):
+        """
+        Wraps a transport.
+
+        Parameters:
+        transport (httpx.BaseTransport): The transport that performs the requests.
+        scheduler (RateLimitScheduler): The scheduler pacing and retrying the requests.
+        """
+        self.transport = transport
+        self.scheduler = scheduler
+
+    def handle_request(self, request):
+        endpoint = endpoint_class(request)
+        max_retries = 0
+        retry = request.headers.pop(NO_RETRY_HEADER, None) is None
+        if retry and is_replayable(request):
+            # Buffer the body so a retried request can be sent again
+            request.read()
+            max_retries = self.scheduler.max_retries
+        attempt = 0
+        while True:
+            self.scheduler.acquire(endpoint)
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError:
+                # Connection failures are retried like the OpenAI client's own retries would
+                if attempt >= max_retries:
+                    raise
+                self.scheduler.record_retry(endpoint)
+                time.sleep(min(self.scheduler.max_delay, self.scheduler.base_delay * 2 ** attempt))
+                attempt += 1
+                continue
+            self.scheduler.observe(endpoint, response)
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= max_retries:
+                # Lets an instrumented transport above this one report the retries
+                response.extensions["retries"] = attempt
+                return response
+            delay = self.scheduler.retry_delay(attempt, response)
+            response.close()
+            self.scheduler.record_retry(endpoint)
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        self.transport.close()
@@ -0,0 +1,280 @@
+# ./chat_bot/response_cache.py
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from chat_bot.local_state import state_path
+
+# How long a cached reply is served, in seconds.
+DEFAULT_TTL = 7 * 24 * 3600
+# Replies kept on disk; the least recently used are dropped beyond this.
+DEFAULT_MAX_ENTRIES = 1000
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt):
+    """
+    Normalizes a prompt so that trivially different spellings of the same question match.
+
+    Unicode is normalized to NFC, runs of whitespace become a single space and the ends are
+    trimmed. Case and punctuation are kept, since they can change the answer.
+
+    Parameters:
+    prompt (str): The message typed by the user.
+
+    Returns:
+    str: The normalized prompt.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", prompt)).strip()
+
+
+def assistant_fingerprint(assistant):
+    """
+    Hashes the parts of an assistant that shape its answers: model, instructions, tools and files.
+
+    Parameters:
+    assistant (Assistant): The assistant object returned by the API.
+
+    Returns:
+    str: The hexadecimal SHA-256 digest of the assistant's configuration.
+    """
+    configuration = {
+        "model": assistant.model,
+        "instructions": assistant.instructions,
+        "tools": [tool.model_dump(mode="json") for tool in assistant.tools or []],
+        "file_ids": sorted(assistant.file_ids or []),
+    }
+    return hashlib.sha256(json.dumps(configuration, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def cache_key(assistant_id, fingerprint, prompt, file_ids):
+    """
+    Returns the key of a reply to a prompt sent with the given files to an assistant configuration.
+
+    Parameters:
+    assistant_id (str): The ID of the assistant.
+    fingerprint (str): The assistant's configuration digest (see assistant_fingerprint).
+    prompt (str): The message typed by the user.
+    file_ids (list): The IDs of the files attached to the message.
+
+    Returns:
+    str: The hexadecimal SHA-256 digest identifying the reply.
+    """
+    key = json.dumps([assistant_id, fingerprint, normalize_prompt(prompt), sorted(file_ids or [])])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent cache of assistant replies to the opening message of a conversation.
+
+    Replies are keyed on the assistant, a fingerprint of its model, instructions, tools and files,
+    the normalized prompt and the files attached to the message, so changing the assistant
+    changes the key. AssistantManager records each assistant's fingerprint as it sees it and
+    drops replies made under an older one; FileManager drops replies that used a deleted file.
+    Changes made outside this tool are only noticed once the assistant is listed or loaded
+    again, and every reply expires after the TTL. The cache is a SQLite database and is safe to
+    share between threads.
+    """
+    def __init__(self, db_path=None, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        """
+        Opens (and creates if needed) the response cache.
+
+        Parameters:
+        db_path (str, optional): Path of the SQLite database. Defaults to responses.sqlite in the local state directory.
+        max_entries (int): The number of replies kept; the least recently used are evicted beyond it.
+        ttl (float): Seconds after which a reply is no longer served.
+        """
+        self.db_path = db_path if db_path is not None else state_path("responses.sqlite")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS assistants ("
+                " assistant_id TEXT PRIMARY KEY,"
+                " fingerprint TEXT NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " cache_key TEXT PRIMARY KEY,"
+                " assistant_id TEXT NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " reply TEXT NOT NULL,"
+                " created_at REAL,"
+                " last_used REAL)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS responses_assistant ON responses (assistant_id)")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS response_files ("
+                " file_id TEXT NOT NULL, cache_key TEXT NOT NULL, PRIMARY KEY (file_id, cache_key)) WITHOUT ROWID"
+            )
+
+    def record_assistant(self, assistant):
+        """
+        Records an assistant's current configuration and drops replies made under any other.
+
+        Parameters:
+        assistant (Assistant): The assistant object returned by the API.
+
+        Returns:
+        str: The assistant's fingerprint.
+        """
+        fingerprint = assistant_fingerprint(assistant)
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT fingerprint FROM assistants WHERE assistant_id = ?", (assistant.id,)
+            ).fetchone()
+            if row is None or row[0] != fingerprint:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO assistants (assistant_id, fingerprint) VALUES (?, ?)",
+                    (assistant.id, fingerprint)
+                )
+                self._delete("assistant_id = ? AND fingerprint != ?", (assistant.id, fingerprint))
+        return fingerprint
+
+    def fingerprint(self, assistant_id):
+        """
+        Returns the last recorded fingerprint of an assistant.
+
+        Parameters:
+        assistant_id (str): The ID of the assistant.
+
+        Returns:
+        str: The fingerprint, or None if the assistant has not been recorded.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT fingerprint FROM assistants WHERE assistant_id = ?", (assistant_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get(self, assistant_id, prompt, file_ids):
+        """
+        Looks up the reply to a prompt under the assistant's recorded configuration.
+
+        Parameters:
+        assistant_id (str): The ID of the assistant.
+        prompt (str): The message typed by the user.
+        file_ids (list): The IDs of the files attached to the message.
+
+        Returns:
+        dict: The reply as stored by put, or None on a miss or if the assistant has not been recorded.
+        """
+        now = time.time()
+        with self.lock, self.connection:
+            fingerprint = self.connection.execute(
+                "SELECT fingerprint FROM assistants WHERE assistant_id = ?", (assistant_id,)
+            ).fetchone()
+            if fingerprint is None:
+                return None
+            key = cache_key(assistant_id, fingerprint[0], prompt, file_ids)
+            row = self.connection.execute(
+                "SELECT reply, created_at FROM responses WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._delete("cache_key = ?", (key,))
+                return None
+            self.connection.execute("UPDATE responses SET last_used = ? WHERE cache_key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, assistant_id, prompt, file_ids, reply):
+        """
+        Stores the reply to a prompt under the assistant's recorded configuration.
+
+        Nothing is stored for an assistant that has not been recorded. The least recently used
+        replies are evicted once the cache holds more than max_entries.
+
+        Parameters:
+        assistant_id (str): The ID of the assistant.
+        prompt (str): The message typed by the user.
+        file_ids (list): The IDs of the files attached to the message.
+        reply (dict): JSON-serializable reply, e.g. the dumped messages and run.
+        """
+        now = time.time()
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT fingerprint FROM assistants WHERE assistant_id = ?", (assistant_id,)
+            ).fetchone()
+            if row is None:
+                return
+            key = cache_key(assistant_id, row[0], prompt, file_ids)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (cache_key, assistant_id, fingerprint, reply, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, assistant_id, row[0], json.dumps(reply), now, now)
+            )
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO response_files (file_id, cache_key) VALUES (?, ?)",
+                [(file_id, key) for file_id in set(file_ids or [])]
+            )
+            self._delete(
+                "cache_key IN (SELECT cache_key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def forget_assistant(self, assistant_id):
+        """
+        Drops an assistant and every reply it made.
+
+        Parameters:
+        assistant_id (str): The ID of the assistant.
+        """
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM assistants WHERE assistant_id = ?", (assistant_id,))
+            self._delete("assistant_id = ?", (assistant_id,))
+
+    def forget_file(self, file_id):
+        """
+        Drops every reply to a message that had the file attached.
+
+        Replies that used the file through the assistant's own files are dropped when the
+        assistant's file list changes (see record_assistant).
+
+        Parameters:
+        file_id (str): The ID of the file.
+        """
+        with self.lock, self.connection:
+            self._delete("cache_key IN (SELECT cache_key FROM response_files WHERE file_id = ?)", (file_id,))
+
+    def clear(self):
+        """
+        Drops every cached reply.
+        """
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM response_files")
+            self.connection.execute("DELETE FROM responses")
+
+    def _delete(self, condition, parameters):
+        # Callers hold the lock and the transaction
+        keys = [(row[0],) for row in self.connection.execute(
+            f"SELECT cache_key FROM responses WHERE {condition}", parameters
+        )]
+        self.connection.executemany("DELETE FROM response_files WHERE cache_key = ?", keys)
+        self.connection.executemany("DELETE FROM responses WHERE cache_key = ?", keys)
+
+
+def response_cache_from_environment():
+    """
+    Creates the response cache when GPT4_ASSISTANT_RESPONSE_CACHE is set, or returns None.
+
+    The variable gives the number of replies kept, e.g. 1000. GPT4_ASSISTANT_RESPONSE_CACHE_TTL
+    sets the time to live in seconds, defaulting to one week.
+
+    Returns:
+    ResponseCache: The cache to pass to AssistantManager, FileManager and ThreadManager, or None when it is off.
+    """
+    max_entries = int(os.environ.get("GPT4_ASSISTANT_RESPONSE_CACHE", 0))
+    if max_entries <= 0:
+        return None
+    ttl = float(os.environ.get("GPT4_ASSISTANT_RESPONSE_CACHE_TTL", DEFAULT_TTL))
+    return ResponseCache(max_entries=max_entries, ttl=ttl)
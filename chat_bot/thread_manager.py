@@ -1,6 +1,48 @@
-# ./chat_bot/file_manager.py
+# ./chat_bot/thread_manager.py
 
 import time
+import uuid
+from openai.types.beta.threads import Message, Run
+from chat_bot.context_budget import SUMMARY_PREFIX
+from chat_bot.pagination import collect_cursor_pages
+from chat_bot.thread_registry import message_entry, message_text
+from chat_bot.wait_strategy import (BackoffWaitStrategy, CANCEL_TIMEOUT, STOP_RUN_STATUSES, TERMINAL_RUN_STATUSES,
+                                    poll_delays)
+
+# Heading of the exchanges answered from the response cache, sent to the thread ahead of the next message.
+CACHED_EXCHANGES_PREFIX = "Earlier in this conversation:\n"
+# Stream events of a run that stopped without producing a reply.
+UNFINISHED_RUN_EVENTS = ("thread.run.failed", "thread.run.cancelled", "thread.run.expired",
+                         "thread.run.requires_action")
+
+
+def read_stream_event(event):
+    """
+    Interprets one server-sent event of a streamed run.
+
+    ThreadManager and AsyncThreadManager both handle their streams with it.
+
+    Parameters:
+    event: An event yielded by a run created with stream=True.
+
+    Returns:
+    tuple: (kind, value), where kind is 'text' with the list of text fragments of a message delta,
+    'message' with the completed Message, 'run' with the Run whose status changed, 'unfinished'
+    with the Run that stopped without a reply, 'error' with the error message, or None for
+    events that need no handling.
+    """
+    if event.event == "thread.message.delta":
+        return "text", [block.text.value for block in event.data.delta.content or []
+                        if block.type == "text" and block.text is not None and block.text.value]
+    if event.event == "thread.message.completed":
+        return "message", event.data
+    if event.event in UNFINISHED_RUN_EVENTS:
+        return "unfinished", event.data
+    if event.event.startswith("thread.run.") and not event.event.startswith("thread.run.step."):
+        return "run", event.data
+    if event.event == "error":
+        return "error", event.data.message
+    return None, None
 
 
 class ThreadManager:
@@ -14,29 +56,93 @@ class ThreadManager:
     Attributes:
     client (OpenAI_Client): An instance of the client used for handling thread operations.
     """
-    def __init__(self, client, assistant_id):
+    def __init__(self, client, assistant_id, wait_strategy=None, registry=None, context_budget=None,
+                 response_cache=None):
         """
         Initializes the ThreadManager with a client to manage threads.
 
         Parameters:
         client (OpenAI_Client): The client object used for thread operations.
+        assistant_id (str): The ID of the assistant that answers in the threads.
+        wait_strategy (optional): Polling schedule used while waiting for runs. Defaults to BackoffWaitStrategy.
+        registry (ThreadRegistry, optional): Records the threads and caches every message sent or retrieved.
+        context_budget (ContextBudget, optional): When set, a thread that grows past the budget is summarized
+            and the conversation continues in a new thread that starts from the summary.
+        response_cache (ResponseCache, optional): Answers the opening message of a new thread from earlier
+            replies to the same question, without a run, and stores the replies it has to wait for.
         """
         self.client = client
         self.assistant_id = assistant_id
         self.thread_id = None
+        self.last_message_id = None
+        self.last_run = None
+        self.wait_strategy = wait_strategy if wait_strategy is not None else BackoffWaitStrategy()
+        self.registry = registry
+        self.context_budget = context_budget
+        self.context_tokens = 0
+        self.response_cache = response_cache
+        self.fresh_thread = False
+        self.pending_exchanges = []
+        self.last_reply_cached = False
+        self.last_stream_error = None
 
-    def create_thread(self):
+    def create_thread(self, parent_thread_id=None):
         """
         Creates a new thread with the specified thread ID.
 
         Parameters:
-        thread_id (str): The identifier for the new thread.
+        parent_thread_id (str, optional): The thread the new one continues, recorded in the registry.
 
         Returns:
         None
         """
         thread = self.client.beta.threads.create()
         self.thread_id = thread.id
+        self.last_message_id = None
+        self.context_tokens = 0
+        self.fresh_thread = True
+        self.pending_exchanges = []
+        if self.registry is not None:
+            self.registry.register_thread(thread.id, self.assistant_id, parent_thread_id=parent_thread_id)
+
+    def resume_thread(self, thread_id):
+        """
+        Makes an existing thread the current one.
+
+        With a registry, the cached transcript is returned without any API call and the cursor
+        is set to the last stored message, so retrieve_messages then fetches only newer ones.
+        Without a registry, retrieve_messages fetches the whole thread.
+
+        Parameters:
+        thread_id (str): The ID of the thread to continue.
+
+        Returns:
+        list: The cached transcript entries of the conversation, including the threads it rolled
+        over from, oldest first; empty without a registry.
+        """
+        self.thread_id = thread_id
+        self.last_message_id = None
+        self.context_tokens = 0
+        self.fresh_thread = False
+        self.pending_exchanges = []
+        if self.registry is None:
+            return []
+        thread = self.registry.get_thread(thread_id)
+        if thread is not None:
+            self.last_message_id = thread["last_message_id"]
+        self.registry.register_thread(thread_id, self.assistant_id)
+        transcript = []
+        for lineage_thread_id in self.registry.lineage(thread_id):
+            entries = self.registry.transcript(lineage_thread_id)
+            # A continued thread opens with the summary already shown as the previous thread's last reply
+            if transcript and entries and entries[0]["content"].startswith(SUMMARY_PREFIX):
+                transcript.extend(entries[1:])
+            else:
+                transcript.extend(entries)
+        if self.context_budget is not None:
+            # Only the current thread is in the model's context
+            self.context_tokens = sum(self.context_budget.count_message(entry["content"]) for entry in entries)
+        return transcript
 
     def add_message_and_wait_for_reply(self, user_message, message_files):
         """
@@ -48,15 +154,16 @@ class ThreadManager:
         message_files (list): List of file IDs associated with the message.
 
         Returns:
-        list: A list of messages constituting the conversation thread.
+        list: The assistant messages produced by this run, or None if the run did not complete.
         """
-        # Add the user's message to the thread
-        self.client.beta.threads.messages.create(
-            thread_id=self.thread_id,
-            role="user",
-            content=user_message,
-            file_ids=message_files
-        )
+        cached = self.cached_reply(user_message, message_files)
+        if cached is not None:
+            self.display_messages(cached)
+            return cached
+        opening = self.opens_fresh_thread()
+
+        # Add the user's message to the thread; replies are fetched from after it
+        self.add_user_message(user_message, message_files)
 
         # Request the assistant to process the message
         run = self.client.beta.threads.runs.create(
@@ -65,15 +172,287 @@ class ThreadManager:
         )
 
         # Wait for a response from the assistant
-        run_status = self.check_run_status(run.id)
-        while run_status.status != "completed":
-            print("Waiting for assistant...")
-            time.sleep(2)
-            run_status = self.check_run_status(run.id)
+        print("Waiting for assistant...")
+        run = self.wait_for_run(run)
+        self.last_run = run
+        if run.status != "completed":
+            self.report_unfinished_run(run)
+            return None
 
-        # Retrieve and display the messages
+        # Retrieve and display only the replies from this run
         messages = self.retrieve_messages()
-        self.display_messages(messages)
+        replies = [message for message in messages if message.role == "assistant" and message.run_id == run.id]
+        self.display_messages(replies)
+        if opening:
+            self.cache_reply(user_message, message_files, replies)
+        self.roll_over_if_needed()
+        return replies
+
+    def stream_reply(self, user_message, message_files):
+        """
+        Adds a message to the thread and streams the assistant's reply as it is generated.
+
+        The run is created with server-sent events, so no polling is involved. Use
+        `yield from` (or catch StopIteration) to obtain the final message. The context
+        budget is not checked here; call roll_over_if_needed once the reply is consumed.
+
+        Parameters:
+        user_message (str): The message from the user to add to the thread.
+        message_files (list): List of file IDs associated with the message.
+
+        Yields:
+        str: Fragments of the assistant's reply text, in order of arrival.
+
+        Returns:
+        Message: The completed assistant message, or None if the run did not complete. When the
+        stream broke off with an error event, its message is left in `last_stream_error`.
+        """
+        self.last_stream_error = None
+        cached = self.cached_reply(user_message, message_files)
+        if cached is not None:
+            for message in cached:
+                yield message_text(message)
+            return cached[-1]
+        opening = self.opens_fresh_thread()
+        self.add_user_message(user_message, message_files)
+
+        stream = self.client.beta.threads.runs.create(
+            thread_id=self.thread_id,
+            assistant_id=self.assistant_id,
+            stream=True
+        )
+
+        final_message = None
+        with stream:
+            for event in stream:
+                kind, value = read_stream_event(event)
+                if kind in ("run", "unfinished"):
+                    self.last_run = value
+                if kind == "text":
+                    yield from value
+                elif kind == "message":
+                    final_message = value
+                    self.last_message_id = final_message.id
+                    self.remember_messages([final_message])
+                elif kind == "unfinished":
+                    self.report_unfinished_run(value)
+                    return None
+                elif kind == "error":
+                    self.last_stream_error = value
+                    print(f"Stream error: {value}")
+                    return None
+        if opening and final_message is not None:
+            self.cache_reply(user_message, message_files, [final_message])
+        return final_message
+
+    def add_user_message(self, user_message, message_files):
+        """
+        Adds the user's message to the thread.
+
+        Exchanges answered from the response cache never reached the thread, so they are sent
+        first, as a message of their own, to keep the assistant's view of the conversation complete.
+        That message is not stored in the registry, which already holds the exchanges.
+
+        Parameters:
+        user_message (str): The message from the user to add to the thread.
+        message_files (list): List of file IDs associated with the message.
+
+        Returns:
+        Message: The created message.
+        """
+        if self.pending_exchanges:
+            earlier = "\n\n".join(f"User: {prompt}\nAssistant: {reply}" for prompt, _, reply in self.pending_exchanges)
+            file_ids = []
+            for _, pending_file_ids, _ in self.pending_exchanges:
+                file_ids.extend(file_id for file_id in pending_file_ids if file_id not in file_ids)
+            self.client.beta.threads.messages.create(
+                thread_id=self.thread_id,
+                role="user",
+                content=CACHED_EXCHANGES_PREFIX + earlier,
+                file_ids=file_ids
+            )
+            if self.context_budget is not None:
+                self.context_tokens += self.context_budget.count_message(CACHED_EXCHANGES_PREFIX + earlier)
+        message = self.client.beta.threads.messages.create(
+            thread_id=self.thread_id,
+            role="user",
+            content=user_message,
+            file_ids=message_files
+        )
+        self.last_message_id = message.id
+        self.fresh_thread = False
+        self.pending_exchanges = []
+        self.remember_messages([message])
+        return message
+
+    def opens_fresh_thread(self):
+        """
+        Returns True when the next message is the first of a new thread, the only one the response cache answers.
+        """
+        return self.response_cache is not None and self.fresh_thread and not self.pending_exchanges
+
+    def cached_reply(self, user_message, message_files):
+        """
+        Answers the opening message of a new thread from the response cache, without any run.
+
+        The assistant's configuration is retrieved once if the cache has not recorded it yet.
+        On a hit, last_run is the run that produced the cached reply. The exchange is stored in the
+        registry right away, under local message IDs, and sent to the thread before the next message.
+
+        Parameters:
+        user_message (str): The message from the user.
+        message_files (list): List of file IDs associated with the message.
+
+        Returns:
+        list: The cached assistant messages, or None on a miss or when the cache does not apply.
+        """
+        self.last_reply_cached = False
+        if not self.opens_fresh_thread():
+            return None
+        if self.response_cache.fingerprint(self.assistant_id) is None:
+            self.response_cache.record_assistant(self.client.beta.assistants.retrieve(self.assistant_id))
+        reply = self.response_cache.get(self.assistant_id, user_message, message_files)
+        if reply is None:
+            return None
+        messages = [Message.model_validate(message) for message in reply["messages"]]
+        self.last_run = Run.model_validate(reply["run"])
+        self.last_reply_cached = True
+        self.pending_exchanges.append(
+            (user_message, list(message_files), "\n".join(message_text(message) for message in messages))
+        )
+        self.remember_cached_exchange(user_message, message_files, messages)
+        return messages
+
+    def remember_cached_exchange(self, user_message, message_files, replies):
+        """
+        Stores an exchange answered from the response cache in the registry, if there is one.
+
+        The entries get local message IDs and no run, and do not move the thread's cursor, since
+        none of them exists in the thread.
+
+        Parameters:
+        user_message (str): The message from the user.
+        message_files (list): List of file IDs associated with the message.
+        replies (list): The cached assistant messages.
+
+        Returns:
+        None
+        """
+        if self.registry is None:
+            return
+        now = int(time.time())
+        entries = [{"message_id": f"cached_{uuid.uuid4().hex}", "role": "user", "content": user_message,
+                    "run_id": None, "file_ids": list(message_files), "created_at": now}]
+        for message in replies:
+            entries.append(dict(message_entry(message), message_id=f"cached_{uuid.uuid4().hex}", run_id=None,
+                                created_at=now))
+        self.registry.add_entries(self.thread_id, entries, move_cursor=False)
+
+    def cache_reply(self, user_message, message_files, replies):
+        """
+        Stores the reply to the opening message of a thread in the response cache.
+
+        Parameters:
+        user_message (str): The message from the user.
+        message_files (list): List of file IDs associated with the message.
+        replies (list): The assistant messages of the completed run.
+
+        Returns:
+        None
+        """
+        if self.response_cache is None or not replies or self.last_run is None:
+            return
+        self.response_cache.put(self.assistant_id, user_message, message_files, {
+            "messages": [message.model_dump(mode="json") for message in replies],
+            "run": self.last_run.model_dump(mode="json"),
+        })
+
+    def add_message_and_stream_reply(self, user_message, message_files, on_delta=None):
+        """
+        Adds a message to the thread and passes the reply text to a callback token by token.
+
+        Parameters:
+        user_message (str): The message from the user to add to the thread.
+        message_files (list): List of file IDs associated with the message.
+        on_delta (callable, optional): Called with each text fragment. Defaults to printing it.
+
+        Returns:
+        Message: The completed assistant message, or None if the run did not complete.
+        """
+        printing = on_delta is None
+        if printing:
+            print("Assistant: ", end="", flush=True)
+            on_delta = lambda text: print(text, end="", flush=True)
+
+        deltas = self.stream_reply(user_message, message_files)
+        while True:
+            try:
+                on_delta(next(deltas))
+            except StopIteration as stop:
+                if printing:
+                    print()
+                self.roll_over_if_needed()
+                return stop.value
+
+    def wait_for_run(self, run):
+        """
+        Polls a run according to the wait strategy until it stops or the deadline passes.
+
+        A run that is still in progress when the deadline passes, or when a strategy with a
+        finite schedule runs out of delays, is cancelled (see cancel_run).
+
+        Parameters:
+        run (Run): The run returned when it was created.
+
+        Returns:
+        Run: The last retrieved state of the run.
+        """
+        for delay in poll_delays(self.wait_strategy):
+            if run.status in STOP_RUN_STATUSES:
+                return run
+            time.sleep(delay)
+            run = self.check_run_status(run.id)
+        if run.status in STOP_RUN_STATUSES:
+            return run
+        return self.cancel_run(run)
+
+    def cancel_run(self, run):
+        """
+        Cancels a run and waits until it has stopped.
+
+        A cancelled run is 'cancelling' for a while, and the thread takes no new messages until
+        it has stopped, so the run is polled until its status is final or CANCEL_TIMEOUT passes.
+
+        Parameters:
+        run (Run): The run to cancel.
+
+        Returns:
+        Run: The last retrieved state of the run, normally 'cancelled'.
+        """
+        run = self.client.beta.threads.runs.cancel(thread_id=self.thread_id, run_id=run.id)
+        for delay in poll_delays(BackoffWaitStrategy(timeout=CANCEL_TIMEOUT)):
+            if run.status in TERMINAL_RUN_STATUSES:
+                break
+            time.sleep(delay)
+            run = self.check_run_status(run.id)
+        return run
+
+    def report_unfinished_run(self, run):
+        """
+        Prints why a run ended without a reply.
+
+        Parameters:
+        run (Run): The run that stopped with a status other than completed.
+
+        Returns:
+        None
+        """
+        if run.status == "requires_action":
+            print(f"Run {run.id} requires tool outputs, which are not supported; no reply was produced.")
+        elif run.last_error is not None:
+            print(f"Run {run.id} ended with status '{run.status}': {run.last_error.message}")
+        else:
+            print(f"Run {run.id} ended with status '{run.status}'.")
 
     def check_run_status(self, run_id):
         """
@@ -92,21 +471,93 @@ class ThreadManager:
 
     def retrieve_messages(self):
         """
-        Retrieves all messages from the specified thread.
+        Retrieves the messages added to the thread since the last retrieval.
+
+        The ID of the newest message seen is kept as a cursor, so each call only
+        fetches messages that are newer than it, oldest first.
+
+        Returns:
+        list: The new messages from the thread.
+        """
+        params = {"thread_id": self.thread_id, "order": "asc", "limit": 100}
+        if self.last_message_id is not None:
+            params["after"] = self.last_message_id
+
+        messages = collect_cursor_pages(self.client.beta.threads.messages.list(**params))
+        if messages:
+            self.last_message_id = messages[-1].id
+            self.remember_messages(messages)
+        return messages
+
+    def remember_messages(self, messages):
+        """
+        Writes messages of the current thread through to the registry, if there is one.
 
         Parameters:
-        thread_id (str): The ID of the thread to retrieve messages from.
+        messages (list): Messages returned by the API, oldest first.
+
+        Returns:
+        None
+        """
+        if self.registry is not None:
+            self.registry.add_messages(self.thread_id, messages)
+        if self.context_budget is not None:
+            self.context_tokens += sum(self.context_budget.count_message(message_text(message))
+                                       for message in messages)
+
+    def roll_over_if_needed(self):
+        """
+        Rolls the conversation over to a new thread if the current one has used up the context budget.
+
+        Returns:
+        bool: True if the conversation moved to a new thread.
+        """
+        if self.context_budget is None or not self.context_budget.exceeded(self.context_tokens):
+            return False
+        return self.roll_over()
+
+    def roll_over(self):
+        """
+        Summarizes the current thread and continues the conversation in a new thread.
+
+        The assistant is asked for a summary in a run on the current thread; the new thread starts
+        with that summary as its first message and is linked to the old one in the registry. The
+        summary run's messages are not counted, since the old thread is left behind.
 
         Returns:
-        list: A list of messages from the thread.
+        bool: True if the conversation moved to a new thread, False if no summary was produced.
         """
-        return self.client.beta.threads.messages.list(
-            thread_id=self.thread_id
+        print(f"Conversation is about {self.context_tokens} tokens long, summarizing it into a new thread...")
+        run = self.client.beta.threads.runs.create(
+            thread_id=self.thread_id,
+            assistant_id=self.assistant_id,
+            instructions=self.context_budget.summary_instructions
+        )
+        run = self.wait_for_run(run)
+        if run.status != "completed":
+            self.report_unfinished_run(run)
+            return False
+        summaries = [message for message in self.retrieve_messages()
+                     if message.role == "assistant" and message.run_id == run.id]
+        if not summaries:
+            return False
+        summary = "\n".join(message_text(message) for message in summaries)
+
+        self.create_thread(parent_thread_id=self.thread_id)
+        message = self.client.beta.threads.messages.create(
+            thread_id=self.thread_id,
+            role="user",
+            content=SUMMARY_PREFIX + summary
         )
+        self.last_message_id = message.id
+        self.fresh_thread = False
+        self.remember_messages([message])
+        print(f"Continuing in thread {self.thread_id}.")
+        return True
 
     def display_messages(self, messages):
         """
-        Displays the messages from a thread.
+        Displays the assistant messages from a list of thread messages.
 
         Parameters:
         messages (list): A list of messages to be displayed.
@@ -114,6 +565,6 @@ class ThreadManager:
         Returns:
         None
         """
-        for message in messages.data:
+        for message in messages:
             if message.role == "assistant":
                 print(f"Assistant: {message.content[0].text.value}")
@@ -0,0 +1,517 @@
+# ./chat_bot/thread_registry.py
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from chat_bot.local_state import state_path
+
+# Length of the title derived from a conversation's first message.
+TITLE_LENGTH = 60
+# Messages read per query while exporting, so exports never hold the whole store in memory.
+EXPORT_BATCH_SIZE = 1000
+_TERM = re.compile(r"\w+\*?")
+
+
+def search_terms(query):
+    """
+    Splits a search query into lower-case terms; a trailing '*' marks a prefix term.
+
+    Parameters:
+    query (str): The text typed by the user.
+
+    Returns:
+    list: The terms, without punctuation or search operators.
+    """
+    return [term.lower() for term in _TERM.findall(query)]
+
+
+def message_text(message):
+    """
+    Returns the text of a thread message, with a placeholder for each image.
+
+    Parameters:
+    message (Message): A message returned by the API.
+
+    Returns:
+    str: The message's text blocks joined together.
+    """
+    parts = []
+    for block in message.content:
+        if block.type == "text":
+            parts.append(block.text.value)
+        else:
+            parts.append(f"[{block.type}]")
+    return "\n".join(parts)
+
+
+def message_entry(message):
+    """
+    Converts a thread message into the transcript entry the registry stores.
+
+    Parameters:
+    message (Message): A message returned by the API.
+
+    Returns:
+    dict: The message_id, role, content, run_id, file_ids and created_at of the message.
+    """
+    return {
+        "message_id": message.id,
+        "role": message.role,
+        "content": message_text(message),
+        "run_id": message.run_id,
+        "file_ids": list(message.file_ids or []),
+        "created_at": message.created_at,
+    }
+
+
+class ThreadRegistry:
+    """
+    Local registry of conversation threads per assistant, with a cached transcript of each.
+
+    Thread IDs are otherwise lost when the process exits. The registry keeps them with a title,
+    the last message seen and the time of the last activity, and stores every message as it is
+    sent or retrieved. A conversation can then be shown again from the cache and brought up to
+    date by fetching only the messages after the last one stored. The registry is a SQLite
+    database and is safe to share between threads.
+
+    Stored messages are full-text indexed, so past conversations can be searched locally. The
+    index uses SQLite's FTS5 extension; where SQLite was built without it, an inverted index of
+    terms kept in a plain table is used instead.
+    """
+    def __init__(self, db_path=None):
+        """
+        Opens (and creates if needed) the registry.
+
+        Parameters:
+        db_path (str, optional): Path of the SQLite database. Defaults to threads.sqlite in the local state directory.
+        """
+        self.db_path = db_path if db_path is not None else state_path("threads.sqlite")
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS threads ("
+                " thread_id TEXT PRIMARY KEY,"
+                " assistant_id TEXT NOT NULL,"
+                " title TEXT,"
+                " last_message_id TEXT,"
+                " created_at REAL,"
+                " last_activity REAL,"
+                " parent_thread_id TEXT)"
+            )
+            columns = {row["name"] for row in self.connection.execute("PRAGMA table_info(threads)")}
+            if "parent_thread_id" not in columns:
+                # Registries created before conversations could roll over to a new thread
+                self.connection.execute("ALTER TABLE threads ADD COLUMN parent_thread_id TEXT")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS threads_parent ON threads (parent_thread_id)")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS threads_assistant ON threads (assistant_id, last_activity)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " seq INTEGER PRIMARY KEY,"
+                " message_id TEXT NOT NULL UNIQUE,"
+                " thread_id TEXT NOT NULL,"
+                " role TEXT,"
+                " content TEXT,"
+                " run_id TEXT,"
+                " file_ids TEXT,"
+                " created_at INTEGER)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS messages_thread ON messages (thread_id, seq)")
+        self.full_text = self._create_search_index()
+
+    def _create_search_index(self):
+        """
+        Creates the FTS5 index over the messages, or the inverted index fallback.
+
+        An index created for an existing registry is filled from the messages already stored.
+
+        Returns:
+        bool: True if FTS5 is used, False if the fallback is.
+        """
+        with self.connection:
+            existing = {row[0] for row in self.connection.execute("SELECT name FROM sqlite_master")}
+            try:
+                self.connection.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+                    " content, content='messages', content_rowid='seq')"
+                )
+            except sqlite3.OperationalError:
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS message_terms ("
+                    " term TEXT NOT NULL, seq INTEGER NOT NULL, PRIMARY KEY (term, seq)) WITHOUT ROWID"
+                )
+                if "message_terms" not in existing:
+                    for seq, content in self.connection.execute("SELECT seq, content FROM messages").fetchall():
+                        self._index_terms(seq, content)
+                return False
+
+            # External content table: the triggers keep the index in step with the messages table
+            self.connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN"
+                " INSERT INTO messages_fts (rowid, content) VALUES (new.seq, new.content); END"
+            )
+            self.connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN"
+                " INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.seq, old.content); END"
+            )
+            if "messages_fts" not in existing:
+                self.connection.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+        return True
+
+    def _index_terms(self, seq, content):
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO message_terms VALUES (?, ?)",
+            [(term, seq) for term in {term.rstrip("*") for term in search_terms(content or "")}]
+        )
+
+    def register_thread(self, thread_id, assistant_id, title=None, parent_thread_id=None):
+        """
+        Records a thread, or refreshes its activity time if it is already known.
+
+        Parameters:
+        thread_id (str): The ID of the thread.
+        assistant_id (str): The ID of the assistant answering in the thread.
+        title (str, optional): The title; by default it is taken from the first user message.
+        parent_thread_id (str, optional): The thread this one continues after a rollover; its title is kept.
+        """
+        now = time.time()
+        with self.lock, self.connection:
+            if title is None and parent_thread_id is not None:
+                row = self.connection.execute(
+                    "SELECT title FROM threads WHERE thread_id = ?", (parent_thread_id,)
+                ).fetchone()
+                title = row["title"] if row else None
+            self.connection.execute(
+                "INSERT INTO threads (thread_id, assistant_id, title, created_at, last_activity, parent_thread_id)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (thread_id) DO UPDATE SET last_activity = excluded.last_activity,"
+                " title = COALESCE(excluded.title, threads.title)",
+                (thread_id, assistant_id, title, now, now, parent_thread_id)
+            )
+
+    def get_thread(self, thread_id):
+        """
+        Looks up a registered thread.
+
+        Parameters:
+        thread_id (str): The ID of the thread.
+
+        Returns:
+        dict: The thread's fields, or None if it is not registered.
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM threads WHERE thread_id = ?", (thread_id,)).fetchone()
+        return dict(row) if row else None
+
+    def lineage(self, thread_id):
+        """
+        Returns the chain of threads a conversation rolled over through.
+
+        Parameters:
+        thread_id (str): The ID of the thread.
+
+        Returns:
+        list: The thread IDs from the conversation's first thread to the given one.
+        """
+        chain = []
+        with self.lock:
+            while thread_id is not None and thread_id not in chain:
+                chain.append(thread_id)
+                row = self.connection.execute(
+                    "SELECT parent_thread_id FROM threads WHERE thread_id = ?", (thread_id,)
+                ).fetchone()
+                thread_id = row["parent_thread_id"] if row else None
+        return chain[::-1]
+
+    def list_threads(self, assistant_id, limit=20):
+        """
+        Lists an assistant's conversations, most recently active first.
+
+        A conversation that rolled over is listed once, by its newest thread.
+
+        Parameters:
+        assistant_id (str): The ID of the assistant.
+        limit (int): The maximum number of threads returned.
+
+        Returns:
+        list: The threads' fields, each with the message_count of the whole conversation.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT threads.*, (WITH RECURSIVE chain (thread_id) AS ("
+                "  SELECT threads.thread_id"
+                "  UNION ALL SELECT parent.parent_thread_id FROM threads AS parent"
+                "  JOIN chain ON parent.thread_id = chain.thread_id WHERE parent.parent_thread_id IS NOT NULL)"
+                " SELECT COUNT(*) FROM messages WHERE messages.thread_id IN chain)"
+                " AS message_count FROM threads WHERE assistant_id = ?"
+                " AND NOT EXISTS (SELECT 1 FROM threads AS successor WHERE successor.parent_thread_id = threads.thread_id)"
+                " ORDER BY last_activity DESC LIMIT ?",
+                (assistant_id, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def add_messages(self, thread_id, messages):
+        """
+        Stores messages of a thread in the order given and moves the thread's cursor to the last one.
+
+        Messages already stored are skipped. A thread without a title takes the first line of
+        its first user message.
+
+        Parameters:
+        thread_id (str): The ID of a registered thread.
+        messages (list): Messages returned by the API, oldest first.
+        """
+        if messages:
+            self.add_entries(thread_id, [message_entry(message) for message in messages])
+
+    def add_entries(self, thread_id, entries, move_cursor=True):
+        """
+        Stores transcript entries of a thread in the order given.
+
+        Entries already stored are skipped. A thread without a title takes the first line of
+        its first user entry.
+
+        Parameters:
+        thread_id (str): The ID of a registered thread.
+        entries (list): Entries as built by message_entry, oldest first.
+        move_cursor (bool): Whether the last entry becomes the thread's cursor. Entries with
+            local IDs, such as replies served from the response cache, must not.
+        """
+        if not entries:
+            return
+        with self.lock, self.connection:
+            for entry in entries:
+                cursor = self.connection.execute(
+                    "INSERT OR IGNORE INTO messages (message_id, thread_id, role, content, run_id, file_ids, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (entry["message_id"], thread_id, entry["role"], entry["content"], entry["run_id"],
+                     json.dumps(entry["file_ids"]), entry["created_at"])
+                )
+                if not self.full_text and cursor.rowcount:
+                    self._index_terms(cursor.lastrowid, entry["content"])
+            first_user_entry = next((entry for entry in entries if entry["role"] == "user"), None)
+            title = None
+            if first_user_entry is not None and first_user_entry["content"].strip():
+                title = first_user_entry["content"].strip().splitlines()[0][:TITLE_LENGTH]
+            self.connection.execute(
+                "UPDATE threads SET last_message_id = COALESCE(?, last_message_id), last_activity = ?,"
+                " title = COALESCE(title, ?) WHERE thread_id = ?",
+                (entries[-1]["message_id"] if move_cursor else None, time.time(), title, thread_id)
+            )
+
+    def transcript(self, thread_id):
+        """
+        Returns the cached transcript of a thread.
+
+        Parameters:
+        thread_id (str): The ID of the thread.
+
+        Returns:
+        list: The stored messages as entries (see message_entry), oldest first.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT message_id, role, content, run_id, file_ids, created_at FROM messages"
+                " WHERE thread_id = ? ORDER BY seq",
+                (thread_id,)
+            ).fetchall()
+        return [dict(row, file_ids=json.loads(row["file_ids"] or "[]")) for row in rows]
+
+    def rename_thread(self, thread_id, title):
+        """
+        Changes a thread's title.
+
+        Parameters:
+        thread_id (str): The ID of the thread.
+        title (str): The new title.
+        """
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE threads SET title = ? WHERE thread_id = ?", (title, thread_id))
+
+    def forget_thread(self, thread_id):
+        """
+        Removes a thread and its cached transcript from the registry.
+
+        Parameters:
+        thread_id (str): The ID of the thread.
+        """
+        with self.lock, self.connection:
+            if not self.full_text:
+                self.connection.execute(
+                    "DELETE FROM message_terms WHERE seq IN (SELECT seq FROM messages WHERE thread_id = ?)", (thread_id,)
+                )
+            self.connection.execute("DELETE FROM messages WHERE thread_id = ?", (thread_id,))
+            self.connection.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+
+    def search(self, query, assistant_id=None, limit=20):
+        """
+        Finds stored messages containing every term of a query.
+
+        Terms match whole words, case-insensitively; a term ending in '*' matches as a prefix.
+        With FTS5 the results are ranked by relevance, otherwise the newest come first.
+
+        Parameters:
+        query (str): The words to look for.
+        assistant_id (str, optional): Only search this assistant's conversations.
+        limit (int): The maximum number of results.
+
+        Returns:
+        list: Transcript entries of the matching messages, each with the thread_id, the thread's
+        title and a snippet of the text around the match.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return []
+        assistant_filter = " AND threads.assistant_id = ?" if assistant_id is not None else ""
+        assistant_params = (assistant_id,) if assistant_id is not None else ()
+        columns = ("messages.message_id, messages.thread_id, threads.title, messages.role, messages.content,"
+                   " messages.run_id, messages.file_ids, messages.created_at")
+
+        if self.full_text:
+            match = " ".join(f'"{term[:-1]}"*' if term.endswith("*") else f'"{term}"' for term in terms)
+            sql = (f"SELECT {columns}, snippet(messages_fts, 0, '[', ']', '...', 12) AS snippet"
+                   " FROM messages_fts JOIN messages ON messages.seq = messages_fts.rowid"
+                   " LEFT JOIN threads ON threads.thread_id = messages.thread_id"
+                   f" WHERE messages_fts MATCH ?{assistant_filter} ORDER BY rank LIMIT ?")
+            params = (match,) + assistant_params + (limit,)
+        else:
+            subqueries = []
+            term_params = []
+            for term in terms:
+                if term.endswith("*"):
+                    subqueries.append("SELECT seq FROM message_terms WHERE term >= ? AND term < ?")
+                    term_params += [term[:-1], term[:-1] + "\uffff"]
+                else:
+                    subqueries.append("SELECT seq FROM message_terms WHERE term = ?")
+                    term_params.append(term)
+            sql = (f"SELECT {columns}, NULL AS snippet FROM messages"
+                   " LEFT JOIN threads ON threads.thread_id = messages.thread_id"
+                   f" WHERE messages.seq IN ({' INTERSECT '.join(subqueries)}){assistant_filter}"
+                   " ORDER BY messages.seq DESC LIMIT ?")
+            params = tuple(term_params) + assistant_params + (limit,)
+
+        with self.lock:
+            rows = self.connection.execute(sql, params).fetchall()
+        results = []
+        for row in rows:
+            result = dict(row, file_ids=json.loads(row["file_ids"] or "[]"))
+            if result["snippet"] is None:
+                result["snippet"] = _snippet(result["content"], terms)
+            results.append(result)
+        return results
+
+    def iter_messages(self, thread_id=None, assistant_id=None):
+        """
+        Yields stored messages in the order they were stored, reading them in batches.
+
+        Parameters:
+        thread_id (str, optional): Only yield this thread's messages.
+        assistant_id (str, optional): Only yield messages from this assistant's threads.
+
+        Yields:
+        dict: Transcript entries, each with the thread_id.
+        """
+        conditions = ["messages.seq > ?"]
+        params = []
+        if thread_id is not None:
+            conditions.append("messages.thread_id = ?")
+            params.append(thread_id)
+        if assistant_id is not None:
+            conditions.append("threads.assistant_id = ?")
+            params.append(assistant_id)
+        sql = ("SELECT messages.seq, messages.message_id, messages.thread_id, messages.role, messages.content,"
+               " messages.run_id, messages.file_ids, messages.created_at FROM messages"
+               " LEFT JOIN threads ON threads.thread_id = messages.thread_id"
+               f" WHERE {' AND '.join(conditions)} ORDER BY messages.seq LIMIT ?")
+
+        last_seq = 0
+        while True:
+            # The lock is released between batches, so writers are not blocked for a whole export
+            with self.lock:
+                rows = self.connection.execute(sql, [last_seq] + params + [EXPORT_BATCH_SIZE]).fetchall()
+            for row in rows:
+                entry = dict(row, file_ids=json.loads(row["file_ids"] or "[]"))
+                last_seq = entry.pop("seq")
+                yield entry
+            if len(rows) < EXPORT_BATCH_SIZE:
+                return
+
+    def export_messages(self, output_file, thread_id=None, assistant_id=None):
+        """
+        Writes stored messages to a text stream as JSON lines.
+
+        Parameters:
+        output_file (file): The stream to write to.
+        thread_id (str, optional): Only export this thread's messages.
+        assistant_id (str, optional): Only export messages from this assistant's threads.
+
+        Returns:
+        int: The number of messages written.
+        """
+        count = 0
+        for entry in self.iter_messages(thread_id=thread_id, assistant_id=assistant_id):
+            output_file.write(json.dumps(entry) + "\n")
+            count += 1
+        return count
+
+
+def _snippet(content, terms, width=80):
+    """
+    Cuts the text around the first matching term, for results of the fallback index.
+    """
+    lowered = content.lower()
+    positions = [lowered.find(term.rstrip("*")) for term in terms]
+    positions = [position for position in positions if position >= 0]
+    start = max(0, min(positions) - width // 2) if positions else 0
+    snippet = content[start:start + width].replace("\n", " ")
+    return ("..." if start else "") + snippet + ("..." if start + width < len(content) else "")
+
+
+def print_search_results(results):
+    """
+    Prints search results with the conversation each message belongs to.
+
+    Parameters:
+    results (list): The results returned by ThreadRegistry.search.
+
+    Returns:
+    None
+    """
+    if not results:
+        print("No messages found.")
+        return
+    for result in results:
+        created_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(result["created_at"] or 0))
+        print(f"{result['title'] or 'Untitled'} ({result['thread_id']}, {created_at})")
+        print(f"    {result['role']}: {result['snippet']}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Search and export locally stored conversations.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    search_parser = commands.add_parser("search", help="Search stored messages.")
+    search_parser.add_argument("query", help="Words to look for; end a word with '*' to match it as a prefix.")
+    search_parser.add_argument("--assistant-id", help="Only search this assistant's conversations.")
+    search_parser.add_argument("--limit", type=int, default=20)
+    export_parser = commands.add_parser("export", help="Export stored messages as JSON lines.")
+    export_parser.add_argument("-o", "--output", default="-", help="File to write, or '-' for stdout.")
+    export_parser.add_argument("--thread-id", help="Only export this thread.")
+    export_parser.add_argument("--assistant-id", help="Only export this assistant's conversations.")
+    args = parser.parse_args()
+
+    registry = ThreadRegistry()
+    if args.command == "search":
+        print_search_results(registry.search(args.query, assistant_id=args.assistant_id, limit=args.limit))
+    else:
+        output_file = sys.stdout if args.output == "-" else open(args.output, "w")
+        with output_file:
+            exported = registry.export_messages(output_file, thread_id=args.thread_id, assistant_id=args.assistant_id)
+        print(f"Exported {exported} messages.", file=sys.stderr)
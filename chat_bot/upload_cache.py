@@ -0,0 +1,131 @@
+# ./chat_bot/upload_cache.py
+
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from chat_bot.local_state import state_path
+
+# Files larger than this are hashed through a memory map instead of buffered reads.
+MMAP_THRESHOLD = 8 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path):
+    """
+    Computes the SHA-256 digest of a file without loading it into memory.
+
+    Parameters:
+    file_path (str): The path to the file to hash.
+
+    Returns:
+    str: The hexadecimal digest of the file's content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file_object:
+        size = os.fstat(file_object.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(file_object.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for offset in range(0, size, CHUNK_SIZE):
+                    digest.update(mapped[offset:offset + CHUNK_SIZE])
+        else:
+            for chunk in iter(lambda: file_object.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadCache:
+    """
+    Persistent index mapping a file's content hash and purpose to the ID of the uploaded file.
+
+    FileManager consults it before uploading so identical content is sent only once.
+    The index is a SQLite database and is safe to share between upload threads. File IDs
+    belong to one endpoint and account, so each account_key gets its own database.
+    """
+    def __init__(self, db_path=None, account_key=None):
+        """
+        Opens (and creates if needed) the upload index.
+
+        Parameters:
+        db_path (str, optional): Path of the SQLite database. Defaults to uploads.sqlite in the local state directory.
+        account_key (str, optional): The key from local_state.account_key, added to the default database name.
+        """
+        if db_path is None:
+            db_path = state_path(f"uploads_{account_key}.sqlite" if account_key else "uploads.sqlite")
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                " content_hash TEXT NOT NULL,"
+                " purpose TEXT NOT NULL,"
+                " file_id TEXT NOT NULL,"
+                " file_path TEXT,"
+                " size INTEGER,"
+                " uploaded_at REAL,"
+                " PRIMARY KEY (content_hash, purpose))"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS uploads_file_id ON uploads (file_id)")
+
+    def get(self, content_hash, purpose):
+        """
+        Looks up the file ID previously returned for this content and purpose.
+
+        Parameters:
+        content_hash (str): The SHA-256 digest of the file's content.
+        purpose (str): The purpose the file was uploaded with.
+
+        Returns:
+        str: The cached file ID, or None if the content has not been uploaded.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT file_id FROM uploads WHERE content_hash = ? AND purpose = ?",
+                (content_hash, purpose)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, content_hash, purpose, file_id, file_path=None, size=None):
+        """
+        Records the file ID returned for an upload.
+
+        Parameters:
+        content_hash (str): The SHA-256 digest of the file's content.
+        purpose (str): The purpose the file was uploaded with.
+        file_id (str): The ID returned by the API.
+        file_path (str, optional): The local path that was uploaded.
+        size (int, optional): The size of the file in bytes.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO uploads VALUES (?, ?, ?, ?, ?, ?)",
+                (content_hash, purpose, file_id, file_path, size, time.time())
+            )
+
+    def forget(self, file_id):
+        """
+        Drops every entry pointing at a file ID, e.g. after the file was deleted.
+
+        Parameters:
+        file_id (str): The ID of the file that no longer exists.
+        """
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM uploads WHERE file_id = ?", (file_id,))
+
+    def retain(self, file_ids):
+        """
+        Drops every entry whose file ID is not in the given collection of existing files.
+
+        Parameters:
+        file_ids (iterable): The IDs of all files that currently exist remotely.
+        """
+        existing = set(file_ids)
+        with self.lock, self.connection:
+            cached_ids = [row[0] for row in self.connection.execute("SELECT DISTINCT file_id FROM uploads")]
+            self.connection.executemany(
+                "DELETE FROM uploads WHERE file_id = ?",
+                [(file_id,) for file_id in cached_ids if file_id not in existing]
+            )
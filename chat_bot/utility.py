@@ -1,59 +1,307 @@
 # ./chat_bot/utility.py
 
-from openai import OpenAI
-from credentials import openai_key
+import fnmatch
+import importlib.util
+import itertools
 import os
+import threading
+import httpx
+from openai import AsyncOpenAI, OpenAI
+from credentials import openai_key
+from chat_bot.instrumentation import AsyncInstrumentedTransport, InstrumentedTransport
+from chat_bot.rate_limiter import RateLimitedTransport
+
+# Connection pool defaults shared by every client the factory creates.
+DEFAULT_POOL_OPTIONS = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 60.0,
+    "http2": False,
+    "timeout": 60.0,
+    "connect_timeout": 5.0,
+}
+
+_shared_clients = {}
+_shared_clients_lock = threading.Lock()
+
+
+def _http_client_options(options):
+    """
+    Translates pool options into keyword arguments for an httpx client.
+
+    HTTP/2 needs the optional 'h2' package and is switched off with a notice when it is missing.
+    """
+    http2 = options["http2"]
+    if http2 and importlib.util.find_spec("h2") is None:
+        print("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1.")
+        http2 = False
+    return {
+        "limits": httpx.Limits(
+            max_connections=options["max_connections"],
+            max_keepalive_connections=options["max_keepalive_connections"],
+            keepalive_expiry=options["keepalive_expiry"],
+        ),
+        "timeout": httpx.Timeout(options["timeout"], connect=options["connect_timeout"]),
+        "http2": http2,
+    }
 
 
-def initiate_client():
+def initiate_client(base_url=None, warm_up=False, rate_limiter=None, instrumentation=None, **pool_options):
     """
-    Initializes and returns an OpenAI client using the provided API key.
+    Returns the process-wide OpenAI client, creating it on first use.
+
+    Every call with the same settings returns the same client, so all managers share one
+    connection pool and reuse its keep-alive connections instead of paying TCP and TLS setup
+    on each operation.
+
+    Parameters:
+    base_url (str, optional): API base URL, e.g. a local stand-in server. Defaults to the OpenAI API.
+    warm_up (bool): Open a pooled connection in the background so the first real call finds it ready.
+    rate_limiter (RateLimitScheduler, optional): Paces and retries every request made through the client;
+        the client's own retries are then disabled.
+    instrumentation (Instrumentation, optional): Records every request made through the client.
+    pool_options: Overrides for DEFAULT_POOL_OPTIONS (max_connections, max_keepalive_connections,
+        keepalive_expiry, http2, timeout, connect_timeout).
 
     Returns:
-    OpenAI: An instance of the OpenAI client configured with the specified API key.
+    OpenAI: The shared OpenAI client configured with the specified API key.
     """
-    client = OpenAI(api_key=openai_key)
+    options = dict(DEFAULT_POOL_OPTIONS, **pool_options)
+    key = (base_url, id(rate_limiter), id(instrumentation), tuple(sorted(options.items())))
+    with _shared_clients_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            http_client_options = _http_client_options(options)
+            client_options = {}
+            if rate_limiter is not None or instrumentation is not None:
+                # A custom transport replaces httpx's default one, so it gets the pool settings itself
+                transport = httpx.HTTPTransport(
+                    limits=http_client_options.pop("limits"), http2=http_client_options.pop("http2")
+                )
+                if rate_limiter is not None:
+                    transport = RateLimitedTransport(transport, rate_limiter)
+                    client_options["max_retries"] = 0
+                if instrumentation is not None:
+                    transport = InstrumentedTransport(transport, instrumentation)
+                http_client_options["transport"] = transport
+            client = OpenAI(
+                api_key=openai_key,
+                base_url=base_url,
+                http_client=httpx.Client(**http_client_options),
+                **client_options
+            )
+            _shared_clients[key] = client
+            if warm_up:
+                threading.Thread(target=_warm_up, args=(client,), daemon=True).start()
     return client
 
 
-def get_all_files_in_path(file_path):
+def initiate_async_client(base_url=None, instrumentation=None, **pool_options):
+    """
+    Creates an AsyncOpenAI client with the same pool settings as initiate_client.
+
+    Async connection pools belong to the event loop they are used on, so create one client per
+    loop and share it between the async managers running on that loop.
+
+    Parameters:
+    base_url (str, optional): API base URL. Defaults to the OpenAI API.
+    instrumentation (Instrumentation, optional): Records every request made through the client.
+    pool_options: Overrides for DEFAULT_POOL_OPTIONS.
+
+    Returns:
+    AsyncOpenAI: An async client configured with the specified API key.
+    """
+    options = dict(DEFAULT_POOL_OPTIONS, **pool_options)
+    http_client_options = _http_client_options(options)
+    if instrumentation is not None:
+        transport = httpx.AsyncHTTPTransport(
+            limits=http_client_options.pop("limits"), http2=http_client_options.pop("http2")
+        )
+        http_client_options["transport"] = AsyncInstrumentedTransport(transport, instrumentation)
+    return AsyncOpenAI(
+        api_key=openai_key,
+        base_url=base_url,
+        http_client=httpx.AsyncClient(**http_client_options),
+    )
+
+
+def _warm_up(client):
+    """
+    Establishes a pooled connection with one cheap request; failures are ignored.
+    """
+    try:
+        client.models.list()
+    except Exception:
+        pass
+
+
+# Paths skipped by default when discovering files, in gitignore-style syntax.
+DEFAULT_EXCLUDE = ['.DS_Store', '.git/']
+
+
+def _pattern_matches(pattern, relative_path, is_dir):
+    """
+    Matches one gitignore-style pattern against a path relative to the search root.
+
+    A trailing '/' restricts the pattern to directories. A pattern without a '/' matches the
+    entry's name at any depth; otherwise it is matched against the whole relative path, where
+    '**' (like '*') spans directories.
+    """
+    if pattern.endswith('/'):
+        if not is_dir:
+            return False
+        pattern = pattern.rstrip('/')
+    if '/' not in pattern:
+        return fnmatch.fnmatchcase(relative_path.rsplit('/', 1)[-1], pattern)
+    pattern = pattern.lstrip('/')
+    return fnmatch.fnmatchcase(relative_path, pattern) or fnmatch.fnmatchcase(relative_path, pattern.replace('**/', ''))
+
+
+def path_is_excluded(patterns, relative_path, is_dir):
+    """
+    Applies gitignore-style exclude patterns in order; the last matching pattern wins and '!' re-includes.
+
+    Parameters:
+    patterns (list): The exclude patterns.
+    relative_path (str): The path relative to the search root, with '/' separators.
+    is_dir (bool): Whether the path is a directory.
+
+    Returns:
+    bool: True if the path is excluded.
+    """
+    excluded = False
+    for pattern in patterns:
+        negated = pattern.startswith('!')
+        if _pattern_matches(pattern[1:] if negated else pattern, relative_path, is_dir):
+            excluded = not negated
+    return excluded
+
+
+def iter_files_in_path(file_path, include=None, exclude=None, extensions=None, min_size=None, max_size=None,
+                       symlinks='files', max_depth=None):
+    """
+    Lazily yields the files within the specified directory and its subdirectories.
+
+    The tree is walked depth first with os.scandir, so the first paths are produced before the
+    walk finishes, and excluded directories are never entered.
+
+    Args:
+    - file_path (str): The path to the directory.
+    - include (list, optional): Gitignore-style patterns; when given, only matching files are yielded.
+    - exclude (list, optional): Gitignore-style patterns for files and directories to skip, '!' re-includes.
+      Defaults to DEFAULT_EXCLUDE.
+    - extensions (list, optional): Allowed file extensions such as ['.md', '.pdf'], case-insensitive.
+    - min_size (int, optional): Skip files smaller than this many bytes.
+    - max_size (int, optional): Skip files larger than this many bytes.
+    - symlinks (str): 'skip' ignores symbolic links, 'files' yields linked files but does not enter
+      linked directories, 'follow' also enters linked directories (each real directory once).
+    - max_depth (int, optional): How many directory levels below file_path to enter; 0 means top level only.
+
+    Yields:
+    - str: File paths, sorted by name within each directory.
+    """
+    exclude = DEFAULT_EXCLUDE if exclude is None else exclude
+    extensions = {extension.lower() for extension in extensions} if extensions else None
+    visited = set()
+    stack = [(file_path, '', 0)]
+    while stack:
+        directory, relative_directory, depth = stack.pop()
+        if symlinks == 'follow':
+            directory_stat = os.stat(directory)
+            if (directory_stat.st_dev, directory_stat.st_ino) in visited:
+                continue
+            visited.add((directory_stat.st_dev, directory_stat.st_ino))
+        try:
+            with os.scandir(directory) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            relative_path = relative_directory + entry.name
+            is_link = entry.is_symlink()
+            if is_link and symlinks == 'skip':
+                continue
+            try:
+                is_dir = entry.is_dir(follow_symlinks=symlinks == 'follow')
+                if not is_dir and not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if path_is_excluded(exclude, relative_path, is_dir):
+                continue
+
+            if is_dir:
+                if max_depth is None or depth < max_depth:
+                    subdirectories.append((entry.path, relative_path + '/', depth + 1))
+                continue
+            if include and not any(_pattern_matches(pattern, relative_path, False) for pattern in include):
+                continue
+            if extensions is not None and os.path.splitext(entry.name)[1].lower() not in extensions:
+                continue
+            if min_size is not None or max_size is not None:
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    continue
+                if (min_size is not None and size < min_size) or (max_size is not None and size > max_size):
+                    continue
+            yield entry.path
+
+        # Reversed so the stack pops subdirectories in name order
+        stack.extend(reversed(subdirectories))
+
+
+def get_all_files_in_path(file_path, **filters):
     """
     Returns a list of all file paths within the specified directory and its subdirectories.
-    Skips '.DS_Store' files common on macOS.
+    Skips '.DS_Store' files common on macOS and '.git' directories unless other excludes are given.
 
     Args:
-    - directory (str): The path to the directory.
+    - file_path (str): The path to the directory.
+    - filters: Keyword filters accepted by iter_files_in_path.
 
     Returns:
     - list: A list of file paths.
     """
-    all_file_paths = []
-    for root, _, files in os.walk(file_path):
-        for file in files:
-            if file != '.DS_Store':
-                all_file_paths.append(os.path.join(root, file))
-    return all_file_paths
+    return list(iter_files_in_path(file_path, **filters))
 
 
 # Additional function to select a file for upload
-def select_file_for_upload(file_path):
+def select_file_for_upload(file_path, page_size=50, **filters):
     """
-    Presents a list of all files in the specified path and allows the user to select a file for upload.
+    Presents the files in the specified path page by page and allows the user to select a file for upload.
+
+    Files are listed as they are discovered, so large trees do not stall or flood the terminal.
 
     Parameters:
     file_path (str): The path where files are located.
+    page_size (int): The number of files shown before asking for a selection.
+    filters: Keyword filters accepted by iter_files_in_path.
 
     Returns:
     str: The path of the selected file, or None if the selection is invalid.
     """
-    all_files = get_all_files_in_path(file_path)
+    files = iter_files_in_path(file_path, **filters)
+    shown_files = []
     print("Please select a file to upload:")
-    for idx, file_name in enumerate(all_files):
-        print(f"{idx + 1}. {file_name}")
-    selected_index = int(input("Enter the number of the file you want to upload: ")) - 1
-    if 0 <= selected_index < len(all_files):
-        return all_files[selected_index]
-    else:
+    while True:
+        page = list(itertools.islice(files, page_size))
+        for file_name in page:
+            shown_files.append(file_name)
+            print(f"{len(shown_files)}. {file_name}")
+        has_more = len(page) == page_size
+        prompt = "Enter the number of the file you want to upload"
+        selection = input(prompt + (", or press Enter to show more: " if has_more else ": ")).strip()
+        if not selection and has_more:
+            continue
+        try:
+            selected_index = int(selection) - 1
+        except ValueError:
+            selected_index = -1
+        if 0 <= selected_index < len(shown_files):
+            return shown_files[selected_index]
         print("Invalid selection.")
         return None
 
@@ -0,0 +1,102 @@
+# ./chat_bot/wait_strategy.py
+
+import random
+import time
+
+
+# Run statuses after which the run will not make progress without us.
+TERMINAL_RUN_STATUSES = ("completed", "failed", "cancelled", "expired")
+# Statuses that end the wait; requires_action needs tool outputs this client does not submit.
+STOP_RUN_STATUSES = TERMINAL_RUN_STATUSES + ("requires_action",)
+# Seconds to wait for a cancelled run to leave 'cancelling'; the thread takes no messages until then.
+CANCEL_TIMEOUT = 30.0
+
+
+def poll_delays(wait_strategy):
+    """
+    Yields the seconds to sleep before each status check of a run, following a wait strategy.
+
+    A delay is shortened so the last check lands on the deadline. The sequence ends when the
+    deadline has passed or the strategy's delays run out; a run still going then is cancelled.
+    ThreadManager and AsyncThreadManager both poll with it.
+
+    Parameters:
+    wait_strategy: An object with a `timeout` attribute and a `delays()` generator.
+
+    Yields:
+    float: The delay before the next status check.
+    """
+    timeout = wait_strategy.timeout
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    for delay in wait_strategy.delays():
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            delay = min(delay, remaining)
+        yield delay
+
+
+class BackoffWaitStrategy:
+    """
+    Polling schedule for waiting on a run: a fast first poll, then exponential backoff
+    with jitter, capped per poll and bounded by a total deadline.
+
+    Any object with a `timeout` attribute and a `delays()` generator can be passed to
+    ThreadManager in place of this class. A run still going when a finite `delays()` ends is cancelled.
+    """
+    def __init__(self, first_delay=0.25, multiplier=1.6, max_delay=2.0, jitter=0.2, timeout=300.0):
+        """
+        Initializes the wait strategy.
+
+        Parameters:
+        first_delay (float): Seconds to wait before the first status check.
+        multiplier (float): Factor applied to the delay after every poll.
+        max_delay (float): Upper bound for a single delay, in seconds.
+        jitter (float): Relative random spread applied to each delay (0.2 means +/-20%).
+        timeout (float): Total seconds to wait for the run, or None to wait indefinitely.
+        """
+        self.first_delay = first_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.timeout = timeout
+
+    def delays(self):
+        """
+        Yields the number of seconds to sleep before each status check.
+
+        Returns:
+        generator: An endless sequence of delays.
+        """
+        delay = self.first_delay
+        while True:
+            spread = delay * self.jitter
+            yield min(self.max_delay, max(0.0, delay + random.uniform(-spread, spread)))
+            delay = min(self.max_delay, delay * self.multiplier)
+
+
+class FixedWaitStrategy:
+    """
+    Polling schedule with a constant interval, matching the original two second sleep.
+    """
+    def __init__(self, interval=2.0, timeout=None):
+        """
+        Initializes the wait strategy.
+
+        Parameters:
+        interval (float): Seconds to wait between status checks.
+        timeout (float): Total seconds to wait for the run, or None to wait indefinitely.
+        """
+        self.interval = interval
+        self.timeout = timeout
+
+    def delays(self):
+        """
+        Yields the number of seconds to sleep before each status check.
+
+        Returns:
+        generator: An endless sequence of delays.
+        """
+        while True:
+            yield self.interval
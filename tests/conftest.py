@@ -0,0 +1,23 @@
+# ./tests/conftest.py
+
+import importlib.util
+import sys
+import types
+import pytest
+
+# The client module reads the API key from credentials.py, which the install script writes.
+# The tests only talk to the local emulator, so a placeholder key is enough without it.
+if importlib.util.find_spec("credentials") is None:
+    sys.modules["credentials"] = types.SimpleNamespace(openai_key="sk-emulator")
+
+from chat_bot import local_state  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    """
+    Keeps the caches, indexes and manifests of every test in its own state directory.
+    """
+    directory = tmp_path / "state"
+    monkeypatch.setattr(local_state, "STATE_DIR", str(directory))
+    return directory
@@ -0,0 +1,57 @@
+# ./tests/test_assistant_manager.py
+
+import pytest
+from chat_bot.assistant_manager import AssistantManager
+from chat_bot.emulator import EmulatorConfig, start_emulator
+from chat_bot.utility import initiate_client
+
+
+@pytest.fixture
+def client():
+    server = start_emulator(EmulatorConfig())
+    yield initiate_client(base_url=server.base_url)
+    server.shutdown()
+
+
+def upload(client, name):
+    return client.files.create(file=(name, b"Document."), purpose="assistants").id
+
+
+def test_an_older_response_does_not_replace_a_newer_one(client):
+    assistant_manager = AssistantManager(client)
+    assistant = assistant_manager.create_assistant("gpt-4-1106-preview", "Test", "Answer.", [])
+    stale_sequence = assistant_manager.cache.next_sequence()
+    stale = client.beta.assistants.retrieve(assistant.id)
+    file_id = upload(client, "document.txt")
+
+    assistant_manager.add_files_to_assistant(assistant.id, [file_id])
+    assistant_manager.cache.put(stale, stale_sequence)
+
+    assert assistant_manager.load_assistant(assistant.id).file_ids == [file_id]
+
+
+def test_updates_keep_files_attached_elsewhere_and_leave_metadata_alone(client):
+    assistant_manager = AssistantManager(client)
+    assistant = assistant_manager.create_assistant("gpt-4-1106-preview", "Test", "Answer.", [],
+                                                   metadata={"owner": "tests"})
+    assistant_manager.load_assistant(assistant.id)
+    elsewhere, mine = upload(client, "elsewhere.txt"), upload(client, "mine.txt")
+    client.beta.assistants.update(assistant_id=assistant.id, file_ids=[elsewhere])
+
+    updated = assistant_manager.add_files_to_assistant(assistant.id, [mine])
+
+    assert updated.file_ids == [elsewhere, mine]
+    assert client.beta.assistants.retrieve(assistant.id).metadata == {"owner": "tests"}
+
+
+def test_clean_missing_files_keeps_files_attached_after_the_check(client):
+    assistant_manager = AssistantManager(client)
+    assistant = assistant_manager.create_assistant("gpt-4-1106-preview", "Test", "Answer.", [])
+    kept, deleted = upload(client, "kept.txt"), upload(client, "deleted.txt")
+    assistant_manager.add_files_to_assistant(assistant.id, [kept, deleted])
+    client.files.delete(deleted)
+    attached_elsewhere = upload(client, "elsewhere.txt")
+    client.beta.assistants.update(assistant_id=assistant.id, file_ids=[kept, deleted, attached_elsewhere])
+
+    assert assistant_manager.clean_missing_files_from_assistant(assistant.id) == [deleted]
+    assert client.beta.assistants.retrieve(assistant.id).file_ids == [kept, attached_elsewhere]
@@ -0,0 +1,43 @@
+# ./tests/test_async_managers.py
+
+import asyncio
+import pytest
+from chat_bot.async_file_manager import AsyncFileManager
+from chat_bot.async_thread_manager import AsyncThreadManager
+from chat_bot.emulator import EmulatorConfig, start_emulator
+from chat_bot.utility import initiate_async_client
+
+
+@pytest.fixture
+def base_url():
+    server = start_emulator(EmulatorConfig(queue_time=0.0, run_duration=0.05, token_interval=0.0))
+    yield server.base_url
+    server.shutdown()
+
+
+def test_wait_and_stream_share_the_sync_handling(base_url):
+    async def converse():
+        client = initiate_async_client(base_url=base_url)
+        assistant = await client.beta.assistants.create(model="gpt-4-1106-preview", name="Test", instructions="Answer.")
+        thread_manager = AsyncThreadManager(client, assistant.id)
+        await thread_manager.create_thread()
+        replies = await thread_manager.add_message_and_wait_for_reply("Hello", [])
+        fragments = [text async for text in thread_manager.stream_reply("Again", [])]
+        return replies, fragments, thread_manager
+
+    replies, fragments, thread_manager = asyncio.run(converse())
+    assert thread_manager.last_run.status == "completed"
+    assert replies[0].content[0].text.value == "You said: Hello"
+    assert "".join(fragments) == thread_manager.last_reply.content[0].text.value == "You said: Again"
+
+
+def test_list_follows_the_cursor(base_url):
+    async def upload_and_list():
+        file_manager = AsyncFileManager(initiate_async_client(base_url=base_url))
+        for index in range(5):
+            await file_manager.client.create(file=(f"document_{index}.txt", b"Document."), purpose="assistants")
+        return await file_manager.list(), [file_id async for file_id, _ in file_manager.iter_files(page_size=2)]
+
+    files, paged_ids = asyncio.run(upload_and_list())
+    assert len(files) == 5
+    assert sorted(paged_ids) == sorted(files)
@@ -0,0 +1,49 @@
+# ./tests/test_batch_runner.py
+
+import io
+import json
+import pytest
+from chat_bot.batch_runner import BatchRunner, completed_item_ids
+from chat_bot.emulator import EmulatorConfig, start_emulator
+from chat_bot.file_manager import FileManager
+from chat_bot.utility import initiate_client
+
+
+@pytest.fixture
+def start_runner():
+    servers = []
+
+    def start(**config):
+        server = start_emulator(EmulatorConfig(**dict({"run_duration": 0.0, "token_interval": 0.0}, **config)))
+        servers.append(server)
+        client = initiate_client(base_url=server.base_url)
+        assistant = client.beta.assistants.create(model="gpt-4-1106-preview", name="Test", instructions="Answer.")
+        return BatchRunner(client, FileManager(client), assistant_id=assistant.id)
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def run_batch(runner, prompts):
+    output = io.StringIO()
+    runner.run([{"id": str(index), "prompt": prompt} for index, prompt in enumerate(prompts)], output)
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_completed_items(start_runner):
+    result, = run_batch(start_runner(), ["Hello"])
+    assert (result["status"], result["reply"], result["error"]) == ("completed", "You said: Hello", None)
+
+
+def test_a_stream_error_fails_the_item_with_its_message(start_runner, tmp_path):
+    result, = run_batch(start_runner(stream_error_rate=1.0), ["Hello there"])
+    assert (result["status"], result["error"]) == ("failed", "Emulated stream error.")
+
+    output_path = tmp_path / "results.jsonl"
+    output_path.write_text(json.dumps(result) + "\n")
+    assert completed_item_ids(str(output_path)) == set()
+
+
+def test_a_failed_run_is_reported(start_runner):
+    result, = run_batch(start_runner(run_failure_rate=1.0), ["Hello"])
+    assert (result["status"], result["error"]) == ("failed", "Emulated run failure.")
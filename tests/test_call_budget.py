@@ -0,0 +1,28 @@
+# ./tests/test_call_budget.py
+
+import os
+import pytest
+from chat_bot import local_state
+from chat_bot.call_budget import ACTION_BUDGETS, CallBudgetHarness
+
+
+@pytest.fixture
+def harness():
+    harness = CallBudgetHarness()
+    yield harness
+    harness.close()
+
+
+@pytest.mark.parametrize("action", list(ACTION_BUDGETS))
+def test_action_stays_within_budget(harness, action):
+    result, = harness.run([action])
+    assert result["calls"] <= result["budget"], "\n".join(result["sequence"])
+
+
+def test_harness_restores_the_state_dir_and_cleans_up():
+    state_dir = local_state.STATE_DIR
+    harness = CallBudgetHarness()
+    harness.run(["files_refresh"])
+    assert local_state.STATE_DIR == state_dir
+    harness.close()
+    assert not os.path.exists(harness.work_dir)
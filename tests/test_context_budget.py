@@ -0,0 +1,65 @@
+# ./tests/test_context_budget.py
+
+import pytest
+from chat_bot.context_budget import (MESSAGE_OVERHEAD_TOKENS, SUMMARY_PREFIX, ContextBudget,
+                                     context_budget_from_environment)
+from chat_bot.emulator import EmulatorConfig, start_emulator
+from chat_bot.thread_manager import ThreadManager
+from chat_bot.thread_registry import ThreadRegistry
+from chat_bot.utility import initiate_client
+
+
+def estimating_budget(max_tokens):
+    budget = ContextBudget(max_tokens=max_tokens)
+    budget.encoding = None
+    return budget
+
+
+def test_estimate_and_threshold():
+    budget = estimating_budget(max_tokens=10)
+    assert budget.count_text("") == 0
+    assert budget.count_text("abcde") == 2
+    assert budget.count_message("abcd") == 1 + MESSAGE_OVERHEAD_TOKENS
+    assert not budget.exceeded(9)
+    assert budget.exceeded(10)
+
+
+def test_budget_from_environment(monkeypatch):
+    monkeypatch.setenv("GPT4_ASSISTANT_CONTEXT_TOKENS", "500")
+    assert context_budget_from_environment().max_tokens == 500
+    monkeypatch.setenv("GPT4_ASSISTANT_CONTEXT_TOKENS", "0")
+    assert context_budget_from_environment() is None
+
+
+@pytest.fixture
+def server():
+    server = start_emulator(EmulatorConfig(queue_time=0.0, run_duration=0.0, token_interval=0.0))
+    yield server
+    server.shutdown()
+
+
+def test_conversation_rolls_over_once_the_threshold_is_reached(server):
+    client = initiate_client(base_url=server.base_url)
+    assistant = client.beta.assistants.create(model="gpt-4-1106-preview", name="Test", instructions="Answer.")
+    registry = ThreadRegistry()
+    budget = estimating_budget(max_tokens=10 ** 6)
+    thread_manager = ThreadManager(client, assistant.id, registry=registry, context_budget=budget)
+    thread_manager.create_thread()
+    first_thread_id = thread_manager.thread_id
+
+    assert thread_manager.add_message_and_wait_for_reply("Hello", [])
+    exchange_tokens = thread_manager.context_tokens
+    assert exchange_tokens == budget.count_message("Hello") + budget.count_message("You said: Hello")
+
+    # One token short of the threshold: the thread is kept
+    budget.max_tokens = 2 * exchange_tokens + 1
+    assert thread_manager.add_message_and_wait_for_reply("Hello", [])
+    assert thread_manager.thread_id == first_thread_id
+
+    # The third exchange crosses it: the thread is summarized into a new one
+    assert thread_manager.add_message_and_wait_for_reply("Hello", [])
+    assert thread_manager.thread_id != first_thread_id
+    assert registry.lineage(thread_manager.thread_id) == [first_thread_id, thread_manager.thread_id]
+    summary, = registry.transcript(thread_manager.thread_id)
+    assert summary["content"].startswith(SUMMARY_PREFIX)
+    assert thread_manager.context_tokens == budget.count_message(summary["content"])
@@ -0,0 +1,102 @@
+# ./tests/test_directory_sync.py
+
+import os
+import pytest
+from chat_bot.assistant_manager import AssistantManager
+from chat_bot.directory_sync import DirectorySync, _load_manifest
+from chat_bot.emulator import EmulatorConfig, start_emulator
+from chat_bot.openai_assistant import create_file_manager
+from chat_bot.utility import initiate_client
+
+
+@pytest.fixture
+def client():
+    server = start_emulator(EmulatorConfig())
+    yield initiate_client(base_url=server.base_url)
+    server.shutdown()
+
+
+@pytest.fixture
+def documents(tmp_path):
+    directory = tmp_path / "documents"
+    directory.mkdir()
+    return directory
+
+
+@pytest.fixture
+def assistant_manager(client):
+    return AssistantManager(client, file_manager=create_file_manager(client))
+
+
+def new_assistant(assistant_manager):
+    return assistant_manager.create_assistant("gpt-4-1106-preview", "Test", "Answer.", []).id
+
+
+def write(directory, name, content):
+    path = directory / name
+    path.write_text(content)
+    return str(path)
+
+
+def remote_file_ids(client):
+    return {file.id for file in client.files.list().data}
+
+
+def sync_manifest(sync, directory, assistant_id):
+    return _load_manifest(sync.manifest_path(str(directory), assistant_id))
+
+
+def test_sync_reports_added_unchanged_changed_and_removed(assistant_manager, documents):
+    assistant_id = new_assistant(assistant_manager)
+    write(documents, "a.txt", "A")
+    write(documents, "b.txt", "B")
+    sync = DirectorySync(assistant_manager)
+
+    assert sorted(sync.sync(str(documents), assistant_id)["added"]) == ["a.txt", "b.txt"]
+    assert sorted(sync.sync(str(documents), assistant_id)["unchanged"]) == ["a.txt", "b.txt"]
+
+    write(documents, "a.txt", "A, changed")
+    os.remove(documents / "b.txt")
+    summary = sync.sync(str(documents), assistant_id)
+    assert (summary["changed"], summary["removed"]) == (["a.txt"], ["b.txt"])
+    assert len(assistant_manager.load_assistant(assistant_id, refresh=True).file_ids) == 1
+
+
+def test_removed_files_are_kept_by_default(assistant_manager, client, documents):
+    assistant_id = new_assistant(assistant_manager)
+    write(documents, "a.txt", "A")
+    sync = DirectorySync(assistant_manager)
+    sync.sync(str(documents), assistant_id)
+    uploaded = remote_file_ids(client)
+
+    os.remove(documents / "a.txt")
+    sync.sync(str(documents), assistant_id)
+
+    assert assistant_manager.load_assistant(assistant_id, refresh=True).file_ids == []
+    assert remote_file_ids(client) == uploaded
+
+
+def test_delete_removed_only_deletes_files_the_sync_uploaded_and_nothing_uses(assistant_manager, client, tmp_path):
+    assistant_id, other_assistant_id = new_assistant(assistant_manager), new_assistant(assistant_manager)
+    shared_directory, synced_directory = tmp_path / "shared", tmp_path / "synced"
+    shared_directory.mkdir()
+    synced_directory.mkdir()
+    # Content uploaded before the sync is reused through the upload cache, so the sync does not own it
+    reused_id = assistant_manager.file_manager.create(write(shared_directory, "reused.txt", "Reused"), "assistants")
+    write(synced_directory, "reused.txt", "Reused")
+    write(synced_directory, "owned.txt", "Owned")
+    write(synced_directory, "attached.txt", "Attached elsewhere")
+    sync = DirectorySync(assistant_manager)
+    sync.sync(str(synced_directory), assistant_id)
+    manifest = {path: entry["file_id"] for path, entry in
+                sync_manifest(sync, synced_directory, assistant_id).items()}
+    assistant_manager.add_files_to_assistant(other_assistant_id, [manifest["attached.txt"]])
+
+    for name in ("reused.txt", "owned.txt", "attached.txt"):
+        os.remove(synced_directory / name)
+    sync.sync(str(synced_directory), assistant_id, delete_removed=True)
+
+    remaining = remote_file_ids(client)
+    assert manifest["reused.txt"] == reused_id and reused_id in remaining
+    assert manifest["attached.txt"] in remaining
+    assert manifest["owned.txt"] not in remaining
@@ -0,0 +1,52 @@
+# ./tests/test_file_index.py
+
+import os
+import pytest
+from chat_bot.file_index import FileIndex
+
+
+@pytest.fixture
+def documents(tmp_path):
+    root = tmp_path / "documents"
+    for relative_path in ["report.txt", "reports/summary.txt", "reports/q1/report_final.txt",
+                          "notes/rough_export_plan.txt", "misc/r_e_p_o_r_t.md", ".git/config"]:
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(relative_path)
+    return root
+
+
+def ranked(index, query):
+    return [os.path.relpath(path, index.root) for path in index.search(query)]
+
+
+def test_search_ranks_name_then_path_then_fuzzy_matches(documents):
+    index = FileIndex(str(documents))
+    index.refresh()
+    assert ranked(index, "REPORT") == [
+        "report.txt",                   # in the file name, shortest path
+        "reports/q1/report_final.txt",  # in the file name
+        "reports/summary.txt",          # in the directory name
+        "misc/r_e_p_o_r_t.md",          # scattered: 'r_e_p_o_r_t' spans 11 characters
+        "notes/rough_export_plan.txt",  # scattered: 'rough_export' spans 12 characters
+    ]
+    assert ranked(index, "report")[:1] == ["report.txt"]
+    assert ranked(index, "config") == []
+    assert ranked(index, "  ") == []
+
+
+def test_search_limit_keeps_the_best_matches(documents):
+    index = FileIndex(str(documents))
+    index.refresh()
+    assert [os.path.basename(path) for path in index.search("report", limit=2)] == ["report.txt", "report_final.txt"]
+
+
+def test_refresh_rescans_only_changed_directories(documents):
+    index = FileIndex(str(documents))
+    assert index.refresh() == 5
+    assert index.refresh() == 0
+    (documents / "notes" / "report_draft.txt").write_text("Draft.")
+    assert index.refresh() == 1
+    assert "notes/report_draft.txt" in ranked(index, "draft")
+    # A new index for the same root starts from the saved copy
+    assert FileIndex(str(documents)).refresh() == 0
@@ -0,0 +1,58 @@
+# ./tests/test_file_list_cache.py
+
+import os
+from openai import OpenAI
+from chat_bot import file_list_cache as file_list_cache_module
+from chat_bot.file_list_cache import FileListCache
+from chat_bot.local_state import account_key
+from chat_bot.openai_assistant import create_file_manager
+
+FILES = {"file-1": {"filename": "notes.txt", "purpose": "assistants"}}
+
+
+def test_listing_expires_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(file_list_cache_module.time, "time", lambda: now[0])
+    cache = FileListCache(ttl=60)
+    assert cache.get() is None
+    cache.store(FILES)
+    now[0] += 59
+    assert cache.get() == FILES
+    now[0] += 2
+    assert cache.get() is None
+
+
+def test_uploads_and_deletions_are_written_through():
+    cache = FileListCache()
+    cache.store(FILES)
+    cache.add("file-2", {"filename": "report.pdf", "purpose": "assistants"})
+    cache.remove("file-1")
+    assert list(cache.get()) == ["file-2"]
+    # Another session sharing the snapshot sees the changes
+    assert list(FileListCache().get()) == ["file-2"]
+
+
+def test_invalidate_discards_the_listing_for_every_session():
+    cache = FileListCache()
+    other_session = FileListCache()
+    cache.store(FILES)
+    assert other_session.get() == FILES
+    cache.invalidate()
+    assert cache.get() is None
+    assert other_session.get() is None
+
+
+def test_each_endpoint_and_account_has_its_own_cache():
+    clients = [OpenAI(api_key="sk-one", base_url="http://127.0.0.1:1/v1"),
+               OpenAI(api_key="sk-two", base_url="http://127.0.0.1:1/v1"),
+               OpenAI(api_key="sk-one", base_url="http://127.0.0.1:2/v1"),
+               OpenAI(api_key="sk-one", base_url="http://127.0.0.1:1/v1", organization="org-other")]
+    assert len({account_key(client) for client in clients}) == len(clients)
+
+    file_managers = [create_file_manager(client) for client in clients[:2]]
+    file_managers[0].list_cache.store(FILES)
+    file_managers[0].upload_cache.put("hash", "assistants", "file-1")
+    assert file_managers[1].list_cache.get() is None
+    assert file_managers[1].upload_cache.get("hash", "assistants") is None
+    assert create_file_manager(clients[0]).list_cache.get() == FILES
+    assert "sk-one" not in os.path.basename(file_managers[0].list_cache.snapshot_path)
@@ -0,0 +1,37 @@
+# ./tests/test_file_manager.py
+
+import time
+from types import SimpleNamespace
+import pytest
+from chat_bot import file_manager as file_manager_module
+from chat_bot.emulator import EmulatorConfig, start_emulator
+from chat_bot.file_manager import FileManager
+from chat_bot.rate_limiter import RateLimitScheduler
+from chat_bot.utility import initiate_client
+
+
+@pytest.fixture
+def failing_server(monkeypatch):
+    # create_many's backoff is not what is being tested
+    monkeypatch.setattr(file_manager_module, "time", SimpleNamespace(sleep=lambda seconds: None,
+                                                                     monotonic=time.monotonic))
+    server = start_emulator(EmulatorConfig(failure_rate=1.0))
+    yield server
+    server.shutdown()
+
+
+def upload_requests(server):
+    return [entry for entry in server.state.request_log if entry["method"] == "POST"]
+
+
+@pytest.mark.parametrize("rate_limiter", [None, RateLimitScheduler(base_delay=0.001)])
+def test_create_many_sends_each_file_max_retries_plus_one_times(failing_server, tmp_path, rate_limiter):
+    file_path = tmp_path / "document.txt"
+    file_path.write_text("Document.")
+    client = initiate_client(base_url=failing_server.base_url, rate_limiter=rate_limiter)
+
+    result, = FileManager(client).create_many([str(file_path)], "assistants", max_retries=3, show_progress=False)
+
+    assert result["file_id"] is None
+    assert result["attempts"] == 4
+    assert len(upload_requests(failing_server)) == 4
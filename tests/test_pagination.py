@@ -0,0 +1,49 @@
+# ./tests/test_pagination.py
+
+from types import SimpleNamespace
+from chat_bot.pagination import iterate_pages
+
+
+def make_items(count):
+    return [SimpleNamespace(id=f"item_{index:04d}") for index in range(count)]
+
+
+def cursor_listing(items):
+    def fetch_page(after, limit):
+        start = 0 if after is None else [item.id for item in items].index(after) + 1
+        return items[start:start + limit]
+    return fetch_page
+
+
+def test_follows_the_cursor_across_pages():
+    items = make_items(45)
+    assert list(iterate_pages(cursor_listing(items), page_size=10)) == items
+
+
+def test_stops_after_a_full_last_page():
+    items = make_items(30)
+    assert list(iterate_pages(cursor_listing(items), page_size=10, prefetch=False)) == items
+
+
+def test_empty_listing():
+    assert list(iterate_pages(lambda after, limit: [], page_size=10)) == []
+
+
+def test_listing_that_ignores_the_cursor_and_limit():
+    items = make_items(250)
+    assert list(iterate_pages(lambda after, limit: items, page_size=100)) == items
+
+
+def test_listing_that_ignores_the_cursor_with_exactly_one_page():
+    items = make_items(100)
+    for prefetch in (True, False):
+        assert list(iterate_pages(lambda after, limit: items, page_size=100, prefetch=prefetch)) == items
+
+
+def test_listing_that_restarts_at_the_cursor():
+    items = make_items(10)
+
+    def fetch_page(after, limit):
+        start = 0 if after is None else [item.id for item in items].index(after)
+        return items[start:start + limit]
+    assert list(iterate_pages(fetch_page, page_size=10)) == items
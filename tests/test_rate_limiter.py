@@ -0,0 +1,132 @@
+# ./tests/test_rate_limiter.py
+
+import time
+import httpx
+import pytest
+from chat_bot.rate_limiter import (MAX_BUFFERED_BODY_SIZE, NO_RETRY_HEADER, RateLimitScheduler, RateLimitedTransport,
+                                   TokenBucket, is_replayable, parse_reset_duration)
+
+API_URL = "https://api.example.com/v1/threads/thread_1/runs"
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("20ms", 0.02), ("1s", 1.0), ("6m0s", 360.0), ("1h2m3.5s", 3723.5), ("0.5", 0.5),
+    ("", None), (None, None), ("soon", None),
+])
+def test_parse_reset_duration(value, seconds):
+    assert parse_reset_duration(value) == (pytest.approx(seconds) if seconds is not None else None)
+
+
+def test_token_bucket_serves_the_burst_then_queues_reservations():
+    bucket = TokenBucket(rate=10.0, capacity=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_token_bucket_pause_and_balance():
+    bucket = TokenBucket(rate=10.0, capacity=5)
+    bucket.pause_until(time.monotonic() + 1.0)
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.01)
+    bucket = TokenBucket(rate=10.0, capacity=5)
+    bucket.limit_balance(0)
+    assert bucket.reserve(2) == pytest.approx(0.2, abs=0.01)
+
+
+def response_with(headers, status_code=200):
+    return httpx.Response(status_code, headers=headers)
+
+
+def test_request_headers_set_the_rate_and_pause_an_exhausted_class():
+    scheduler = RateLimitScheduler(requests_per_second=8.0, min_rate=0.5)
+    scheduler.observe("runs", response_with({"x-ratelimit-remaining-requests": "20",
+                                             "x-ratelimit-reset-requests": "10s"}))
+    assert scheduler.metrics()["runs"]["rate"] == 2.0
+    scheduler.observe("runs", response_with({"x-ratelimit-remaining-requests": "1",
+                                             "x-ratelimit-reset-requests": "1m"}))
+    assert scheduler.metrics()["runs"]["rate"] == 0.5
+    scheduler.observe("files", response_with({"x-ratelimit-remaining-requests": "0",
+                                              "x-ratelimit-reset-requests": "2s"}))
+    bucket, _ = scheduler._bucket("files")
+    assert bucket.reserve() == pytest.approx(2.0, abs=0.05)
+
+
+def test_token_headers_estimate_the_cost_and_pace_requests():
+    scheduler = RateLimitScheduler()
+    token_headers = {"x-ratelimit-limit-tokens": "1000", "x-ratelimit-reset-tokens": "10s"}
+    scheduler.observe("runs", response_with(dict(token_headers, **{"x-ratelimit-remaining-tokens": "1000"})))
+    scheduler.observe("runs", response_with(dict(token_headers, **{"x-ratelimit-remaining-tokens": "600"})))
+    assert scheduler.metrics()["runs"]["tokens_per_request"] == 400
+    assert scheduler.token_bucket.rate == 60.0
+    scheduler.observe("runs", response_with(dict(token_headers, **{"x-ratelimit-remaining-tokens": "0"})))
+    assert scheduler.metrics()["runs"]["tokens_per_request"] == 500
+    # The budget is spent: the next request waits for the window to reset
+    assert scheduler.token_bucket.reserve(500) == pytest.approx(10.0, abs=0.05)
+
+
+def test_malformed_headers_are_ignored():
+    scheduler = RateLimitScheduler(requests_per_second=8.0)
+    scheduler.observe("runs", response_with({"x-ratelimit-remaining-requests": "many",
+                                             "x-ratelimit-reset-requests": "1s",
+                                             "x-ratelimit-remaining-tokens": "lots",
+                                             "x-ratelimit-reset-tokens": "1s"}))
+    assert scheduler.metrics()["runs"]["rate"] == 8.0
+    assert scheduler.token_bucket is None
+    request = httpx.Request("POST", API_URL, headers={"content-length": "unknown"},
+                            content=iter([b"body"]))
+    assert not is_replayable(request)
+
+
+def test_replayable_bodies():
+    assert is_replayable(httpx.Request("POST", API_URL, json={"assistant_id": "asst_1"}))
+    small = httpx.Request("POST", API_URL, headers={"content-length": "4"}, content=iter([b"body"]))
+    assert is_replayable(small)
+    large = httpx.Request("POST", API_URL, headers={"content-length": str(MAX_BUFFERED_BODY_SIZE + 1)},
+                          content=iter([b"body"]))
+    assert not is_replayable(large)
+
+
+def failing_transport(status_codes):
+    """Answers with the given status codes in turn and counts the requests it received."""
+    sent = []
+
+    def handler(request):
+        request.read()
+        sent.append(request)
+        return httpx.Response(status_codes[min(len(sent), len(status_codes)) - 1])
+    return httpx.MockTransport(handler), sent
+
+
+def send(transport, request):
+    with httpx.Client(transport=transport) as client:
+        return client.send(request)
+
+
+def test_transport_retries_until_success():
+    mock, sent = failing_transport([503, 429, 200])
+    transport = RateLimitedTransport(mock, RateLimitScheduler(base_delay=0.001))
+    response = send(transport, httpx.Request("POST", API_URL, json={"assistant_id": "asst_1"}))
+    assert response.status_code == 200
+    assert response.extensions["retries"] == 2
+    assert len(sent) == 3
+    assert all(request.content == sent[0].content for request in sent)
+    assert transport.scheduler.metrics()["runs"]["retries"] == 2
+
+
+def test_transport_gives_up_after_max_retries():
+    mock, sent = failing_transport([503])
+    transport = RateLimitedTransport(mock, RateLimitScheduler(max_retries=2, base_delay=0.001))
+    assert send(transport, httpx.Request("POST", API_URL, json={})).status_code == 503
+    assert len(sent) == 3
+
+
+def test_transport_sends_unreplayable_and_marked_requests_once():
+    mock, sent = failing_transport([503])
+    transport = RateLimitedTransport(mock, RateLimitScheduler(base_delay=0.001))
+    streamed = httpx.Request("POST", API_URL, content=iter([b"large upload"]))
+    assert send(transport, streamed).status_code == 503
+    marked = httpx.Request("POST", API_URL, json={}, headers={NO_RETRY_HEADER: "1"})
+    assert send(transport, marked).status_code == 503
+    assert len(sent) == 2
+    assert NO_RETRY_HEADER not in sent[1].headers
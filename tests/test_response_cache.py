@@ -0,0 +1,74 @@
+# ./tests/test_response_cache.py
+
+from types import SimpleNamespace
+from chat_bot import response_cache as response_cache_module
+from chat_bot.response_cache import ResponseCache
+
+REPLY = {"messages": [{"role": "assistant", "content": "Cached answer."}]}
+
+
+def assistant(assistant_id="asst_1", instructions="Answer.", file_ids=()):
+    return SimpleNamespace(id=assistant_id, model="gpt-4-1106-preview", instructions=instructions, tools=[],
+                           file_ids=list(file_ids))
+
+
+def test_prompts_match_after_whitespace_normalization():
+    cache = ResponseCache()
+    cache.put("asst_1", "What is this?", [], REPLY)
+    assert cache.get("asst_1", "What is this?", []) is None  # the assistant was never recorded
+    cache.record_assistant(assistant())
+    cache.put("asst_1", "What  is\nthis? ", ["file-2", "file-1"], REPLY)
+    assert cache.get("asst_1", "What is this?", ["file-1", "file-2"]) == REPLY
+    assert cache.get("asst_1", "what is this?", ["file-1", "file-2"]) is None
+    assert cache.get("asst_1", "What is this?", []) is None
+
+
+def test_changing_the_assistant_drops_its_replies():
+    cache = ResponseCache()
+    cache.record_assistant(assistant())
+    cache.record_assistant(assistant("asst_2"))
+    cache.put("asst_1", "Question", [], REPLY)
+    cache.put("asst_2", "Question", [], REPLY)
+
+    cache.record_assistant(assistant())
+    assert cache.get("asst_1", "Question", []) == REPLY
+    cache.record_assistant(assistant(file_ids=["file-1"]))
+    assert cache.get("asst_1", "Question", []) is None
+    # Changing back does not revive replies made under the old configuration
+    cache.record_assistant(assistant())
+    assert cache.get("asst_1", "Question", []) is None
+
+    cache.forget_assistant("asst_2")
+    assert cache.fingerprint("asst_2") is None
+    assert cache.get("asst_2", "Question", []) is None
+
+
+def test_deleting_a_file_drops_the_replies_that_used_it():
+    cache = ResponseCache()
+    cache.record_assistant(assistant())
+    cache.put("asst_1", "Summarize", ["file-1"], REPLY)
+    cache.put("asst_1", "Compare", ["file-1", "file-2"], REPLY)
+    cache.put("asst_1", "Explain", ["file-2"], REPLY)
+    cache.forget_file("file-1")
+    assert cache.get("asst_1", "Summarize", ["file-1"]) is None
+    assert cache.get("asst_1", "Compare", ["file-1", "file-2"]) is None
+    assert cache.get("asst_1", "Explain", ["file-2"]) == REPLY
+
+
+def test_replies_expire_and_the_least_recently_used_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache_module.time, "time", lambda: now[0])
+    cache = ResponseCache(max_entries=2, ttl=60)
+    cache.record_assistant(assistant())
+    for prompt in ("First", "Second"):
+        now[0] += 1
+        cache.put("asst_1", prompt, [], REPLY)
+    now[0] += 1
+    assert cache.get("asst_1", "First", []) == REPLY
+    now[0] += 1
+    cache.put("asst_1", "Third", [], REPLY)
+    assert cache.get("asst_1", "Second", []) is None
+    assert cache.get("asst_1", "First", []) == REPLY
+
+    now[0] += 61
+    assert cache.get("asst_1", "Third", []) is None
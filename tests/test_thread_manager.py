@@ -0,0 +1,76 @@
+# ./tests/test_thread_manager.py
+
+import pytest
+from chat_bot.emulator import EmulatorConfig, start_emulator
+from chat_bot.thread_manager import ThreadManager
+from chat_bot.utility import initiate_client
+from chat_bot.wait_strategy import FixedWaitStrategy
+
+
+class FiniteWaitStrategy(FixedWaitStrategy):
+    def __init__(self, polls, interval=0.01):
+        super().__init__(interval=interval)
+        self.polls = polls
+
+    def delays(self):
+        return iter([self.interval] * self.polls)
+
+
+@pytest.fixture
+def emulator():
+    servers = []
+
+    def start(wait_strategy=None, **config):
+        server = start_emulator(EmulatorConfig(**dict({"queue_time": 0.0, "run_duration": 0.0,
+                                                        "token_interval": 0.0}, **config)))
+        servers.append(server)
+        client = initiate_client(base_url=server.base_url)
+        assistant = client.beta.assistants.create(model="gpt-4-1106-preview", name="Test", instructions="Answer.")
+        thread_manager = ThreadManager(client, assistant.id, wait_strategy=wait_strategy)
+        thread_manager.create_thread()
+        return thread_manager
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def test_wait_for_run_cancels_when_the_delays_run_out(emulator):
+    thread_manager = emulator(wait_strategy=FiniteWaitStrategy(polls=2), run_duration=30.0, cancel_duration=0.05)
+    assert thread_manager.add_message_and_wait_for_reply("Hello", []) is None
+    assert thread_manager.last_run.status == "cancelled"
+    # The thread takes messages again only once the run has left 'cancelling'.
+    thread_manager.client.beta.threads.messages.create(thread_id=thread_manager.thread_id, role="user",
+                                                       content="Still there?")
+
+
+def streamed(thread_manager, user_message):
+    fragments = []
+    deltas = thread_manager.stream_reply(user_message, [])
+    while True:
+        try:
+            fragments.append(next(deltas))
+        except StopIteration as stop:
+            return fragments, stop.value
+
+
+def test_stream_reply_yields_fragments_then_the_message(emulator):
+    thread_manager = emulator()
+    fragments, message = streamed(thread_manager, "Tell me about streams")
+    assert len(fragments) > 1
+    assert "".join(fragments) == message.content[0].text.value == "You said: Tell me about streams"
+    assert thread_manager.last_run.status == "completed"
+    assert thread_manager.last_message_id == message.id
+
+
+def test_stream_reply_stops_on_a_failed_run(emulator):
+    thread_manager = emulator(run_failure_rate=1.0)
+    assert streamed(thread_manager, "Hello") == ([], None)
+    assert thread_manager.last_run.status == "failed"
+
+
+def test_stream_reply_stops_on_an_error_event(emulator, capsys):
+    thread_manager = emulator(stream_error_rate=1.0)
+    fragments, message = streamed(thread_manager, "Tell me about streams")
+    assert fragments == ["You "]
+    assert message is None
+    assert "Stream error: Emulated stream error." in capsys.readouterr().out
@@ -0,0 +1,120 @@
+# ./tests/test_thread_registry.py
+
+import io
+import json
+import sqlite3
+import pytest
+from chat_bot import thread_registry as thread_registry_module
+from chat_bot.thread_registry import ThreadRegistry
+
+
+class NoFullTextConnection(sqlite3.Connection):
+    """A connection behaving like an SQLite build without the FTS5 extension."""
+    def execute(self, sql, *args):
+        if "USING fts5" in sql:
+            raise sqlite3.OperationalError("no such module: fts5")
+        return super().execute(sql, *args)
+
+
+@pytest.fixture(params=["fts5", "fallback"])
+def registry(request, monkeypatch):
+    if request.param == "fallback":
+        connect = sqlite3.connect
+        monkeypatch.setattr(thread_registry_module.sqlite3, "connect",
+                            lambda *args, **kwargs: connect(*args, factory=NoFullTextConnection, **kwargs))
+    registry = ThreadRegistry()
+    assert registry.full_text == (request.param == "fts5")
+    return registry
+
+
+def entry(message_id, role, content, created_at=0):
+    return {"message_id": message_id, "role": role, "content": content, "run_id": None,
+            "file_ids": [], "created_at": created_at}
+
+
+def test_transcript_keeps_order_and_skips_stored_messages(registry):
+    registry.register_thread("thread_1", "asst_1")
+    registry.add_entries("thread_1", [entry("msg_1", "user", "How do tides work?\nThanks"),
+                                      entry("msg_2", "assistant", "The moon pulls the oceans.")])
+    registry.add_entries("thread_1", [entry("msg_2", "assistant", "The moon pulls the oceans."),
+                                      entry("msg_3", "user", "And the sun?")])
+    assert [item["message_id"] for item in registry.transcript("thread_1")] == ["msg_1", "msg_2", "msg_3"]
+    thread = registry.get_thread("thread_1")
+    assert thread["title"] == "How do tides work?"
+    assert thread["last_message_id"] == "msg_3"
+
+
+def test_local_entries_do_not_move_the_cursor(registry):
+    registry.register_thread("thread_1", "asst_1")
+    registry.add_entries("thread_1", [entry("msg_1", "user", "Hello")])
+    registry.add_entries("thread_1", [entry("local_1", "assistant", "Cached reply")], move_cursor=False)
+    assert registry.get_thread("thread_1")["last_message_id"] == "msg_1"
+
+
+def test_rolled_over_conversations_are_listed_once(registry):
+    registry.register_thread("thread_1", "asst_1")
+    registry.add_entries("thread_1", [entry("msg_1", "user", "Long conversation"), entry("msg_2", "assistant", "Yes")])
+    registry.register_thread("thread_2", "asst_1", parent_thread_id="thread_1")
+    registry.add_entries("thread_2", [entry("msg_3", "user", "Summary")])
+    registry.register_thread("thread_3", "asst_2")
+
+    threads = registry.list_threads("asst_1")
+    assert [(thread["thread_id"], thread["title"], thread["message_count"]) for thread in threads] == [
+        ("thread_2", "Long conversation", 3)]
+    assert registry.lineage("thread_2") == ["thread_1", "thread_2"]
+
+
+def test_forget_thread_removes_the_transcript(registry):
+    registry.register_thread("thread_1", "asst_1")
+    registry.add_entries("thread_1", [entry("msg_1", "user", "Forget me")])
+    registry.forget_thread("thread_1")
+    assert registry.get_thread("thread_1") is None
+    assert registry.transcript("thread_1") == []
+
+
+@pytest.fixture
+def conversations(registry):
+    registry.register_thread("thread_1", "asst_1")
+    registry.add_entries("thread_1", [entry("msg_1", "user", "Where is the quarterly report?"),
+                                      entry("msg_2", "assistant", "The quarterly figures are in report.pdf.")])
+    registry.register_thread("thread_2", "asst_2")
+    registry.add_entries("thread_2", [entry("msg_3", "user", "Reporting lines, please."),
+                                      entry("msg_4", "assistant", "Nothing about figures here.")])
+    return registry
+
+
+def found(registry, query, **kwargs):
+    return sorted(result["message_id"] for result in registry.search(query, **kwargs))
+
+
+def test_search_matches_every_term_as_a_whole_word(conversations):
+    assert found(conversations, "quarterly report") == ["msg_1", "msg_2"]
+    assert found(conversations, "QUARTERLY figures") == ["msg_2"]
+    assert found(conversations, "reporting") == ["msg_3"]
+    assert found(conversations, "report*") == ["msg_1", "msg_2", "msg_3"]
+    assert found(conversations, "figures", assistant_id="asst_2") == ["msg_4"]
+    assert found(conversations, "absent") == []
+    assert found(conversations, "?!") == []
+
+
+def test_search_results_carry_the_thread_and_a_snippet(conversations):
+    result, = conversations.search("figures report", assistant_id="asst_1")
+    assert result["thread_id"] == "thread_1"
+    assert result["title"] == "Where is the quarterly report?"
+    assert "figures" in result["snippet"].lower()
+
+
+def test_forgotten_threads_are_not_found(conversations):
+    conversations.forget_thread("thread_1")
+    assert found(conversations, "report*") == ["msg_3"]
+
+
+def test_export_writes_json_lines_in_batches(conversations, monkeypatch):
+    monkeypatch.setattr(thread_registry_module, "EXPORT_BATCH_SIZE", 1)
+    output = io.StringIO()
+    assert conversations.export_messages(output) == 4
+    exported = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [item["message_id"] for item in exported] == ["msg_1", "msg_2", "msg_3", "msg_4"]
+    assert exported[0]["thread_id"] == "thread_1"
+    output = io.StringIO()
+    assert conversations.export_messages(output, assistant_id="asst_2") == 2
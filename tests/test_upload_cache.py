@@ -0,0 +1,68 @@
+# ./tests/test_upload_cache.py
+
+import hashlib
+import pytest
+from chat_bot import upload_cache as upload_cache_module
+from chat_bot.emulator import EmulatorConfig, start_emulator
+from chat_bot.file_manager import FileManager
+from chat_bot.upload_cache import UploadCache, hash_file
+from chat_bot.utility import initiate_client
+
+
+@pytest.fixture
+def server():
+    server = start_emulator(EmulatorConfig())
+    yield server
+    server.shutdown()
+
+
+def upload_requests(server):
+    return [entry for entry in server.state.request_log if entry["method"] == "POST"]
+
+
+def test_hash_file_matches_with_and_without_a_memory_map(tmp_path, monkeypatch):
+    file_path = tmp_path / "document.bin"
+    content = bytes(range(256)) * 1000
+    file_path.write_bytes(content)
+    expected = hashlib.sha256(content).hexdigest()
+    assert hash_file(str(file_path)) == expected
+    monkeypatch.setattr(upload_cache_module, "MMAP_THRESHOLD", 1)
+    monkeypatch.setattr(upload_cache_module, "CHUNK_SIZE", 1000)
+    assert hash_file(str(file_path)) == expected
+
+
+def test_entries_are_keyed_by_content_and_purpose():
+    cache = UploadCache()
+    cache.put("hash", "assistants", "file-1")
+    assert cache.get("hash", "assistants") == "file-1"
+    assert cache.get("hash", "fine-tune") is None
+    assert cache.get("other", "assistants") is None
+    cache.retain(["file-2"])
+    assert cache.get("hash", "assistants") is None
+
+
+def test_identical_content_is_uploaded_once(server, tmp_path):
+    (tmp_path / "a.txt").write_text("Same content.")
+    (tmp_path / "b.txt").write_text("Same content.")
+    file_manager = FileManager(initiate_client(base_url=server.base_url), upload_cache=UploadCache())
+    first = file_manager.create(str(tmp_path / "a.txt"), "assistants")
+    assert file_manager.create(str(tmp_path / "b.txt"), "assistants") == first
+    assert len(upload_requests(server)) == 1
+
+
+def test_deleted_files_are_uploaded_again(server, tmp_path):
+    file_path = tmp_path / "a.txt"
+    file_path.write_text("Content.")
+    client = initiate_client(base_url=server.base_url)
+    file_manager = FileManager(client, upload_cache=UploadCache())
+    first = file_manager.create(str(file_path), "assistants")
+    file_manager.delete(first)
+    second = file_manager.create(str(file_path), "assistants")
+    assert second != first
+
+    # A file deleted elsewhere is found missing by the existence check and forgotten
+    client.files.delete(second)
+    third = file_manager.create(str(file_path), "assistants")
+    assert third not in (first, second)
+    assert file_manager.upload_cache.get(hash_file(str(file_path)), "assistants") == third
+    assert len(upload_requests(server)) == 3